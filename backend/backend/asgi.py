@@ -8,9 +8,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import atexit
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+from reddit.metrics import mark_process_dead  # noqa: E402
+
+# uvicorn restarts workers as separate processes; forget each one's gauges as it exits
+atexit.register(mark_process_dead, os.getpid())
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
@@ -13,3 +14,19 @@ app.autodiscover_tasks()
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
+
+
+@worker_init.connect
+def start_metrics_server(sender, **kwargs):
+    from celery.concurrency import get_implementation
+    from celery.concurrency.prefork import TaskPool
+    from reddit.metrics import start_metrics_server
+
+    start_metrics_server(forking=issubclass(get_implementation(sender.pool_cls), TaskPool))
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    from reddit.metrics import mark_process_dead
+
+    mark_process_dead(pid or os.getpid())
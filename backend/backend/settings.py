@@ -63,6 +63,7 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'reddit.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -181,8 +182,119 @@ CELERY_BEAT_SCHEDULE = {
     'schedule-due-posts-every-minute': {
         'task': 'reddit.tasks.schedule_due_posts',
         'schedule': crontab(minute='*'),
+    },
+    'prepare-upcoming-posts-every-minute': {
+        'task': 'reddit.tasks.prepare_upcoming_posts',
+        'schedule': crontab(minute='*'),
+    },
+    'check-reddit-accounts': {
+        'task': 'reddit.tasks.check_reddit_accounts',
+        'schedule': crontab(minute='*/15'),
+    },
+    'check-submission-removals': {
+        'task': 'reddit.tasks.check_submission_removals',
+        'schedule': crontab(minute='*/5'),
+    },
+    'prune-submission-attempts': {
+        'task': 'reddit.tasks.prune_submission_attempts',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
+# Number of due posts claimed, updated and published per dispatcher round-trip
+DISPATCH_BATCH_SIZE = env.int('DISPATCH_BATCH_SIZE', default=500)
+
+# Distinct (cron_schedule, user_timezone) pairs kept parsed per process
+CRON_SCHEDULE_CACHE_SIZE = env.int('CRON_SCHEDULE_CACHE_SIZE', default=1024)
+
+# Precision scheduler (manage.py run_scheduler). The beat poll above keeps
+# running as a safety net; claims are lock-safe so both can run at once.
+REDIS_URL = env('REDIS_URL', default=CELERY_BROKER_URL)
+SCHEDULER_CHANNEL = env('SCHEDULER_CHANNEL', default='reddit:schedule-changes')
+SCHEDULER_HORIZON_SECONDS = env.int('SCHEDULER_HORIZON_SECONDS', default=5 * 60)
+# Post ids are split into this many shards, leased out to the running
+# schedulers. Keep it well above the number of scheduler nodes, and the same
+# on every node.
+SCHEDULER_SHARDS = env.int('SCHEDULER_SHARDS', default=64)
+SCHEDULER_LEASE_SECONDS = env.int('SCHEDULER_LEASE_SECONDS', default=15)
+
+# Idempotent submission. A run's Redis claim must outlive the slowest submit
+# call; the recorded result lets retries finish a run without posting again.
+SUBMISSION_CLAIM_TIMEOUT = env.int('SUBMISSION_CLAIM_TIMEOUT', default=10 * 60)
+SUBMISSION_RECORD_TIMEOUT = env.int('SUBMISSION_RECORD_TIMEOUT', default=24 * 60 * 60)
+# How long a post may sit queued before its message is assumed lost and the run
+# is retried. Keep it well past the longest backlog the workers may have to work
+# through, and under SUBMISSION_RECORD_TIMEOUT.
+SUBMISSION_QUEUE_TIMEOUT = env.int('SUBMISSION_QUEUE_TIMEOUT', default=6 * 60 * 60)
+
+# Failed submissions are retried by the dispatcher, after an exponential
+# backoff with full jitter, until SUBMISSION_MAX_ATTEMPTS attempts have failed
+SUBMISSION_MAX_ATTEMPTS = env.int('SUBMISSION_MAX_ATTEMPTS', default=3)
+SUBMISSION_RETRY_DELAY = env.int('SUBMISSION_RETRY_DELAY', default=60)
+SUBMISSION_RETRY_DELAY_MAX = env.int('SUBMISSION_RETRY_DELAY_MAX', default=15 * 60)
+
+# Runs due within SUBMISSION_PREPARE_AHEAD seconds are prepared by the
+# prepare-upcoming-posts beat task: access token exchanged and shared with the
+# workers, account and subreddit checked, problems flagged on the post.
+SUBMISSION_PREPARE_AHEAD = env.int('SUBMISSION_PREPARE_AHEAD', default=5 * 60)
+SUBMISSION_PREPARE_CONCURRENCY = env.int('SUBMISSION_PREPARE_CONCURRENCY', default=8)
+
+# Subreddit metadata used to validate posts on create/update, shared through
+# the cache. Subreddits that don't exist are cached for a shorter time, since
+# they can still be created.
+SUBREDDIT_CACHE_TIMEOUT = env.int('SUBREDDIT_CACHE_TIMEOUT', default=6 * 60 * 60)
+SUBREDDIT_NEGATIVE_CACHE_TIMEOUT = env.int('SUBREDDIT_NEGATIVE_CACHE_TIMEOUT', default=15 * 60)
+SUBREDDIT_LOOKUP_CONCURRENCY = env.int('SUBREDDIT_LOOKUP_CONCURRENCY', default=8)
+# Seconds a create/update waits on Reddit for uncached subreddits before
+# skipping the subreddit checks
+SUBREDDIT_LOOKUP_TIMEOUT = env.int('SUBREDDIT_LOOKUP_TIMEOUT', default=5)
+
+# Who submits due posts: 'celery' (submit_reddit_post tasks) or 'async'
+# (manage.py run_async_submitter, many submissions in flight per process)
+SUBMISSION_WORKER = env('SUBMISSION_WORKER', default='celery')
+ASYNC_SUBMITTER_CONCURRENCY = env.int('ASYNC_SUBMITTER_CONCURRENCY', default=200)
+# Threads (and so database connections) the async submitter runs its queries on
+ASYNC_SUBMITTER_DB_THREADS = env.int('ASYNC_SUBMITTER_DB_THREADS', default=16)
+
+# Metrics. /metrics/ on the API; Celery workers and the scheduler serve it on
+# METRICS_PORT (0 disables). PROMETHEUS_MULTIPROC_DIR, an empty directory per
+# container, aggregates prefork and uvicorn worker processes; without it the
+# Celery worker doesn't serve metrics, as its children's would be missing.
+METRICS_PORT = env.int('METRICS_PORT', default=9808)
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_URL', default=REDIS_URL),
+        'KEY_PREFIX': 'schedularr',
     }
 }
+DASHBOARD_CACHE_TIMEOUT = env.int('DASHBOARD_CACHE_TIMEOUT', default=5 * 60)
+# Cached GET responses of the list endpoints, keyed by the user's cache version
+API_CACHE_TIMEOUT = env.int('API_CACHE_TIMEOUT', default=5 * 60)
+
+# Server-sent post status events (GET /api/reddit/posts/events/)
+POST_EVENTS_KEEPALIVE = env.int('POST_EVENTS_KEEPALIVE', default=15)
+POST_EVENTS_MAX_AGE = env.int('POST_EVENTS_MAX_AGE', default=30 * 60)
+POST_EVENTS_RETRY_MS = env.int('POST_EVENTS_RETRY_MS', default=3000)
+POST_EVENTS_QUEUE_SIZE = env.int('POST_EVENTS_QUEUE_SIZE', default=100)
+
+# Analytics: the per-attempt log is pruned after this many days, daily
+# rollups are kept; one analytics request may span at most ANALYTICS_MAX_DAYS
+SUBMISSION_ATTEMPT_RETENTION_DAYS = env.int('SUBMISSION_ATTEMPT_RETENTION_DAYS', default=90)
+ANALYTICS_MAX_DAYS = env.int('ANALYTICS_MAX_DAYS', default=366)
+
+# Rows fetched per server-side cursor round trip by the streaming exports
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+
+# Upper bound on rows accepted by one bulk post upload
+BULK_POST_MAX_ROWS = env.int('BULK_POST_MAX_ROWS', default=1000)
+
+# Async callable turning schedule text into a cron expression when the rule-based
+# parser can't; point it at a stub in tests to avoid calling the model
+TEXT_TO_CRON_MODEL = env('TEXT_TO_CRON_MODEL', default='reddit.text_to_cron.gemini_text_to_cron')
+TEXT_TO_CRON_CACHE_TIMEOUT = env.int('TEXT_TO_CRON_CACHE_TIMEOUT', default=30 * 24 * 60 * 60)
 
 
 # Reddit API Credentials
@@ -191,6 +303,36 @@ REDDIT_CLIENT_SECRET = env('REDDIT_CLIENT_SECRET', default='')
 REDDIT_REDIRECT_URI = env('REDDIT_REDIRECT_URI', default='http://localhost:8000/reddit/callback')
 REDDIT_USER_AGENT = env('REDDIT_USER_AGENT', default='django-reddit-scheduler:v1.0')
 
+# Authorized PRAW clients kept per worker process, evicted least recently used
+REDDIT_CLIENT_POOL_SIZE = env.int('REDDIT_CLIENT_POOL_SIZE', default=256)
+
+# Submission token buckets: BURST posts at once, then one every INTERVAL seconds.
+# Set an interval to 0 to disable that bucket.
+REDDIT_ACCOUNT_POST_BURST = env.int('REDDIT_ACCOUNT_POST_BURST', default=5)
+REDDIT_ACCOUNT_POST_INTERVAL = env.float('REDDIT_ACCOUNT_POST_INTERVAL', default=12)
+REDDIT_SUBREDDIT_POST_BURST = env.int('REDDIT_SUBREDDIT_POST_BURST', default=1)
+REDDIT_SUBREDDIT_POST_INTERVAL = env.float('REDDIT_SUBREDDIT_POST_INTERVAL', default=0)
+# How long past its slot a deferred run's reservation is kept for it to come back
+RATELIMIT_RESERVATION_TTL = env.int('RATELIMIT_RESERVATION_TTL', default=60 * 60)
+
+# Account health checks (check_reddit_accounts). An account is rechecked once
+# it has gone ACCOUNT_CHECK_INTERVAL seconds without a check or a successful post.
+ACCOUNT_CHECK_INTERVAL = env.int('ACCOUNT_CHECK_INTERVAL', default=6 * 60 * 60)
+ACCOUNT_CHECK_BATCH_SIZE = env.int('ACCOUNT_CHECK_BATCH_SIZE', default=100)
+ACCOUNT_CHECK_CONCURRENCY = env.int('ACCOUNT_CHECK_CONCURRENCY', default=8)
+
+# Removal tracking of submitted posts. Each (max age, interval) pair, in
+# seconds, sets how often posts younger than max age are re-checked; posts
+# older than the last max age stop being tracked.
+REMOVAL_CHECK_SCHEDULE = [
+    (60 * 60, 10 * 60),
+    (6 * 60 * 60, 30 * 60),
+    (24 * 60 * 60, 2 * 60 * 60),
+    (7 * 24 * 60 * 60, 12 * 60 * 60),
+]
+REMOVAL_CHECK_BATCH_SIZE = env.int('REMOVAL_CHECK_BATCH_SIZE', default=1000)
+REMOVAL_CHECK_CONCURRENCY = env.int('REMOVAL_CHECK_CONCURRENCY', default=8)
+
 # Frontend URL for redirects
 FRONTEND_URL = env('FRONTEND_URL', default='http://localhost:5173')
 
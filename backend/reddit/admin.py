@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import RedditAccount, ScheduledPost, SubmittedPost
+from .models import (
+    DailySubmissionStats,
+    RedditAccount,
+    ScheduledPost,
+    SubmissionAttempt,
+    SubmittedPost,
+)
 
 
 class RedditAccountAdmin(admin.ModelAdmin):
@@ -15,9 +21,11 @@ class ScheduledPostAdmin(admin.ModelAdmin):
         "subreddit",
         "title",
         "status",
+        "attempt_count",
         "last_run_started",
         "next_run",
     )
+    list_filter = ("status",)
 
 
 class SubmittedPostAdmin(admin.ModelAdmin):
@@ -27,10 +35,23 @@ class SubmittedPostAdmin(admin.ModelAdmin):
         "reddit_url",
         "title",
         "submitted_at",
+        "removed_by",
     )
+    list_filter = ("removed_by",)
+
+
+class SubmissionAttemptAdmin(admin.ModelAdmin):
+    list_display = ("attempted_at", "user", "subreddit", "succeeded", "error_class", "latency_ms")
+    list_filter = ("succeeded", "error_class")
+
+
+class DailySubmissionStatsAdmin(admin.ModelAdmin):
+    list_display = ("date", "user", "reddit_account", "subreddit", "attempts", "successes")
 
 
 # Register your models here.
 admin.site.register(RedditAccount, RedditAccountAdmin)
 admin.site.register(ScheduledPost, ScheduledPostAdmin)
 admin.site.register(SubmittedPost, SubmittedPostAdmin)
+admin.site.register(SubmissionAttempt, SubmissionAttemptAdmin)
+admin.site.register(DailySubmissionStats, DailySubmissionStatsAdmin)
@@ -0,0 +1,113 @@
+import datetime as dt
+
+from django.db import connection
+from django.db.models import Sum
+
+from .models import DailySubmissionStats, SubmissionAttempt
+
+# DailySubmissionStats column counting each SubmissionAttempt.error_class
+FAILURE_COLUMNS = {
+    "auth": "auth_failures",
+    "request": "request_failures",
+    "api": "api_failures",
+    "rate_limited": "rate_limited",
+    "other": "other_failures",
+}
+COUNTER_COLUMNS = ["attempts", "successes", *FAILURE_COLUMNS.values(), "total_latency_ms"]
+
+
+def record_attempt(post, latency, error_class=None, error_message=None, run_token=None):
+    """Log one submission attempt for `post` and add it to the day's rollup.
+
+    `latency` is the seconds spent on Reddit; leave `error_class` unset for
+    a successful attempt. Two statements, run in the caller's transaction
+    so the attempt is recorded together with whatever it changed.
+    """
+    now = dt.datetime.now(dt.timezone.utc)
+    latency_ms = round(latency * 1000)
+    SubmissionAttempt.objects.create(
+        user_id=post.user_id,
+        scheduled_post_id=post.id,
+        reddit_account_id=post.reddit_account_id,
+        subreddit=post.subreddit,
+        succeeded=error_class is None,
+        error_class=error_class,
+        error_message=error_message,
+        latency_ms=latency_ms,
+        run_token=run_token,
+    )
+    increment_daily_stats(
+        dict(
+            date=now.date(),
+            user_id=post.user_id,
+            reddit_account_id=post.reddit_account_id,
+            subreddit=post.subreddit.lower(),
+        ),
+        {
+            "attempts": 1,
+            "successes" if error_class is None else FAILURE_COLUMNS[error_class]: 1,
+            "total_latency_ms": latency_ms,
+        },
+    )
+
+
+def increment_daily_stats(key, counts):
+    """Add `counts` to the rollup row for `key`, creating it on the day's first attempt.
+
+    A single INSERT ... ON CONFLICT DO UPDATE, so concurrent workers can't
+    race to create the row and no savepoint is needed.
+    """
+    quote = connection.ops.quote_name
+    table = quote(DailySubmissionStats._meta.db_table)
+    values = {
+        **key,
+        "date": connection.ops.adapt_datefield_value(key["date"]),
+        **{column: counts.get(column, 0) for column in COUNTER_COLUMNS},
+    }
+    increments = ", ".join(
+        f"{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}"
+        for column in COUNTER_COLUMNS
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(map(quote, values))}) "
+            f"VALUES ({', '.join(['%s'] * len(values))}) "
+            f"ON CONFLICT ({', '.join(map(quote, key))}) DO UPDATE SET {increments}",
+            list(values.values()),
+        )
+
+
+def summarize_stats(stats, group_by=None):
+    """Sum rollup rows, overall or per `group_by` value, into analytics entries."""
+    sums = {column: Sum(column) for column in COUNTER_COLUMNS}
+    if group_by is None:
+        rows = [stats.aggregate(**sums)]
+    else:
+        group_fields = [group_by]
+        if group_by == "reddit_account":
+            group_fields.append("reddit_account__reddit_username")
+        rows = stats.order_by(*group_fields).values(*group_fields).annotate(**sums)
+
+    return [summarize_row(row) for row in rows]
+
+
+def summarize_row(row):
+    attempts = row.pop("attempts") or 0
+    successes = row.pop("successes") or 0
+    total_latency_ms = row.pop("total_latency_ms") or 0
+    failures = {
+        error_class: row.pop(column) or 0 for error_class, column in FAILURE_COLUMNS.items()
+    }
+    if "reddit_account__reddit_username" in row:
+        row["reddit_username"] = row.pop("reddit_account__reddit_username")
+    if "date" in row:
+        row["date"] = row["date"].isoformat()
+
+    return {
+        **row,
+        "attempts": attempts,
+        "successes": successes,
+        "failures": failures,
+        "success_rate": successes / attempts if attempts else None,
+        "avg_latency_ms": total_latency_ms / attempts if attempts else None,
+    }
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..cache import get_user_cache_version
+
+
+class UserVersionedListCacheMixin:
+    """Caches a list view's GET responses per user, with ETag revalidation.
+
+    Entries are keyed by the user's cache version, which moves whenever one of
+    their accounts, posts or submissions changes (see reddit.signals and
+    bump_user_cache_versions), so nothing is ever invalidated explicitly. The
+    ETag comes from the same version and the request URL: a client sending
+    If-None-Match gets a 304 after one cache lookup and no database queries.
+    While the cache is unreachable, lists are served straight from the database.
+    """
+
+    def list(self, request, *args, **kwargs):
+        version = get_user_cache_version(request.user.id)
+        if version is None:
+            return super().list(request, *args, **kwargs)
+        digest = hashlib.sha256(
+            f"{version}:{request.accepted_media_type}:{request.build_absolute_uri()}".encode()
+        ).hexdigest()[:32]
+        etag = quote_etag(digest)
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f"api:{type(self).__name__}:{request.user.id}:{digest}"
+            data = cache.get(cache_key)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+                cache.set(cache_key, data, settings.API_CACHE_TIMEOUT)
+            response = Response(data)
+
+        response["ETag"] = etag
+        # Let browsers keep the body but revalidate it on every request
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
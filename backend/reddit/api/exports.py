@@ -0,0 +1,57 @@
+import csv
+import json
+import datetime as dt
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_encoder = DjangoJSONEncoder()
+
+
+class Echo:
+    """A file-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    if isinstance(value, dt.datetime):
+        return _encoder.default(value)
+    return value
+
+
+async def export_rows(queryset, fields, output):
+    """Stream `fields` of every row in `queryset` as CSV or NDJSON.
+
+    Rows come from a server-side cursor, `EXPORT_CHUNK_SIZE` at a time, and
+    each chunk is written out as one piece, so memory use does not grow with
+    the number of rows exported. An async generator, so that under ASGI
+    each chunk is sent as soon as it is ready; a sync one is read to the end
+    before anything is sent.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    # values_list().aiterator() runs the query on the event loop; fetch the
+    # chunks off it instead, all on the same thread as the cursor needs
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+
+    writer = csv.writer(Echo())
+
+    def format_row(row):
+        if output == "csv":
+            return writer.writerow([export_value(value) for value in row])
+        return json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + "\n"
+
+    if output == "csv":
+        yield writer.writerow(fields)
+
+    while chunk := await next_chunk():
+        yield "".join(format_row(row) for row in chunk)
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    ordering = "-created_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class SubmittedAtCursorPagination(CursorPagination):
+    ordering = "-submitted_at"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
@@ -0,0 +1,24 @@
+import io
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """Parses a CSV body with a header row into a list of dicts, dropping empty cells."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(io.StringIO(stream.read().decode(encoding)))
+            return [
+                {key: value for key, value in row.items() if key and value not in ("", None)}
+                for row in reader
+            ]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ParseError(f"CSV parse error - {e}")
@@ -1,15 +1,45 @@
 import datetime
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from croniter import croniter, CroniterError
+from croniter import CroniterError
 
+from ..states import WORKER_STATUSES
+from ..subreddits import get_subreddit_metadata, subreddit_problems
+from ..utils import compile_schedule
 from ..models import RedditAccount, ScheduledPost, SubmittedPost
 
 
 User = get_user_model()
 
 
+def requested_fields(request):
+    """Parse `?fields=id,title` (keep only these) and `?fields=-selftext` (drop these)."""
+    include, exclude = set(), set()
+    if request is None or request.method != "GET":
+        return include, exclude
+
+    for name in request.query_params.get("fields", "").split(","):
+        name = name.strip()
+        if name.startswith("-"):
+            exclude.add(name[1:])
+        elif name:
+            include.add(name)
+    return include, exclude
+
+
+class FieldSelectionMixin:
+    """Lets GET requests trim the serialized fields with the `fields` query parameter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        include, exclude = requested_fields(self.context.get("request"))
+        for name in list(self.fields):
+            if (include and name not in include) or name in exclude:
+                self.fields.pop(name)
+
+
 class RedditAccountSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
 
@@ -33,10 +63,34 @@ class RedditAccountSerializer(serializers.ModelSerializer):
         ]
 
 
-class ScheduledPostSerializer(serializers.ModelSerializer):
+class UserRedditAccountField(serializers.PrimaryKeyRelatedField):
+    """Looks account ids up in the queryset loaded once, so bulk payloads cost one query."""
+
+    def to_internal_value(self, data):
+        if not hasattr(self, "_accounts"):
+            self._accounts = {account.pk: account for account in self.get_queryset()}
+        try:
+            return self._accounts[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class ScheduledPostListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # Look every row's subreddit up at once rather than row by row
+        if isinstance(data, list):
+            self.context["subreddit_metadata"] = get_subreddit_metadata(
+                row.get("subreddit") for row in data if isinstance(row, dict)
+            )
+        return super().to_internal_value(data)
+
+
+class ScheduledPostSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     username = serializers.CharField(source="user.username", read_only=True)
-    reddit_account = serializers.PrimaryKeyRelatedField(
+    reddit_account = UserRedditAccountField(
         queryset=RedditAccount.objects.none()  # Will be set in view
     )
     reddit_account_username = serializers.CharField(
@@ -45,6 +99,7 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ScheduledPost
+        list_serializer_class = ScheduledPostListSerializer
         fields = [
             "id",
             "user",
@@ -59,7 +114,10 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
             "end_date",
             "next_run",
             "status",
+            "attempt_count",
+            "next_attempt_at",
             "last_submission_error",
+            "preflight_error",
             "last_run_started",
             "last_run_finished",
             "created_at",
@@ -71,7 +129,10 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
             "username",
             "reddit_account_username",
             "next_run",
+            "attempt_count",
+            "next_attempt_at",
             "last_submission_error",
+            "preflight_error",
             "created_at",
             "updated_at",
         ]
@@ -82,13 +143,66 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
         if request and hasattr(request, "user") and request.user.is_authenticated:
             self.fields["reddit_account"].queryset = RedditAccount.objects.filter(user=request.user)
 
+    def validate_status(self, value):
+        if value in WORKER_STATUSES and (self.instance is None or value != self.instance.status):
+            raise serializers.ValidationError(f"Status '{value}' is set by the scheduler.")
+        return value
+
+    def validate(self, data):
+        """Check the post against its subreddit's rules, from the shared subreddit metadata cache.
+
+        If the subreddit isn't cached and Reddit can't be asked, or takes
+        longer than SUBREDDIT_LOOKUP_TIMEOUT, the checks are skipped and the
+        post is accepted; preparing its runs checks the subreddit again.
+        """
+        instance = self.instance
+        if instance is not None and not {"subreddit", "title", "selftext"} & data.keys():
+            return data
+
+        subreddit = data.get("subreddit", getattr(instance, "subreddit", None))
+        if not isinstance(subreddit, str) or not subreddit:
+            return data
+        metadata = self.context.get("subreddit_metadata")
+        if metadata is None or subreddit.lower() not in metadata:
+            metadata = get_subreddit_metadata([subreddit])
+        problems = subreddit_problems(
+            subreddit,
+            metadata[subreddit.lower()],
+            data.get("title", getattr(instance, "title", "")),
+            data.get("selftext", getattr(instance, "selftext", "")),
+        )
+        if problems:
+            raise serializers.ValidationError(problems)
+        return data
+
+    def update(self, instance, validated_data):
+        """Save only the fields being changed, so an edit made while the post is
+        being submitted can't put back a status the worker has since moved on from."""
+        changed = [
+            name for name, value in validated_data.items() if getattr(instance, name) != value
+        ]
+        if "status" in changed:
+            # Moving a post out of pending_retry or error drops its retry state
+            validated_data.update(attempt_count=0, next_attempt_at=None, run_token=None)
+            changed += ["attempt_count", "next_attempt_at", "run_token"]
+        if "subreddit" in changed or "reddit_account" in changed:
+            # The upcoming run has to be prepared and checked again
+            validated_data.update(prepared_at=None, preflight_error=None)
+            changed += ["prepared_at", "preflight_error"]
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        instance.save(update_fields=[*changed, "updated_at"])
+        return instance
+
     def validate_cron_schedule(self, value):
         # If the value is empty or None, it's considered valid (e.g., one-time post)
         if not value:
             return value
 
         # Check if the non-empty cron string is valid
-        if not croniter.is_valid(value):
+        try:
+            schedule = compile_schedule(value)
+        except (CroniterError, ValueError):
             raise serializers.ValidationError(f"Invalid cron schedule format: '{value}'")
 
         # Optional: Check if it can generate at least one future date
@@ -96,9 +210,8 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
         # like '* * 31 2 *' (Feb 31st)
         try:
             # Using a fixed date avoids issues with tests running near month/year ends
-            base_dt = datetime.datetime(2025, 1, 1, 0, 0)
-            iter = croniter(value, base_dt)
-            iter.get_next(datetime.datetime)
+            base_dt = datetime.datetime(2025, 1, 1, 0, 0, tzinfo=datetime.timezone.utc)
+            schedule.next_run(base_dt)
         except CroniterError as e:
             raise serializers.ValidationError(f"Cron schedule '{value}' is valid but cannot generate a future date: {e}")
         except ValueError as e:
@@ -106,7 +219,22 @@ class ScheduledPostSerializer(serializers.ModelSerializer):
         return value
 
 
-class SubmittedPostSerializer(serializers.ModelSerializer):
+class ScheduledPostBulkActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=["pause", "resume", "delete"])
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    status = serializers.ChoiceField(choices=ScheduledPost.STATUS_CHOICES, required=False)
+    subreddit = serializers.CharField(required=False)
+    reddit_account = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not set(data) - {"action"}:
+            raise serializers.ValidationError(
+                "Provide ids or at least one of status, subreddit or reddit_account."
+            )
+        return data
+
+
+class SubmittedPostSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     class Meta:
         model = SubmittedPost
         fields = [
@@ -141,6 +269,62 @@ class SubmittedPostSerializer(serializers.ModelSerializer):
         ]
 
 
+class SubmittedPostExportSerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    reddit_account = serializers.IntegerField(required=False)
+    subreddit = serializers.CharField(required=False)
+    fields = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_fields(self, value):
+        """The columns to export: SubmittedPostSerializer's fields, picked as on the list endpoints."""
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        available = SubmittedPostSerializer.Meta.fields
+        unknown = sorted({name.removeprefix("-") for name in names} - set(available))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+
+        include = {name for name in names if not name.startswith("-")}
+        exclude = {name[1:] for name in names if name.startswith("-")}
+        columns = [
+            name
+            for name in available
+            if (not include or name in include) and name not in exclude
+        ]
+        if not columns:
+            raise serializers.ValidationError("At least one field must be exported.")
+        return columns
+
+    def validate(self, data):
+        if "since" in data and "until" in data and data["since"] > data["until"]:
+            raise serializers.ValidationError("since must not be after until.")
+        return data
+
+
+class SubmissionAnalyticsQuerySerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    group_by = serializers.ChoiceField(
+        choices=["date", "reddit_account", "subreddit"], required=False
+    )
+    reddit_account = serializers.IntegerField(required=False)
+    subreddit = serializers.CharField(required=False)
+
+    def validate(self, data):
+        """Default to the last 30 days, inclusive; cap the span at ANALYTICS_MAX_DAYS."""
+        until = data.get("until") or datetime.datetime.now(datetime.timezone.utc).date()
+        since = data.get("since") or until - datetime.timedelta(days=29)
+        if since > until:
+            raise serializers.ValidationError("since must not be after until.")
+        if (until - since).days >= settings.ANALYTICS_MAX_DAYS:
+            raise serializers.ValidationError(
+                f"At most {settings.ANALYTICS_MAX_DAYS} days can be requested at once."
+            )
+        data["since"], data["until"] = since, until
+        return data
+
+
 class TextToCronRequestSerializer(serializers.Serializer):
     schedule_text = serializers.CharField(
         max_length=500,
@@ -8,17 +8,23 @@ urlpatterns = [
     path('user/unlink/', views.UnlinkRedditAccountView.as_view(), name='api_unlink_reddit_account'),
     path('user/reddit-login-url/', views.RedditLoginUrlView.as_view(), name='api_reddit_login_url'),
     path('dashboard/', views.DashboardView.as_view(), name='api_dashboard'),
+    path('analytics/', views.SubmissionAnalyticsView.as_view(), name='api_submission_analytics'),
 
     # Utility endpoints
     path('convert-cron/', views.TextToCronView.as_view(), name='api_convert_cron'),
 
     # Posts endpoints
     path('posts/', views.ScheduledPostListView.as_view(), name='api_posts_list_create'),
+    path('posts/bulk/', views.ScheduledPostBulkView.as_view(), name='api_posts_bulk_create'),
+    path('posts/bulk-action/', views.ScheduledPostBulkActionView.as_view(), name='api_posts_bulk_action'),
+    path('posts/dead-letter/', views.DeadLetterPostListView.as_view(), name='api_posts_dead_letter'),
+    path('posts/events/', views.PostEventsView.as_view(), name='api_posts_events'),
     path('posts/<int:pk>/', views.ScheduledPostDetailView.as_view(), name='api_posts_detail'),
     path('posts/<int:pk>/post-now/', views.PostNowView.as_view(), name='api_post_now'),
     path('posts/<int:scheduled_post_id>/submissions/', views.ScheduledPostSubmittedPostsView.as_view(), name='api_scheduled_post_submitted_posts'),
 
     # Submitted posts endpoints
     path('submissions/', views.SubmittedPostListView.as_view(), name='api_submitted_posts_list'),
+    path('submissions/export/', views.SubmittedPostExportView.as_view(), name='api_submitted_posts_export'),
     path('submissions/<int:pk>/', views.SubmittedPostDetailView.as_view(), name='api_submitted_posts_detail'),
 ]
@@ -1,24 +1,61 @@
-import os
+import datetime as dt
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, Value, When
 from django.urls import reverse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
 from django.contrib.auth import get_user_model
 from rest_framework import generics, status
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from drf_spectacular.utils import extend_schema
 
-from google import genai
-from google.genai import types
-
-from ..utils import calculate_next_run
-from ..tasks import submit_reddit_post
-from ..models import RedditAccount, ScheduledPost, SubmittedPost
+from ..cache import bump_user_cache_version, get_user_cache_version
+from ..events import (
+    deleted_post_event,
+    publish_post_changes,
+    publish_post_events,
+    stream_post_events,
+)
+from ..utils import (
+    calculate_next_run,
+    calculate_next_runs,
+    notify_schedule_change,
+    notify_schedule_changes,
+)
+from ..idempotency import new_run_token
+from ..states import transition
+from ..tasks import publish_submission
+from ..text_to_cron import convert_text_to_cron
+from ..analytics import summarize_stats
+from ..models import (
+    DailySubmissionStats,
+    RedditAccount,
+    ScheduledPost,
+    SubmissionAttempt,
+    SubmittedPost,
+)
+from .caching import UserVersionedListCacheMixin
+from .exports import CONTENT_TYPES, export_rows
+from .parsers import CSVParser
+from .pagination import CreatedAtCursorPagination, SubmittedAtCursorPagination
 from .serializers import (
+    requested_fields,
     ScheduledPostSerializer,
+    ScheduledPostBulkActionSerializer,
     RedditAccountSerializer,
     SubmittedPostSerializer,
+    SubmittedPostExportSerializer,
+    SubmissionAnalyticsQuerySerializer,
     TextToCronRequestSerializer,
     TextToCronResponseSerializer,
 )
@@ -26,7 +63,15 @@ from .serializers import (
 User = get_user_model()
 
 
-class RedditAccountListView(generics.ListAPIView):
+def defer_unrequested_text(queryset, request):
+    """Skip loading `selftext` from the database when the client did not ask for it."""
+    include, exclude = requested_fields(request)
+    if "selftext" in exclude or (include and "selftext" not in include):
+        return queryset.defer("selftext")
+    return queryset
+
+
+class RedditAccountListView(UserVersionedListCacheMixin, generics.ListAPIView):
     serializer_class = RedditAccountSerializer
     permission_classes = [IsAuthenticated]
 
@@ -38,18 +83,17 @@ class UserRedditStatusView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        reddit_accounts = request.user.reddit_accounts.all()
-        is_linked = reddit_accounts.exists()
+        reddit_accounts = list(request.user.reddit_accounts.all())
 
         return Response(
             {
                 "user_id": request.user.id,
                 "username": request.user.username,
-                "is_reddit_linked": is_linked,
+                "is_reddit_linked": bool(reddit_accounts),
                 "reddit_accounts": RedditAccountSerializer(
                     reddit_accounts, many=True
                 ).data,
-                "reddit_account_count": reddit_accounts.count(),
+                "reddit_account_count": len(reddit_accounts),
             }
         )
 
@@ -101,36 +145,92 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        reddit_accounts = request.user.reddit_accounts.all()
-        is_linked = reddit_accounts.exists()
-
-        return Response(
-            {
-                "user": {"username": request.user.username, "is_authenticated": True},
-                "reddit_accounts": {
-                    "is_linked": is_linked,
-                    "accounts": [
-                        {
-                            "id": account.id,
-                            "reddit_username": account.reddit_username,
-                            "reddit_account_status": account.reddit_account_status,
-                            "created_at": account.created_at.isoformat(),
-                        }
-                        for account in reddit_accounts
-                    ],
-                    "count": reddit_accounts.count(),
-                },
-                "links": {"reddit_login": reverse("reddit_login")},
-            }
+        version = get_user_cache_version(request.user.id)
+        if version is None:
+            return Response(self.build_dashboard(request.user))
+
+        cache_key = f"dashboard:{request.user.id}:{version}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_dashboard(request.user)
+            cache.set(cache_key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        return Response(data)
+
+    def build_dashboard(self, user):
+        """Everything the dashboard shows, in a fixed number of queries."""
+        now = dt.datetime.now(dt.timezone.utc)
+        since = now - dt.timedelta(days=7)
+
+        reddit_accounts = list(
+            user.reddit_accounts.values(
+                "id", "reddit_username", "reddit_account_status", "created_at"
+            )
         )
-
-
-class ScheduledPostListView(generics.ListCreateAPIView):
+        for account in reddit_accounts:
+            account["created_at"] = account["created_at"].isoformat()
+
+        posts = ScheduledPost.objects.filter(user=user)
+        counts_by_status = dict(
+            posts.order_by()
+            .values_list("status")
+            .annotate(count=Count("id"))
+            .values_list("status", "count")
+        )
+        upcoming_runs = list(
+            posts.filter(status__in=["active", "pending_retry"])
+            .annotate(
+                due_at=Case(
+                    When(status="pending_retry", then=F("next_attempt_at")),
+                    default=F("next_run"),
+                    output_field=DateTimeField(),
+                )
+            )
+            .filter(due_at__isnull=False)
+            .order_by("due_at")
+            .values("id", "title", "subreddit", "reddit_account_id", "status", "due_at")[:5]
+        )
+        # Attempts, not posts: a run retried twice before going through
+        # counts two failures and a success. Rate-limit deferrals are put
+        # off rather than failed, so they are counted apart.
+        submissions = summarize_stats(
+            DailySubmissionStats.objects.filter(user=user, date__gte=since.date())
+        )[0]
+        rate_limited = submissions["failures"]["rate_limited"]
+
+        return {
+            "user": {"username": user.username, "is_authenticated": True},
+            "reddit_accounts": {
+                "is_linked": bool(reddit_accounts),
+                "accounts": reddit_accounts,
+                "count": len(reddit_accounts),
+            },
+            "posts": {
+                "total": sum(counts_by_status.values()),
+                "by_status": counts_by_status,
+            },
+            "upcoming_runs": [
+                {**run, "next_run": run.pop("due_at").isoformat()} for run in upcoming_runs
+            ],
+            "recent_submissions": {
+                "since": since.date().isoformat(),
+                "succeeded": submissions["successes"],
+                "failed": submissions["attempts"] - submissions["successes"] - rate_limited,
+                "rate_limited": rate_limited,
+            },
+            "links": {"reddit_login": reverse("reddit_login")},
+        }
+
+
+class ScheduledPostListView(UserVersionedListCacheMixin, generics.ListCreateAPIView):
     serializer_class = ScheduledPostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
-        return ScheduledPost.objects.filter(user=self.request.user)
+        queryset = ScheduledPost.objects.filter(user=self.request.user).select_related(
+            "user", "reddit_account"
+        )
+        return defer_unrequested_text(queryset, self.request)
 
     def perform_create(self, serializer):
         if not self.request.user.reddit_accounts.exists():
@@ -148,7 +248,22 @@ class ScheduledPostListView(generics.ListCreateAPIView):
                     f"Failed to calculate next run time for cron schedule: {cron_schedule}"
                 )
 
-        serializer.save(user=self.request.user, next_run=next_run)
+        post = serializer.save(user=self.request.user, next_run=next_run)
+        notify_schedule_change(post.id)
+
+
+class DeadLetterPostListView(UserVersionedListCacheMixin, generics.ListAPIView):
+    """Posts that ran out of submission attempts, or failed with an error not worth retrying."""
+
+    serializer_class = ScheduledPostSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = ScheduledPost.objects.filter(
+            user=self.request.user, status="error", attempt_count__gt=0
+        ).select_related("user", "reddit_account")
+        return defer_unrequested_text(queryset, self.request)
 
 
 class ScheduledPostDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -156,7 +271,9 @@ class ScheduledPostDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return ScheduledPost.objects.filter(user=self.request.user)
+        return ScheduledPost.objects.filter(user=self.request.user).select_related(
+            "user", "reddit_account"
+        )
 
     def perform_update(self, serializer):
         instance = serializer.instance
@@ -185,17 +302,230 @@ class ScheduledPostDetailView(generics.RetrieveUpdateDestroyAPIView):
             else:
                 next_run = None
 
-        serializer.save(next_run=next_run)
+        post = serializer.save(next_run=next_run)
+        notify_schedule_change(post.id)
 
+    def perform_destroy(self, instance):
+        post_id = instance.id
+        instance.delete()
+        notify_schedule_change(post_id)
+
+
+class ScheduledPostBulkView(APIView):
+    """Create many scheduled posts from a JSON list or a CSV upload with a header row."""
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, CSVParser]
+
+    def post(self, request):
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get("posts")
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError("Expected a non-empty list of posts.")
+        if len(rows) > settings.BULK_POST_MAX_ROWS:
+            raise ValidationError(
+                f"At most {settings.BULK_POST_MAX_ROWS} posts can be created per request."
+            )
+
+        if not request.user.reddit_accounts.exists():
+            raise ValidationError(
+                "You must link at least one Reddit account before creating scheduled posts."
+            )
+
+        serializer = ScheduledPostSerializer(
+            data=rows, many=True, context={"request": request}
+        )
+        if not serializer.is_valid():
+            return Response(
+                {"errors": self.row_errors(serializer.errors)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        next_runs = calculate_next_runs(
+            (row["cron_schedule"], row.get("user_timezone", "UTC"))
+            for row in serializer.validated_data
+            if row.get("cron_schedule")
+        )
+        row_errors = {}
+        posts = []
+        for index, row in enumerate(serializer.validated_data):
+            next_run = None
+            if row.get("cron_schedule"):
+                next_run = next_runs[(row["cron_schedule"], row.get("user_timezone", "UTC"))]
+                if next_run is None:
+                    row_errors[index] = {
+                        "cron_schedule": [
+                            f"Failed to calculate next run time for cron schedule: {row['cron_schedule']}"
+                        ]
+                    }
+                    continue
+            posts.append(ScheduledPost(user=request.user, next_run=next_run, **row))
+
+        if row_errors:
+            return Response(
+                {"errors": [{"row": index, "errors": errors} for index, errors in row_errors.items()]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            posts = ScheduledPost.objects.bulk_create(posts, batch_size=500)
+            bump_user_cache_version(request.user.id)
+            notify_schedule_changes(post.id for post in posts)
+
+        return Response(
+            {
+                "created": len(posts),
+                "posts": ScheduledPostSerializer(
+                    posts, many=True, context={"request": request}
+                ).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def row_errors(self, errors):
+        return [{"row": index, "errors": row} for index, row in enumerate(errors) if row]
+
+
+class ScheduledPostBulkActionView(APIView):
+    """Pause, resume or delete every post matching the given ids and/or filters."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ScheduledPostBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        posts = ScheduledPost.objects.filter(user=request.user)
+        if "ids" in data:
+            posts = posts.filter(id__in=data["ids"])
+        if "status" in data:
+            posts = posts.filter(status=data["status"])
+        if "subreddit" in data:
+            posts = posts.filter(subreddit__iexact=data["subreddit"])
+        if "reddit_account" in data:
+            posts = posts.filter(reddit_account_id=data["reddit_account"])
+
+        action = data["action"]
+        with transaction.atomic():
+            post_ids = list(posts.values_list("id", flat=True))
+            if action == "delete":
+                count = self.delete(post_ids)
+            elif action == "pause":
+                count = posts.filter(status__in=["active", "pending_retry", "error"]).update(
+                    status="paused", updated_at=dt.datetime.now(dt.timezone.utc)
+                )
+            else:
+                count = self.resume(posts.filter(status="paused"))
+
+            bump_user_cache_version(request.user.id)
+            notify_schedule_changes(post_ids)
+            if action == "delete":
+                publish_post_events(
+                    {request.user.id: [deleted_post_event(post_id) for post_id in post_ids]}
+                )
+            else:
+                publish_post_changes(post_ids)
 
-class SubmittedPostListView(generics.ListAPIView):
+        return Response({"action": action, "count": count})
+
+    def delete(self, post_ids):
+        """Delete the posts in one DELETE, keeping their submission history.
+
+        QuerySet.delete() would load every row to send post_delete, and each
+        post's signal handlers would publish its own event and bump the
+        cache version; the caller does both once for the batch instead.
+        """
+        SubmittedPost.objects.filter(scheduled_post_id__in=post_ids).update(scheduled_post=None)
+        SubmissionAttempt.objects.filter(scheduled_post_id__in=post_ids).update(
+            scheduled_post=None
+        )
+        posts = ScheduledPost.objects.filter(id__in=post_ids)
+        return posts._raw_delete(posts.db)
+
+    def resume(self, posts):
+        """Reactivate paused posts with fresh next runs, in a single UPDATE.
+
+        Any retry that was pending when the post was paused is dropped.
+        """
+        schedules = set(
+            posts.exclude(cron_schedule__isnull=True)
+            .exclude(cron_schedule="")
+            .values_list("cron_schedule", "user_timezone")
+            .distinct()
+        )
+        next_runs = calculate_next_runs(schedules)
+        for (cron_schedule, user_timezone), run in list(next_runs.items()):
+            if run is None:
+                # Leave unschedulable posts paused rather than firing them now
+                posts = posts.exclude(cron_schedule=cron_schedule, user_timezone=user_timezone)
+                del next_runs[(cron_schedule, user_timezone)]
+
+        next_run = Case(
+            *[
+                When(cron_schedule=cron_schedule, user_timezone=user_timezone, then=Value(run))
+                for (cron_schedule, user_timezone), run in next_runs.items()
+            ],
+            default=Value(None),
+            output_field=DateTimeField(),
+        )
+        return posts.update(
+            status="active",
+            next_run=next_run,
+            attempt_count=0,
+            next_attempt_at=None,
+            run_token=None,
+            updated_at=dt.datetime.now(dt.timezone.utc),
+        )
+
+
+class SubmittedPostListView(UserVersionedListCacheMixin, generics.ListAPIView):
     serializer_class = SubmittedPostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmittedAtCursorPagination
 
     def get_queryset(self):
-        return SubmittedPost.objects.filter(
-            scheduled_post__user=self.request.user
-        ).select_related("scheduled_post", "reddit_account")
+        queryset = SubmittedPost.objects.filter(scheduled_post__user=self.request.user)
+        return defer_unrequested_text(queryset, self.request)
+
+
+class SubmittedPostExportView(APIView):
+    """Stream the user's whole submission history as CSV or NDJSON.
+
+    Filters: `since`/`until` on submitted_at, `reddit_account` and
+    `subreddit`; `fields` picks the columns as on the list endpoints, and
+    names that aren't columns, or picking none, are a 400.
+    Rows are read through a server-side cursor and written as they arrive,
+    so exports of any size start at once and use constant memory.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = SubmittedPostExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        posts = SubmittedPost.objects.filter(scheduled_post__user=request.user)
+        if "since" in data:
+            posts = posts.filter(submitted_at__gte=data["since"])
+        if "until" in data:
+            posts = posts.filter(submitted_at__lt=data["until"])
+        if "reddit_account" in data:
+            posts = posts.filter(reddit_account_id=data["reddit_account"])
+        if "subreddit" in data:
+            posts = posts.filter(subreddit__iexact=data["subreddit"])
+
+        output = data["output"]
+        response = StreamingHttpResponse(
+            export_rows(posts.order_by("submitted_at", "id"), data["fields"], output),
+            content_type=CONTENT_TYPES[output],
+        )
+        filename = f"submissions-{dt.date.today():%Y%m%d}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
 
 
 class SubmittedPostDetailView(generics.RetrieveAPIView):
@@ -208,15 +538,51 @@ class SubmittedPostDetailView(generics.RetrieveAPIView):
         ).select_related("scheduled_post", "reddit_account")
 
 
-class ScheduledPostSubmittedPostsView(generics.ListAPIView):
+class ScheduledPostSubmittedPostsView(UserVersionedListCacheMixin, generics.ListAPIView):
     serializer_class = SubmittedPostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmittedAtCursorPagination
 
     def get_queryset(self):
         scheduled_post_id = self.kwargs["scheduled_post_id"]
-        return SubmittedPost.objects.filter(
+        queryset = SubmittedPost.objects.filter(
             scheduled_post=scheduled_post_id, scheduled_post__user=self.request.user
-        ).select_related("scheduled_post", "reddit_account")
+        )
+        return defer_unrequested_text(queryset, self.request)
+
+
+class SubmissionAnalyticsView(APIView):
+    """Submission attempts, successes, failures by class and latency over a date range.
+
+    Read from the daily rollups, so the cost depends on the number of days,
+    accounts and subreddits in range rather than on submission history.
+    `group_by` splits the figures per date, reddit_account or subreddit.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = SubmissionAnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        stats = DailySubmissionStats.objects.filter(
+            user=request.user, date__range=(data["since"], data["until"])
+        )
+        if "reddit_account" in data:
+            stats = stats.filter(reddit_account_id=data["reddit_account"])
+        if "subreddit" in data:
+            stats = stats.filter(subreddit=data["subreddit"].lower())
+
+        response = {
+            "since": data["since"].isoformat(),
+            "until": data["until"].isoformat(),
+            "totals": summarize_stats(stats)[0],
+        }
+        if "group_by" in data:
+            response["group_by"] = data["group_by"]
+            response["results"] = summarize_stats(stats, data["group_by"])
+        return Response(response)
 
 
 class PostNowView(APIView):
@@ -231,19 +597,49 @@ class PostNowView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        scheduled_post.status = "queued"
-        scheduled_post.save(update_fields=["status", "updated_at"])
-        task = submit_reddit_post.delay(scheduled_post.id)
+        # A fresh run: Post Now also gives a failed or retrying post a new set of attempts
+        if scheduled_post.status in ("queued", "running") or not transition(
+            scheduled_post,
+            "queued",
+            run_token=new_run_token(),
+            attempt_count=0,
+            next_attempt_at=None,
+        ):
+            return Response(
+                {"error": "Post is already being submitted"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            task_id = publish_submission(scheduled_post.id, scheduled_post.run_token)
+        except Exception:
+            # publish_submission has handed the post back to the scheduler
+            return Response(
+                {"error": "Failed to queue the post; it will be retried shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
 
         return Response(
             {
                 "message": "Post added to queue for immediate execution",
-                "task_id": task.id,
+                "task_id": task_id,
                 "post_id": scheduled_post.id,
             }
         )
 
 
+async def authenticate_request(request):
+    """Run DRF's configured authenticators for a plain async Django view."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except AuthenticationFailed:
+        return None
+    return user if user.is_authenticated else None
+
+
 class TextToCronView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -259,61 +655,50 @@ class TextToCronView(APIView):
         schedule_text = serializer.validated_data["schedule_text"]
 
         try:
-            client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
-
-            prompt = f"""Convert the following cron schedule description into a standard cron expression (minute hour day month weekday format).
-            
-Cron schedule description: "{schedule_text}"
-
-Requirements:
-- Return ONLY the cron expression, no explanation
-- Use standard 5-field cron format (minute hour day month weekday)
-- Use * for any field
-- Use 0-6 for weekday (0=Sunday, 1=Monday, etc.)
-- Return INVALID if it can't be converted to a proper cron schedule
-- Examples:
-  - "Every Monday at 9 AM" -> "0 9 * * 1"
-  - "Daily at 3 PM" -> "0 15 * * *"
-  - "Every weekday at 8:30 AM" -> "30 8 * * 1-5"
-  - "invalid text" -> "INVALID"
-
-Return only the cron expression:"""
-
-            response = client.models.generate_content(
-                model="gemini-2.5-flash-lite",
-                contents=types.Content(
-                    role="user", parts=[types.Part.from_text(text=prompt)]
-                ),
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(
-                        thinking_budget=0,
-                    ),
-                ),
-            )
-
-            cron_schedule = response.candidates[0].content.parts[0].text.strip()
-
-            # validation
-            cron_parts = cron_schedule.split()
-            if len(cron_parts) != 5:
-                raise ValueError("Invalid cron format returned")
-
-            next_run = calculate_next_run(cron_schedule, "UTC")
-            if next_run is None:
-                raise ValueError("Invalid cron schedule generated")
-
+            # The model is awaited on the server's event loop; this thread
+            # only waits for the answer
+            cron_schedule = async_to_sync(convert_text_to_cron)(schedule_text)
+        except Exception as e:
             return Response(
-                {"cron_schedule": cron_schedule, "schedule_text": schedule_text}
+                {"error": f"An unexpected error occurred: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
-        except ValueError:
+
+        if cron_schedule is None:
             return Response(
                 {
                     "error": "Could not determine a valid schedule. Please try rephrasing your request."
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        except Exception as e:
-            return Response(
-                {"error": f"An unexpected error occurred: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+
+        return Response(
+            TextToCronResponseSerializer(
+                {"cron_schedule": cron_schedule, "schedule_text": schedule_text}
+            ).data
+        )
+
+
+class PostEventsView(View):
+    """Server-sent events with the status changes of the user's scheduled posts.
+
+    Each `status` event carries `{"posts": [...]}` deltas to merge into the
+    posts list; a `resync` event means some were dropped and the list should
+    be fetched again. Async, so an open stream holds no worker thread.
+    """
+
+    async def get(self, request):
+        user = await authenticate_request(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
             )
+
+        response = StreamingHttpResponse(
+            stream_post_events(user.id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
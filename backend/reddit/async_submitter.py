@@ -0,0 +1,273 @@
+import json
+import time
+import signal
+import asyncio
+import datetime as dt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncpraw
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from asyncprawcore.exceptions import (
+    OAuthException,
+    Forbidden,
+    NotFound,
+    BadRequest,
+    Redirect,
+)
+from django.conf import settings
+from django.db import close_old_connections
+
+from .analytics import record_attempt
+from .clients import (
+    forget_access_token,
+    get_shared_access_token,
+    share_access_token,
+    use_access_token,
+)
+from .idempotency import CLAIMED, IN_FLIGHT, submission_guard
+from .metrics import QUEUE_WAIT, REDDIT_LATENCY, SUBMISSION_ERRORS, SUBMISSIONS, timed
+from .models import ScheduledPost
+from .ratelimit import ratelimit_delay, submission_limiter
+from .states import RUNNABLE_STATUSES, transition
+from .submission_queue import PROCESSING_KEY, QUEUE_KEY
+from .tasks import (
+    defer_submission,
+    describe_submission_error,
+    finish_submission,
+    record_submission_failure,
+)
+
+REQUEST_ERRORS = (Forbidden, NotFound, BadRequest, Redirect, asyncpraw.exceptions.InvalidURL)
+
+
+class AsyncRedditClientPool:
+    """LRU pool of asyncpraw clients keyed by RedditAccount id, like RedditClientPool."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._clients = OrderedDict()
+
+    async def get(self, reddit_account):
+        entry = self._clients.get(reddit_account.id)
+        if entry and entry[0] == reddit_account.refresh_token:
+            self._clients.move_to_end(reddit_account.id)
+            return entry[1]
+        if entry:
+            await self.invalidate(reddit_account.id)
+
+        reddit = asyncpraw.Reddit(
+            client_id=settings.REDDIT_CLIENT_ID,
+            client_secret=settings.REDDIT_CLIENT_SECRET,
+            refresh_token=reddit_account.refresh_token,
+            user_agent=settings.REDDIT_USER_AGENT,
+        )
+        self._clients[reddit_account.id] = (reddit_account.refresh_token, reddit)
+        while len(self._clients) > self.maxsize:
+            _, (_, evicted) = self._clients.popitem(last=False)
+            await evicted.close()
+        return reddit
+
+    async def invalidate(self, reddit_account_id):
+        entry = self._clients.pop(reddit_account_id, None)
+        if entry:
+            await entry[1].close()
+
+    async def close(self):
+        while self._clients:
+            _, (_, reddit) = self._clients.popitem()
+            await reddit.close()
+
+
+async def ensure_authorized(reddit, reddit_account_id):
+    """clients.ensure_authorized for asyncpraw clients, sharing tokens the same way."""
+    authorizer = reddit._authorized_core._authorizer
+    if authorizer.is_valid():
+        return
+    token = await asyncio.to_thread(get_shared_access_token, reddit_account_id)
+    if token:
+        use_access_token(authorizer, token)
+        return
+    await authorizer.refresh()
+    await asyncio.to_thread(share_access_token, reddit_account_id, authorizer)
+
+
+def in_db_thread(func, *args, **kwargs):
+    """Run `func` on one of the submitter's database threads.
+
+    Nothing closes these threads' connections at the end of a request, so
+    connections past CONN_MAX_AGE or left broken are dropped before each call.
+    """
+    close_old_connections()
+    return func(*args, **kwargs)
+
+
+def load_post(post_id):
+    return ScheduledPost.objects.select_related("reddit_account").filter(id=post_id).first()
+
+
+class AsyncSubmitter:
+    """Submits queued posts from one asyncio process, up to `concurrency` at a time.
+
+    Used instead of Celery's submit_reddit_post when SUBMISSION_WORKER is
+    'async'. The dispatcher pushes messages onto a Redis list; each one is
+    moved to this node's processing list while it is worked on, so messages
+    in flight when the process dies are picked up again on restart. Status
+    transitions, error handling, rate limiting and the run-token guard are
+    the same as in the Celery task.
+
+    Database work runs on ASYNC_SUBMITTER_DB_THREADS threads of its own.
+    sync_to_async's default, and Django's async ORM methods, would send it
+    all through a single thread.
+    """
+
+    def __init__(self, name, concurrency=None):
+        self.name = name
+        self.processing_key = PROCESSING_KEY.format(name)
+        self.semaphore = asyncio.Semaphore(concurrency or settings.ASYNC_SUBMITTER_CONCURRENCY)
+        self.clients = AsyncRedditClientPool(settings.REDDIT_CLIENT_POOL_SIZE)
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_SUBMITTER_DB_THREADS, thread_name_prefix="submitter-db"
+        )
+        self.redis = None
+        self.in_flight = set()
+        self.stopping = False
+
+    def stop(self):
+        self.stopping = True
+
+    async def db(self, func, *args, **kwargs):
+        return await sync_to_async(in_db_thread, thread_sensitive=False, executor=self.executor)(
+            func, *args, **kwargs
+        )
+
+    async def submit(self, post_id, run_token=None):
+        post = await self.db(load_post, post_id)
+        if post is None or post.status not in RUNNABLE_STATUSES or run_token != post.run_token:
+            return
+
+        QUEUE_WAIT.observe((dt.datetime.now(dt.timezone.utc) - post.updated_at).total_seconds())
+
+        wait = await asyncio.to_thread(
+            submission_limiter.acquire, post.reddit_account_id, post.subreddit, run_token
+        )
+        if wait:
+            SUBMISSIONS.labels(outcome="rate_limited").inc()
+            await self.db(defer_submission, post, wait, run_token)
+            return
+
+        claim = await asyncio.to_thread(submission_guard.claim, run_token)
+        if claim == IN_FLIGHT:
+            SUBMISSIONS.labels(outcome="duplicate").inc()
+            return
+
+        started_at = dt.datetime.now(dt.timezone.utc)
+        if not await self.db(
+            transition, post, "running", last_run_started=started_at, run_token=run_token
+        ):
+            await asyncio.to_thread(submission_guard.release, run_token)
+            SUBMISSIONS.labels(outcome="skipped").inc()
+            return
+
+        started = None
+        try:
+            if claim == CLAIMED:
+                reddit = await self.clients.get(post.reddit_account)
+
+                started = time.monotonic()
+                with timed(REDDIT_LATENCY, phase="auth"):
+                    await ensure_authorized(reddit, post.reddit_account_id)
+                with timed(REDDIT_LATENCY, phase="submit"):
+                    subreddit = await reddit.subreddit(post.subreddit)
+                    submission = await subreddit.submit(title=post.title, selftext=post.selftext)
+                SUBMISSIONS.labels(outcome="submitted").inc()
+
+                # The submit response carries no permalink; it is derived from the id
+                submission_id = submission.id
+                permalink = f"/r/{post.subreddit}/comments/{submission_id}/"
+                await asyncio.to_thread(
+                    submission_guard.record, run_token, submission_id, permalink
+                )
+                latency = time.monotonic() - started
+                started = None
+            else:
+                submission_id, permalink = claim["id"], claim["permalink"]
+                latency = None
+
+            await self.db(finish_submission, post, submission_id, permalink, run_token, latency)
+
+        except Exception as e:
+            latency = time.monotonic() - started if started is not None else None
+            await asyncio.to_thread(submission_guard.release, run_token)
+            SUBMISSION_ERRORS.labels(exception=type(e).__name__).inc()
+
+            delay = ratelimit_delay(e)
+            if delay is not None:
+                if latency is not None:
+                    await self.db(record_attempt, post, latency, "rate_limited", str(e), run_token)
+                SUBMISSIONS.labels(outcome="rate_limited").inc()
+                await self.db(defer_submission, post, delay, run_token)
+                return
+
+            if isinstance(e, OAuthException):
+                await self.clients.invalidate(post.reddit_account_id)
+                await asyncio.to_thread(forget_access_token, post.reddit_account_id)
+
+            error_class, error_msg, retryable = describe_submission_error(
+                e,
+                oauth_errors=(OAuthException,),
+                request_errors=REQUEST_ERRORS,
+                api_errors=(asyncpraw.exceptions.RedditAPIException,),
+            )
+            if latency is not None:
+                await self.db(record_attempt, post, latency, error_class, error_msg, run_token)
+            await self.db(record_submission_failure, post, error_msg, retryable, run_token)
+
+    async def handle(self, message):
+        try:
+            data = json.loads(message)
+            await self.submit(data["post_id"], data.get("run_token"))
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+        finally:
+            await self.redis.lrem(self.processing_key, 1, message)
+            self.semaphore.release()
+
+    async def recover(self):
+        """Requeue whatever this node was working on when it last stopped."""
+        while await self.redis.lmove(self.processing_key, QUEUE_KEY, "RIGHT", "RIGHT"):
+            pass
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        self.redis = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+        await self.recover()
+
+        try:
+            while not self.stopping:
+                await self.semaphore.acquire()
+                try:
+                    message = await self.redis.blmove(
+                        QUEUE_KEY, self.processing_key, 1, "RIGHT", "LEFT"
+                    )
+                except Exception as e:
+                    print(f"{e.__class__.__name__} {e}")
+                    message = None
+                    await asyncio.sleep(1)
+                if message is None:
+                    self.semaphore.release()
+                    continue
+
+                task = asyncio.create_task(self.handle(message))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+        finally:
+            # Let submissions already talking to Reddit finish before exiting
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+            await self.clients.close()
+            await self.redis.aclose()
+            self.executor.shutdown()
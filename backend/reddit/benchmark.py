@@ -0,0 +1,465 @@
+import time
+import asyncio
+import uuid
+import random
+import platform
+import statistics
+import subprocess
+import datetime as dt
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from . import tasks
+from .cache import bump_user_cache_versions
+from .clients import client_pool
+from .models import RedditAccount, ScheduledPost, SubmittedPost
+from .utils import calculate_next_run, compile_schedule
+
+User = get_user_model()
+
+CRON_SCHEDULES = ["0 9 * * 1", "30 8 * * 1-5", "0 */6 * * *", "15 18 * * *", "*/30 * * * *"]
+TIMEZONES = ["UTC", "America/New_York", "Europe/Berlin", "Asia/Kolkata"]
+
+
+class FakeSubmission:
+    def __init__(self, subreddit):
+        self.id = uuid.uuid4().hex[:10]
+        self.permalink = f"/r/{subreddit}/comments/{self.id}/bench/"
+
+
+class FakeSubreddit:
+    subreddit_type = "public"
+    submission_type = "any"
+    user_is_banned = False
+    user_is_contributor = False
+    user_is_moderator = False
+
+    def __init__(self, reddit, display_name):
+        self.reddit = reddit
+        self.display_name = display_name
+
+    def submit(self, title, selftext=None, **kwargs):
+        self.reddit.wait()
+        return FakeSubmission(self.display_name)
+
+    def post_requirements(self):
+        self.reddit.wait()
+        return {}
+
+
+class FakeUser:
+    def __init__(self, reddit):
+        self.reddit = reddit
+
+    def me(self):
+        self.reddit.wait()
+        return mock.Mock(name="bench_user")
+
+
+class FakeAuthorizer:
+    access_token = "bench"
+    _expiration_timestamp = float("inf")
+
+    def is_valid(self):
+        return True
+
+
+class FakeReddit:
+    """Stands in for praw.Reddit; every API call sleeps for a fixed latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.user = FakeUser(self)
+        self._authorized_core = mock.Mock(_authorizer=FakeAuthorizer())
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def subreddit(self, display_name):
+        return FakeSubreddit(self, display_name)
+
+
+class FakeAsyncSubreddit:
+    def __init__(self, reddit, display_name):
+        self.reddit = reddit
+        self.display_name = display_name
+
+    async def submit(self, title, selftext=None, **kwargs):
+        await self.reddit.wait()
+        return FakeSubmission(self.display_name)
+
+
+class FakeAsyncReddit:
+    """Stands in for asyncpraw.Reddit, like FakeReddit does for praw."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self._authorized_core = mock.Mock(_authorizer=FakeAuthorizer())
+
+    async def wait(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def subreddit(self, display_name):
+        return FakeAsyncSubreddit(self, display_name)
+
+    async def close(self):
+        pass
+
+
+class NullRedis:
+    def publish(self, *args, **kwargs):
+        return 0
+
+    def set(self, *args, **kwargs):
+        return True
+
+    def get(self, *args, **kwargs):
+        return None
+
+    def delete(self, *args, **kwargs):
+        return 0
+
+    def pipeline(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        return []
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, max(0, round(pct / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return self.count
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextmanager
+def isolated_environment(reddit_latency):
+    """Swap Reddit, Redis and the cache for local fakes so nothing leaves the process."""
+    with (
+        override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+            REDDIT_ACCOUNT_POST_INTERVAL=0,
+            REDDIT_SUBREDDIT_POST_INTERVAL=0,
+        ),
+        mock.patch("reddit.clients.get_reddit_instance", return_value=FakeReddit(reddit_latency)),
+        mock.patch("asyncpraw.Reddit", side_effect=lambda **kwargs: FakeAsyncReddit(reddit_latency)),
+        mock.patch("reddit.subreddits.get_reader", return_value=FakeReddit(reddit_latency)),
+        mock.patch("reddit.utils.get_redis_client", return_value=NullRedis()),
+        mock.patch("reddit.idempotency.get_redis_client", return_value=NullRedis()),
+        mock.patch("reddit.events.get_redis_client", return_value=NullRedis()),
+    ):
+        cache.clear()
+        client_pool.clear()
+        try:
+            yield
+        finally:
+            client_pool.clear()
+
+
+class Benchmark:
+    """Seeds a synthetic tenant population and times the scheduling hot paths."""
+
+    def __init__(
+        self,
+        users=20,
+        accounts_per_user=2,
+        posts_per_account=50,
+        submissions_per_post=5,
+        api_requests=50,
+        reddit_latency=0.0,
+        async_concurrency=200,
+        seed=0,
+    ):
+        self.users = users
+        self.accounts_per_user = accounts_per_user
+        self.posts_per_account = posts_per_account
+        self.submissions_per_post = submissions_per_post
+        self.api_requests = api_requests
+        self.reddit_latency = reddit_latency
+        self.async_concurrency = async_concurrency
+        self.random = random.Random(seed)
+
+    def params(self):
+        return {
+            "users": self.users,
+            "accounts_per_user": self.accounts_per_user,
+            "posts_per_account": self.posts_per_account,
+            "submissions_per_post": self.submissions_per_post,
+            "api_requests": self.api_requests,
+            "reddit_latency": self.reddit_latency,
+            "async_concurrency": self.async_concurrency,
+        }
+
+    def seed(self):
+        now = dt.datetime.now(dt.timezone.utc)
+        users = User.objects.bulk_create(
+            User(username=f"bench-{uuid.uuid4().hex[:12]}") for _ in range(self.users)
+        )
+        accounts = RedditAccount.objects.bulk_create(
+            RedditAccount(user=user, reddit_username=f"bench_{user.id}_{n}", refresh_token="bench")
+            for user in users
+            for n in range(self.accounts_per_user)
+        )
+        posts = ScheduledPost.objects.bulk_create(
+            (
+                ScheduledPost(
+                    user_id=account.user_id,
+                    reddit_account=account,
+                    subreddit=f"bench{n % 10}",
+                    title=f"Benchmark post {n}",
+                    selftext="lorem ipsum " * 50,
+                    cron_schedule=self.random.choice(CRON_SCHEDULES),
+                    user_timezone=self.random.choice(TIMEZONES),
+                    next_run=now - dt.timedelta(seconds=self.random.randint(0, 300)),
+                )
+                for account in accounts
+                for n in range(self.posts_per_account)
+            ),
+            batch_size=1000,
+        )
+        SubmittedPost.objects.bulk_create(
+            (
+                SubmittedPost(
+                    scheduled_post=post,
+                    reddit_account_id=post.reddit_account_id,
+                    subreddit=post.subreddit,
+                    title=post.title,
+                    selftext=post.selftext,
+                    reddit_post_id=uuid.uuid4().hex[:12],
+                )
+                for post in posts
+                for _ in range(self.submissions_per_post)
+            ),
+            batch_size=1000,
+        )
+        return users
+
+    def bench_dispatch_tick(self):
+        published = []
+        with (
+            mock.patch.object(tasks, "publish_submissions", side_effect=published.extend),
+            count_queries() as queries,
+        ):
+            started = time.perf_counter()
+            tasks.schedule_due_posts()
+            elapsed = time.perf_counter() - started
+        return {
+            "posts_dispatched": len(published),
+            "seconds": elapsed,
+            "posts_per_second": len(published) / elapsed if elapsed else None,
+            "queries": len(queries),
+        }
+
+    def explain_due_queries(self):
+        """Query plans for the dispatcher's claim statements, to check they hit scheduledpost_due_idx and scheduledpost_retry_idx."""
+        now = dt.datetime.now(dt.timezone.utc)
+        return [
+            query.values_list("id", "user_id", "next_run", "next_attempt_at")[:500].explain()
+            for query in tasks.due_post_queries(now)
+        ]
+
+    def bench_submissions(self):
+        runs = list(ScheduledPost.objects.filter(status="queued").values_list("id", "run_token"))
+        latencies = []
+        with count_queries() as queries:
+            started = time.perf_counter()
+            for post_id, run_token in runs:
+                submitted = time.perf_counter()
+                tasks.submit_reddit_post.apply(args=(post_id, run_token))
+                latencies.append(time.perf_counter() - submitted)
+            elapsed = time.perf_counter() - started
+        return {
+            "posts_submitted": len(runs),
+            "seconds": elapsed,
+            "posts_per_second": len(runs) / elapsed if elapsed else None,
+            "queries_per_post": len(queries) / len(runs) if runs else None,
+            "latency": summarize(latencies) if latencies else None,
+        }
+
+    def queue_runs(self, count):
+        """Put `count` posts back in the queue with fresh run tokens, as a dispatch would."""
+        posts = list(ScheduledPost.objects.order_by("id")[:count])
+        for post in posts:
+            post.status = "queued"
+            post.run_token = uuid.uuid4().hex
+        ScheduledPost.objects.bulk_update(posts, ["status", "run_token"], batch_size=1000)
+        return [(post.id, post.run_token) for post in posts]
+
+    def bench_async_submissions(self, count, concurrency):
+        """The same submissions through AsyncSubmitter, `concurrency` at a time.
+
+        bench_submissions runs the Celery task serially, as one prefork child
+        does, so the ratio between the two is the gain per worker process.
+        SQLite test databases take one writer at a time, so there the
+        submitter's queries go through a single thread.
+        """
+        from .async_submitter import AsyncSubmitter
+
+        db_threads = 1 if connection.vendor == "sqlite" else settings.ASYNC_SUBMITTER_DB_THREADS
+
+        runs = self.queue_runs(count)
+        latencies = []
+
+        async def submit_all(submitter):
+            async def submit(post_id, run_token):
+                async with submitter.semaphore:
+                    submitted = time.perf_counter()
+                    await submitter.submit(post_id, run_token)
+                    latencies.append(time.perf_counter() - submitted)
+
+            await asyncio.gather(*(submit(post_id, run_token) for post_id, run_token in runs))
+            await submitter.clients.close()
+
+        with override_settings(ASYNC_SUBMITTER_DB_THREADS=db_threads):
+            submitter = AsyncSubmitter("bench", concurrency)
+        try:
+            started = time.perf_counter()
+            asyncio.run(submit_all(submitter))
+            elapsed = time.perf_counter() - started
+        finally:
+            submitter.executor.shutdown()
+        submitted = SubmittedPost.objects.filter(
+            run_token__in=[run_token for _, run_token in runs]
+        ).count()
+        return {
+            "posts_submitted": submitted,
+            "concurrency": concurrency,
+            "db_threads": db_threads,
+            "seconds": elapsed,
+            "posts_per_second": submitted / elapsed if elapsed else None,
+            "latency": summarize(latencies) if latencies else None,
+        }
+
+    def bench_next_run(self, iterations=2000):
+        compile_schedule.cache_clear()
+        results = {}
+        for label in ("cold", "warm"):
+            if label == "cold":
+                calls = [(cron, tz) for cron in CRON_SCHEDULES for tz in TIMEZONES]
+            else:
+                calls = [
+                    (self.random.choice(CRON_SCHEDULES), self.random.choice(TIMEZONES))
+                    for _ in range(iterations)
+                ]
+            started = time.perf_counter()
+            for cron, tz in calls:
+                calculate_next_run(cron, tz)
+            elapsed = time.perf_counter() - started
+            results[label] = {"calls": len(calls), "us_per_call": elapsed / len(calls) * 1e6}
+        results["cache_info"] = compile_schedule.cache_info()._asdict()
+        return results
+
+    def bench_api(self, user):
+        """Latency and query counts per endpoint, with the user's API cache cold and warm.
+
+        Cold samples bump the user's cache version first, as any change to
+        their posts would; warm samples repeat the same request.
+        """
+        client = APIClient()
+        client.force_authenticate(user)
+        scheduled_post_id = ScheduledPost.objects.filter(user=user).values_list("id", flat=True)[0]
+        endpoints = {
+            "dashboard": "/api/reddit/dashboard/",
+            "posts": "/api/reddit/posts/",
+            "posts_without_selftext": "/api/reddit/posts/?fields=-selftext",
+            "submissions": "/api/reddit/submissions/",
+            "post_submissions": f"/api/reddit/posts/{scheduled_post_id}/submissions/",
+        }
+        results = {}
+        for name, url in endpoints.items():
+            results[name] = {}
+            for label in ("uncached", "cached"):
+                samples = []
+                query_counts = []
+                for _ in range(self.api_requests):
+                    if label == "uncached":
+                        bump_user_cache_versions([user.id])
+                    with count_queries() as queries:
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        samples.append(time.perf_counter() - started)
+                    query_counts.append(len(queries))
+                    if response.status_code != 200:
+                        raise RuntimeError(f"{url} returned {response.status_code}")
+                results[name][label] = {**summarize(samples), "max_queries": max(query_counts)}
+        return results
+
+    def run(self):
+        with isolated_environment(self.reddit_latency):
+            started = time.perf_counter()
+            users = self.seed()
+            seed_seconds = time.perf_counter() - started
+
+            results = {
+                "seed_seconds": seed_seconds,
+                "next_run": self.bench_next_run(),
+                "api": self.bench_api(users[0]),
+                "due_query_plans": self.explain_due_queries(),
+                "dispatch_tick": self.bench_dispatch_tick(),
+                "submission": self.bench_submissions(),
+            }
+            submitted = results["submission"]["posts_submitted"]
+            if submitted:
+                results["async_submission"] = self.bench_async_submissions(
+                    submitted, self.async_concurrency
+                )
+                if results["submission"]["posts_per_second"]:
+                    results["async_submission"]["speedup_per_process"] = (
+                        results["async_submission"]["posts_per_second"]
+                        / results["submission"]["posts_per_second"]
+                    )
+
+        return {
+            "commit": git_commit(),
+            "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "params": self.params(),
+            "results": results,
+        }
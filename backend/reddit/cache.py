@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_version_key(user_id):
+    return f"user:{user_id}:cache-version"
+
+
+def get_user_cache_version(user_id):
+    """Current version of a user's cached API data; part of every per-user cache key.
+
+    None if the cache can't be reached, in which case callers skip it.
+    """
+    key = user_version_key(user_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        return None
+    return version
+
+
+def bump_user_cache_versions(user_ids):
+    """Invalidate everything cached for these users by moving them to a new version,
+    once the transaction commits.
+
+    Bumped any earlier, a request could cache the uncommitted state under the
+    new version, and nothing would ever invalidate it. A bump that can't
+    reach the cache is skipped; the write it follows has already committed.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def bump():
+        version = time.time_ns()
+        try:
+            cache.set_many(
+                {user_version_key(user_id): version for user_id in user_ids}, timeout=None
+            )
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+    transaction.on_commit(bump)
+
+
+def bump_user_cache_version(user_id):
+    bump_user_cache_versions([user_id])
@@ -0,0 +1,162 @@
+import time
+import threading
+from collections import OrderedDict
+
+import praw
+from django.conf import settings
+from django.core.cache import cache
+
+ACCESS_TOKEN_KEY = "reddit-access-token:{}"
+
+
+def get_reddit_instance(refresh_token=None, **config):
+    """A praw client for an account, or the app itself; `config` goes to praw.Reddit as is."""
+    if refresh_token:
+        return praw.Reddit(
+            client_id=settings.REDDIT_CLIENT_ID,
+            client_secret=settings.REDDIT_CLIENT_SECRET,
+            refresh_token=refresh_token,
+            user_agent=settings.REDDIT_USER_AGENT,
+            **config,
+        )
+    else:
+        return praw.Reddit(
+            client_id=settings.REDDIT_CLIENT_ID,
+            client_secret=settings.REDDIT_CLIENT_SECRET,
+            redirect_uri=settings.REDDIT_REDIRECT_URI,
+            user_agent=settings.REDDIT_USER_AGENT,
+            **config,
+        )
+
+
+def token_expires_at(authorizer):
+    """Wall-clock expiry of the authorizer's access token, or 0 if it has none.
+
+    asyncprawcore keeps the expiry on the monotonic clock, prawcore on the
+    wall clock.
+    """
+    if authorizer.access_token is None:
+        return 0
+    if hasattr(authorizer, "_expiration_timestamp_ns"):
+        return time.time() + (authorizer._expiration_timestamp_ns - time.monotonic_ns()) / 1e9
+    return authorizer._expiration_timestamp
+
+
+def share_access_token(reddit_account_id, authorizer):
+    """Publish a freshly exchanged access token for other processes to reuse until it expires."""
+    expires_at = token_expires_at(authorizer)
+    timeout = int(expires_at - time.time())
+    if timeout <= 0:
+        return
+    try:
+        cache.set(
+            ACCESS_TOKEN_KEY.format(reddit_account_id),
+            {
+                "access_token": authorizer.access_token,
+                "scopes": sorted(authorizer.scopes or ()),
+                "expires_at": expires_at,
+            },
+            timeout,
+        )
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+
+
+def get_shared_access_token(reddit_account_id, min_ttl=0):
+    """The account's shared access token, if it is still valid for `min_ttl` seconds."""
+    try:
+        token = cache.get(ACCESS_TOKEN_KEY.format(reddit_account_id))
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        return None
+    if token and token["expires_at"] - time.time() > min_ttl:
+        return token
+    return None
+
+
+def forget_access_token(reddit_account_id):
+    try:
+        cache.delete(ACCESS_TOKEN_KEY.format(reddit_account_id))
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+
+
+def use_access_token(authorizer, token):
+    """Make the authorizer use a token exchanged by another process, without an OAuth request."""
+    remaining = token["expires_at"] - time.time()
+    authorizer.access_token = token["access_token"]
+    authorizer.scopes = set(token["scopes"])
+    authorizer._expiration_timestamp = token["expires_at"]
+    authorizer._expiration_timestamp_ns = time.monotonic_ns() + int(remaining * 1e9)
+
+
+def ensure_authorized(reddit, reddit_account_id=None, min_ttl=0):
+    """Refresh the client's access token now if it is missing or expires within `min_ttl` seconds.
+
+    PRAW would do this lazily inside the next request; doing it up front lets
+    callers time and handle the OAuth exchange separately. With a
+    `reddit_account_id`, a token shared by another process (see
+    prepare_upcoming_posts) is used instead of exchanging a new one, and a
+    new one is shared. Returns True if a token exchange happened.
+    """
+    authorizer = reddit._authorized_core._authorizer
+    if authorizer.is_valid() and token_expires_at(authorizer) - time.time() > min_ttl:
+        return False
+    if reddit_account_id is not None:
+        token = get_shared_access_token(reddit_account_id, min_ttl)
+        if token:
+            use_access_token(authorizer, token)
+            return False
+
+    authorizer.refresh()
+    if reddit_account_id is not None:
+        share_access_token(reddit_account_id, authorizer)
+    return True
+
+
+class RedditClientPool:
+    """Per-process LRU pool of authorized PRAW clients keyed by RedditAccount id.
+
+    A pooled client keeps its OAuth access token until it expires and its
+    HTTP session's keep-alive connections, so repeated tasks for the same
+    account skip the refresh-token exchange and the TCP/TLS handshake. An
+    entry is replaced as soon as the account's refresh token changes.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, reddit_account):
+        refresh_token = reddit_account.refresh_token
+        with self._lock:
+            entry = self._clients.get(reddit_account.id)
+            if entry and entry[0] == refresh_token:
+                self._clients.move_to_end(reddit_account.id)
+                return entry[1]
+
+        reddit = get_reddit_instance(refresh_token=refresh_token)
+
+        with self._lock:
+            self._clients[reddit_account.id] = (refresh_token, reddit)
+            self._clients.move_to_end(reddit_account.id)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+        return reddit
+
+    def invalidate(self, reddit_account_id):
+        """Drop the account's client and shared access token after Reddit rejected them."""
+        with self._lock:
+            self._clients.pop(reddit_account_id, None)
+        forget_access_token(reddit_account_id)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+client_pool = RedditClientPool(maxsize=settings.REDDIT_CLIENT_POOL_SIZE)
@@ -0,0 +1,163 @@
+import json
+import asyncio
+import weakref
+from collections import defaultdict
+
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+
+from .models import ScheduledPost
+from .utils import get_redis_client
+
+CHANNEL = "post-events:{}"
+
+# Sent instead of the dropped events when a client falls too far behind
+RESYNC = object()
+
+
+def post_event(post):
+    """The status delta of one scheduled post, as pushed to its owner's streams.
+
+    Clients merge the fields present into the post they hold; events built
+    elsewhere (see claim_due_posts) may carry only some of them.
+    """
+    return {
+        "id": post.id,
+        "status": post.status,
+        "next_run": post.next_run.isoformat() if post.next_run else None,
+        "last_submission_error": post.last_submission_error,
+        "preflight_error": post.preflight_error,
+    }
+
+
+def deleted_post_event(post_id):
+    return {"id": post_id, "deleted": True}
+
+
+def publish_post_events(events_by_user):
+    """Push `{user_id: [event, ...]}` to the users' event streams once the transaction commits.
+
+    Each user gets one message however many of their posts changed.
+    """
+    events_by_user = {user_id: events for user_id, events in events_by_user.items() if events}
+    if not events_by_user:
+        return
+
+    def publish():
+        try:
+            pipeline = get_redis_client().pipeline(transaction=False)
+            for user_id, events in events_by_user.items():
+                pipeline.publish(CHANNEL.format(user_id), json.dumps({"posts": events}))
+            pipeline.execute()
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+    transaction.on_commit(publish)
+
+
+def publish_post_changes(post_ids):
+    """Publish the current state of posts changed by a queryset update(), which sends no signals."""
+    events_by_user = defaultdict(list)
+    for post in ScheduledPost.objects.filter(id__in=post_ids).only(
+        "id", "user_id", "status", "next_run", "last_submission_error", "preflight_error"
+    ):
+        events_by_user[post.user_id].append(post_event(post))
+    publish_post_events(events_by_user)
+
+
+class PostEventBroker:
+    """Fans Redis post events out to the event streams open in this process.
+
+    One pub/sub connection per event loop serves every stream: a user's
+    channel is subscribed while at least one of their streams is open, and
+    each stream reads from its own bounded queue. A stream that stops
+    draining its queue is sent a resync instead of an unbounded backlog.
+    """
+
+    def __init__(self):
+        self.redis = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.queues = defaultdict(set)
+        self.reader = None
+
+    async def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=settings.POST_EVENTS_QUEUE_SIZE)
+        first = not self.queues[user_id]
+        self.queues[user_id].add(queue)
+        if first:
+            await self.pubsub.subscribe(CHANNEL.format(user_id))
+        if self.reader is None or self.reader.done():
+            self.reader = asyncio.create_task(self.read())
+        return queue
+
+    async def unsubscribe(self, user_id, queue):
+        self.queues[user_id].discard(queue)
+        if not self.queues[user_id]:
+            del self.queues[user_id]
+            await self.pubsub.unsubscribe(CHANNEL.format(user_id))
+
+    async def read(self):
+        while self.queues:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except Exception as e:
+                # The pub/sub connection resubscribes by itself once Redis is back
+                print(f"{e.__class__.__name__} {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            user_id = int(message["channel"].decode().rpartition(":")[2])
+            data = message["data"].decode()
+            for queue in self.queues.get(user_id, ()):
+                try:
+                    queue.put_nowait(data)
+                except asyncio.QueueFull:
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(RESYNC)
+
+
+_brokers = weakref.WeakKeyDictionary()
+
+
+def get_broker():
+    """This event loop's broker; uvicorn runs one loop per worker process."""
+    loop = asyncio.get_running_loop()
+    broker = _brokers.get(loop)
+    if broker is None:
+        broker = _brokers[loop] = PostEventBroker()
+    return broker
+
+
+async def stream_post_events(user_id):
+    """Server-sent events for one user's post changes, with keepalive comments in between.
+
+    The stream ends after POST_EVENTS_MAX_AGE seconds so that clients
+    reconnect, and are authenticated again, with a current access token.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.POST_EVENTS_MAX_AGE
+    broker = get_broker()
+    queue = await broker.subscribe(user_id)
+    try:
+        yield f"retry: {settings.POST_EVENTS_RETRY_MS}\n\n"
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                data = await asyncio.wait_for(
+                    queue.get(), min(settings.POST_EVENTS_KEEPALIVE, remaining)
+                )
+            except TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if data is RESYNC:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield f"event: status\ndata: {data}\n\n"
+    finally:
+        await broker.unsubscribe(user_id, queue)
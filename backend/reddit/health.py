@@ -0,0 +1,109 @@
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from prawcore.exceptions import (
+    OAuthException,
+    PrawcoreException,
+    RequestException,
+    ServerError,
+    TooManyRequests,
+)
+
+from .cache import bump_user_cache_versions
+from .clients import client_pool
+from .metrics import ACCOUNT_CHECKS
+from .models import RedditAccount, SubmittedPost
+
+# Say nothing about the account itself; it is checked again on the next run
+TRANSIENT_ERRORS = (RequestException, ServerError, TooManyRequests)
+
+
+def check_account(reddit_account):
+    """The account's status according to Reddit, or None if Reddit couldn't tell us."""
+    reddit = client_pool.get(reddit_account)
+    try:
+        # Any simple API call to check if the account is valid
+        me = reddit.user.me()
+    except TRANSIENT_ERRORS:
+        return None
+    except PrawcoreException as e:
+        if isinstance(e, OAuthException):
+            client_pool.invalidate(reddit_account.id)
+        if "403" in str(e):
+            return "suspended"
+        if "404" in str(e):
+            return "banned"
+        # A generic error might indicate a shadow ban or other issue
+        return "shadow_banned"
+
+    if getattr(me, "is_suspended", False):
+        return "suspended"
+    return "active"
+
+
+def accounts_due_for_check(now):
+    """Accounts not checked, and not seen submitting successfully, within ACCOUNT_CHECK_INTERVAL."""
+    cutoff = now - dt.timedelta(seconds=settings.ACCOUNT_CHECK_INTERVAL)
+    recently_submitted = SubmittedPost.objects.filter(
+        reddit_account=OuterRef("pk"), submitted_at__gte=cutoff
+    )
+    return (
+        RedditAccount.objects.filter(Q(last_checked_at__isnull=True) | Q(last_checked_at__lt=cutoff))
+        .filter(~Exists(recently_submitted))
+        .order_by("id")
+    )
+
+
+def check_accounts(now=None, batch_size=None, concurrency=None):
+    """Check every account due for it, `concurrency` at a time, one chunk at a time.
+
+    Each chunk costs two writes however many accounts it holds: a bulk update
+    for accounts whose status changed and one UPDATE stamping the rest.
+    Returns the number of accounts checked.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    batch_size = batch_size or settings.ACCOUNT_CHECK_BATCH_SIZE
+    accounts = accounts_due_for_check(now).only(
+        "id", "user_id", "refresh_token", "reddit_account_status"
+    )
+
+    checked = 0
+    last_id = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency or settings.ACCOUNT_CHECK_CONCURRENCY
+    ) as executor:
+        while True:
+            chunk = list(accounts.filter(id__gt=last_id)[:batch_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            changed = []
+            unchanged_ids = []
+            for account, status in zip(chunk, executor.map(check_account, chunk)):
+                ACCOUNT_CHECKS.labels(result=status or "unreachable").inc()
+                if status is None:
+                    continue
+                if status != account.reddit_account_status:
+                    account.reddit_account_status = status
+                    account.last_checked_at = now
+                    account.updated_at = now
+                    changed.append(account)
+                else:
+                    unchanged_ids.append(account.id)
+
+            if changed:
+                RedditAccount.objects.bulk_update(
+                    changed, ["reddit_account_status", "last_checked_at", "updated_at"]
+                )
+                bump_user_cache_versions(account.user_id for account in changed)
+            if unchanged_ids:
+                RedditAccount.objects.filter(id__in=unchanged_ids).update(last_checked_at=now)
+
+            checked += len(chunk)
+            if len(chunk) < batch_size:
+                break
+
+    return checked
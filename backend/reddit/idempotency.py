@@ -0,0 +1,79 @@
+import json
+import uuid
+
+from django.conf import settings
+
+from .utils import get_redis_client
+
+CLAIMED = "claimed"
+IN_FLIGHT = "in_flight"
+PENDING = "pending"
+
+
+def new_run_token():
+    """Identifies one intended submission of a scheduled post, across retries and redeliveries."""
+    return uuid.uuid4().hex
+
+
+class SubmissionGuard:
+    """Redis record of each run token's progress, so a run is posted to Reddit at most once.
+
+    A worker claims the token before talking to Reddit and records the
+    resulting submission right after, before any database write. A
+    redelivered or retried task for the same token then either backs off
+    (another attempt is mid-flight) or reuses the recorded submission
+    instead of posting again. `SubmittedPost.run_token` is unique, so the
+    database remains the final word once the history row exists.
+    """
+
+    def key(self, run_token):
+        return f"submission:{run_token}"
+
+    def claim(self, run_token):
+        """Returns CLAIMED, IN_FLIGHT, or the recorded submission dict for this token."""
+        if not run_token:
+            return CLAIMED
+        try:
+            redis_client = get_redis_client()
+            key = self.key(run_token)
+            if redis_client.set(key, PENDING, nx=True, ex=settings.SUBMISSION_CLAIM_TIMEOUT):
+                return CLAIMED
+            value = redis_client.get(key)
+        except Exception as e:
+            # The unique run_token still stops duplicate history rows
+            print(f"{e.__class__.__name__} {e}")
+            return CLAIMED
+
+        if value is None:
+            # Expired between SET and GET; a later delivery can claim it
+            return IN_FLIGHT
+        if value.decode() == PENDING:
+            return IN_FLIGHT
+        return json.loads(value)
+
+    def record(self, run_token, submission_id, permalink):
+        if not run_token:
+            return
+        try:
+            get_redis_client().set(
+                self.key(run_token),
+                json.dumps({"id": submission_id, "permalink": permalink}),
+                ex=settings.SUBMISSION_RECORD_TIMEOUT,
+            )
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+    def release(self, run_token):
+        """Drop an unfinished claim so a retry of this run may post."""
+        if not run_token:
+            return
+        try:
+            redis_client = get_redis_client()
+            key = self.key(run_token)
+            if redis_client.get(key) == PENDING.encode():
+                redis_client.delete(key)
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+
+submission_guard = SubmissionGuard()
@@ -0,0 +1,73 @@
+import json
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.core.management.base import BaseCommand
+
+from reddit.benchmark import Benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark dispatch, submission, cron and API hot paths against a throwaway "
+        "test database and a fake Reddit client, and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--accounts-per-user", type=int, default=2)
+        parser.add_argument("--posts-per-account", type=int, default=50)
+        parser.add_argument("--submissions-per-post", type=int, default=5)
+        parser.add_argument("--api-requests", type=int, default=50)
+        parser.add_argument(
+            "--reddit-latency",
+            type=float,
+            default=0.0,
+            help="Seconds each fake Reddit API call takes.",
+        )
+        parser.add_argument(
+            "--async-concurrency",
+            type=int,
+            default=200,
+            help="Submissions in flight at once in the async submitter benchmark.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Write the JSON results to this file instead of stdout.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reuse the test database between runs.",
+        )
+
+    def handle(self, *args, **options):
+        benchmark = Benchmark(
+            users=options["users"],
+            accounts_per_user=options["accounts_per_user"],
+            posts_per_account=options["posts_per_account"],
+            submissions_per_post=options["submissions_per_post"],
+            api_requests=options["api_requests"],
+            reddit_latency=options["reddit_latency"],
+            async_concurrency=options["async_concurrency"],
+            seed=options["seed"],
+        )
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, keepdb=options["keepdb"])
+        try:
+            report = benchmark.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, default=str)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,29 @@
+import socket
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from reddit.async_submitter import AsyncSubmitter
+from reddit.metrics import start_metrics_server
+
+
+class Command(BaseCommand):
+    help = "Submit queued posts from a single asyncio process (SUBMISSION_WORKER=async)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Submissions in flight at once.",
+        )
+        parser.add_argument(
+            "--name",
+            default=socket.gethostname(),
+            help="Stable node name; messages in flight when it stopped are retried on restart.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Starting async submitter {options['name']}")
+        start_metrics_server()
+        asyncio.run(AsyncSubmitter(options["name"], options["concurrency"]).run())
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from reddit.metrics import start_metrics_server
+from reddit.scheduler import PostScheduler
+
+
+class Command(BaseCommand):
+    help = "Dispatch scheduled posts at their exact next_run instead of once a minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horizon",
+            type=int,
+            default=None,
+            help="Seconds of upcoming runs to keep in memory.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Starting post scheduler")
+        start_metrics_server()
+        PostScheduler(horizon_seconds=options["horizon"]).run_forever()
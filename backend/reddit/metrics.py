@@ -0,0 +1,165 @@
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # Each process writes its values here from the first metric it creates
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900, 3600)
+
+DISPATCH_BATCHES = Counter(
+    "schedularr_dispatch_batches_total", "Batches of due posts claimed by a dispatcher"
+)
+DISPATCHED_POSTS = Counter(
+    "schedularr_dispatched_posts_total", "Posts claimed and queued for submission"
+)
+DISPATCH_LAG = Histogram(
+    "schedularr_dispatch_lag_seconds",
+    "Delay between a post's next_run and the moment it was claimed",
+    buckets=LAG_BUCKETS,
+)
+QUEUE_WAIT = Histogram(
+    "schedularr_queue_wait_seconds",
+    "Delay between a post being queued and a worker starting to submit it",
+    buckets=LAG_BUCKETS,
+)
+REDDIT_LATENCY = Histogram(
+    "schedularr_reddit_request_seconds",
+    "Reddit API latency during submission, by phase",
+    ["phase"],
+    buckets=LATENCY_BUCKETS,
+)
+SUBMISSIONS = Counter(
+    "schedularr_submissions_total", "Submission attempts by outcome", ["outcome"]
+)
+SUBMISSION_ERRORS = Counter(
+    "schedularr_submission_errors_total",
+    "Failed submission attempts by exception class",
+    ["exception"],
+)
+CRON_CACHE_LOOKUPS = Counter(
+    "schedularr_cron_cache_lookups_total",
+    "Compiled cron schedule cache lookups",
+    ["result"],
+)
+ACCOUNT_CHECKS = Counter(
+    "schedularr_account_checks_total",
+    "Reddit account health checks by resulting status",
+    ["result"],
+)
+PREFLIGHT_CHECKS = Counter(
+    "schedularr_preflight_checks_total",
+    "Upcoming runs prepared ahead of their next_run, by result",
+    ["result"],
+)
+REMOVAL_CHECKS = Counter(
+    "schedularr_removal_checks_total",
+    "Submitted posts checked for removal, by result",
+    ["result"],
+)
+REMOVAL_INFO_REQUESTS = Counter(
+    "schedularr_removal_info_requests_total",
+    "Reddit /api/info requests made by the removal tracker",
+)
+API_LATENCY = Histogram(
+    "schedularr_api_request_seconds",
+    "API request latency by URL name, method and status code",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    if labels:
+        histogram = histogram.labels(**labels)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+def get_registry():
+    """Aggregate over all processes when PROMETHEUS_MULTIPROC_DIR is set (prefork, uvicorn workers)."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def start_metrics_server(port=None, forking=False):
+    """Serve /metrics from a background thread, for processes without the Django API.
+
+    A `forking` process's children record their metrics in their own memory,
+    out of its reach, so it only serves them in multiprocess mode.
+    """
+    port = port or settings.METRICS_PORT
+    if not port:
+        return
+    if forking and not MULTIPROC_DIR:
+        print("Set PROMETHEUS_MULTIPROC_DIR to serve worker metrics; metrics server disabled")
+        return
+    start_http_server(port, registry=get_registry())
+
+
+def mark_process_dead(pid):
+    """Drop a finished process's live gauges from the multiprocess aggregate."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+class MetricsMiddleware:
+    """Records latency for every request that resolved to a named URL."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    def observe(self, request, response, started):
+        match = getattr(request, "resolver_match", None)
+        if match is None or not match.url_name:
+            return
+        API_LATENCY.labels(
+            view=match.url_name, method=request.method, status=response.status_code
+        ).observe(time.perf_counter() - started)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0005_submittedpost_reddit_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submittedpost',
+            name='run_token',
+            field=models.CharField(blank=True, editable=False, help_text='Token of the dispatch run that produced this submission', max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0006_submittedpost_run_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='redditaccount',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, help_text='When the account status was last confirmed with Reddit', null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 06:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+from reddit.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('reddit', '0007_redditaccount_last_checked_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='scheduledpost',
+            index=models.Index(fields=['user', '-created_at'], name='scheduledpost_user_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='submittedpost',
+            index=models.Index(fields=['scheduled_post', '-submitted_at'], name='submittedpost_post_sub_idx'),
+        ),
+    ]
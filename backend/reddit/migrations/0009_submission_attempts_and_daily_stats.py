@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 06:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0008_due_post_and_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySubmissionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('subreddit', models.CharField(max_length=100)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('auth_failures', models.PositiveIntegerField(default=0)),
+                ('request_failures', models.PositiveIntegerField(default=0)),
+                ('api_failures', models.PositiveIntegerField(default=0)),
+                ('rate_limited', models.PositiveIntegerField(default=0)),
+                ('other_failures', models.PositiveIntegerField(default=0)),
+                ('total_latency_ms', models.PositiveBigIntegerField(default=0)),
+                ('reddit_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_submission_stats', to='reddit.redditaccount')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_submission_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['user', 'date'], name='dailystats_user_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user', 'reddit_account', 'subreddit'), name='dailysubmissionstats_unique_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subreddit', models.CharField(max_length=100)),
+                ('succeeded', models.BooleanField()),
+                ('error_class', models.CharField(blank=True, choices=[('auth', 'Authentication'), ('request', 'Request rejected'), ('api', 'Reddit API error'), ('rate_limited', 'Rate limited'), ('other', 'Other')], help_text='Kind of failure; empty for successful attempts', max_length=20, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('latency_ms', models.PositiveIntegerField(help_text='Time spent talking to Reddit')),
+                ('run_token', models.CharField(blank=True, max_length=32, null=True)),
+                ('attempted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('reddit_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submission_attempts', to='reddit.redditaccount')),
+                ('scheduled_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submission_attempts', to='reddit.scheduledpost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-attempted_at'],
+                'indexes': [models.Index(fields=['user', '-attempted_at'], name='attempt_user_attempted_idx')],
+            },
+        ),
+    ]
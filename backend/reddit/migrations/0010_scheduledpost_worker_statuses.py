@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0009_submission_attempts_and_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledpost',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('paused', 'Paused'), ('completed', 'Completed'), ('error', 'Error'), ('queued', 'Queued'), ('running', 'Running'), ('pending_retry', 'Pending Retry')], db_index=True, default='active', max_length=20),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 06:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Now
+
+from reddit.operations import AddIndexConcurrently
+
+
+def retry_pending_posts_now(apps, schema_editor):
+    """Posts left waiting on a Celery retry are picked up by the next dispatcher tick instead."""
+    ScheduledPost = apps.get_model("reddit", "ScheduledPost")
+    ScheduledPost.objects.filter(status="pending_retry").update(next_attempt_at=Now())
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('reddit', '0010_scheduledpost_worker_statuses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='attempt_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Failed submission attempts of the current run'),
+        ),
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='When a pending_retry post is dispatched again', null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='run_token',
+            field=models.CharField(blank=True, editable=False, help_text='Token of the run in progress or awaiting retry; retries reuse it', max_length=32, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='scheduledpost',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['next_run'], name='scheduledpost_due_idx'),
+        ),
+        migrations.RunPython(retry_pending_posts_now, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='scheduledpost',
+            index=models.Index(condition=models.Q(('status', 'pending_retry')), fields=['next_attempt_at'], name='scheduledpost_retry_idx'),
+        ),
+    ]
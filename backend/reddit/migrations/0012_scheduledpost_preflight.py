@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0011_durable_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='preflight_error',
+            field=models.TextField(blank=True, help_text='Problem found while preparing the upcoming run', null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledpost',
+            name='prepared_at',
+            field=models.DateTimeField(blank=True, help_text='When the upcoming run was last prepared', null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 06:27
+
+import datetime
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+from reddit.operations import AddIndexConcurrently
+
+
+def stop_tracking_old_posts(apps, schema_editor):
+    """Existing posts are all due now; only those young enough stay tracked."""
+    SubmittedPost = apps.get_model("reddit", "SubmittedPost")
+    max_age = datetime.timedelta(seconds=settings.REMOVAL_CHECK_SCHEDULE[-1][0])
+    cutoff = django.utils.timezone.now() - max_age
+    SubmittedPost.objects.filter(
+        Q(removed_at__isnull=False) | Q(submitted_at__lt=cutoff)
+    ).update(next_removal_check_at=None)
+
+
+class Migration(migrations.Migration):
+
+    # The index is built concurrently, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('reddit', '0012_scheduledpost_preflight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submittedpost',
+            name='next_removal_check_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, help_text='When to next check whether the post was removed; null once no longer tracked', null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='submittedpost',
+            index=models.Index(condition=models.Q(('next_removal_check_at__isnull', False), ('removed_at__isnull', True)), fields=['next_removal_check_at'], name='submittedpost_removal_idx'),
+        ),
+        migrations.RunPython(stop_tracking_old_posts, migrations.RunPython.noop),
+    ]
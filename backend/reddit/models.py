@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class RedditAccount(models.Model):
@@ -25,6 +26,11 @@ class RedditAccount(models.Model):
         db_index=True,
         help_text="The status of the Reddit account (e.g., active, suspended).",
     )
+    last_checked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the account status was last confirmed with Reddit",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,6 +47,10 @@ class ScheduledPost(models.Model):
         ("paused", "Paused"),
         ("completed", "Completed"),
         ("error", "Error"),
+        # Set by the dispatcher and submission workers; see reddit.states
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("pending_retry", "Pending Retry"),
     ]
 
     user = models.ForeignKey(
@@ -68,9 +78,28 @@ class ScheduledPost(models.Model):
     next_run = models.DateTimeField(null=True, blank=True, db_index=True)
     end_date = models.DateTimeField(null=True, blank=True)
     status = models.CharField(
-        max_length=10, choices=STATUS_CHOICES, default="active", db_index=True
+        max_length=20, choices=STATUS_CHOICES, default="active", db_index=True
     )
     last_submission_error = models.TextField(null=True, blank=True)
+    attempt_count = models.PositiveSmallIntegerField(
+        default=0, help_text="Failed submission attempts of the current run"
+    )
+    next_attempt_at = models.DateTimeField(
+        null=True, blank=True, help_text="When a pending_retry post is dispatched again"
+    )
+    run_token = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Token of the run in progress or awaiting retry; retries reuse it",
+    )
+    prepared_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the upcoming run was last prepared"
+    )
+    preflight_error = models.TextField(
+        null=True, blank=True, help_text="Problem found while preparing the upcoming run"
+    )
 
     last_run_started = models.DateTimeField(null=True, blank=True)
     last_run_finished = models.DateTimeField(null=True, blank=True)
@@ -87,6 +116,21 @@ class ScheduledPost(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Due-post claims and the scheduler window, one per kind of due
+            # post; rows that can never become due are left out
+            models.Index(
+                fields=["next_run"],
+                condition=models.Q(status="active"),
+                name="scheduledpost_due_idx",
+            ),
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending_retry"),
+                name="scheduledpost_retry_idx",
+            ),
+            models.Index(fields=["user", "-created_at"], name="scheduledpost_user_created_idx"),
+        ]
 
 
 class SubmittedPost(models.Model):
@@ -113,6 +157,14 @@ class SubmittedPost(models.Model):
 
     reddit_post_id = models.CharField(max_length=20, unique=True, db_index=True)
     reddit_url = models.URLField(null=True, blank=True, help_text="Full Reddit URL of the post")
+    run_token = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text="Token of the dispatch run that produced this submission",
+    )
 
     submitted_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -123,12 +175,25 @@ class SubmittedPost(models.Model):
         blank=True,
         help_text="Who removed the post (moderator, admin, etc.)",
     )
+    next_removal_check_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        default=timezone.now,
+        help_text="When to next check whether the post was removed; null once no longer tracked",
+    )
 
     class Meta:
         ordering = ["-submitted_at"]
         indexes = [
             models.Index(fields=["reddit_post_id"]),
             models.Index(fields=["submitted_at"]),
+            models.Index(fields=["scheduled_post", "-submitted_at"], name="submittedpost_post_sub_idx"),
+            # Removal tracker's due query; removed and untracked posts drop out
+            models.Index(
+                fields=["next_removal_check_at"],
+                name="submittedpost_removal_idx",
+                condition=models.Q(removed_at__isnull=True, next_removal_check_at__isnull=False),
+            ),
         ]
 
     def __str__(self):
@@ -138,3 +203,105 @@ class SubmittedPost(models.Model):
         if self.reddit_post_id and not self.reddit_url:
             self.reddit_url = f"https://reddit.com/r/{self.subreddit}/comments/{self.reddit_post_id}/"
         super().save(*args, **kwargs)
+
+
+class SubmissionAttempt(models.Model):
+    """One attempt to submit a scheduled post to Reddit, successful or not."""
+
+    ERROR_CLASS_CHOICES = [
+        ("auth", "Authentication"),
+        ("request", "Request rejected"),
+        ("api", "Reddit API error"),
+        ("rate_limited", "Rate limited"),
+        ("other", "Other"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="submission_attempts",
+    )
+    scheduled_post = models.ForeignKey(
+        "ScheduledPost",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="submission_attempts",
+    )
+    reddit_account = models.ForeignKey(
+        "RedditAccount",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="submission_attempts",
+    )
+    subreddit = models.CharField(max_length=100)
+    succeeded = models.BooleanField()
+    error_class = models.CharField(
+        max_length=20,
+        choices=ERROR_CLASS_CHOICES,
+        null=True,
+        blank=True,
+        help_text="Kind of failure; empty for successful attempts",
+    )
+    error_message = models.TextField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(help_text="Time spent talking to Reddit")
+    run_token = models.CharField(max_length=32, null=True, blank=True)
+    attempted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-attempted_at"]
+        indexes = [
+            models.Index(fields=["user", "-attempted_at"], name="attempt_user_attempted_idx"),
+        ]
+
+    def __str__(self):
+        outcome = "ok" if self.succeeded else self.error_class
+        return f"r/{self.subreddit} at {self.attempted_at:%Y-%m-%d %H:%M} ({outcome})"
+
+
+class DailySubmissionStats(models.Model):
+    """Submission attempts of one user's account to one subreddit on one (UTC) day.
+
+    Maintained incrementally as attempts are logged, so analytics read a
+    handful of rows per day instead of the attempt log or submission history.
+    """
+
+    date = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_submission_stats",
+    )
+    reddit_account = models.ForeignKey(
+        "RedditAccount",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_submission_stats",
+    )
+    subreddit = models.CharField(max_length=100)
+
+    attempts = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    auth_failures = models.PositiveIntegerField(default=0)
+    request_failures = models.PositiveIntegerField(default=0)
+    api_failures = models.PositiveIntegerField(default=0)
+    rate_limited = models.PositiveIntegerField(default=0)
+    other_failures = models.PositiveIntegerField(default=0)
+    total_latency_ms = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "user", "reddit_account", "subreddit"],
+                name="dailysubmissionstats_unique_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "date"], name="dailystats_user_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} r/{self.subreddit}: {self.successes}/{self.attempts}"
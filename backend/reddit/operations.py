@@ -0,0 +1,25 @@
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently as PostgresAddIndexConcurrently,
+)
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """Build the index without locking out writes to its table.
+
+    CREATE INDEX CONCURRENTLY only exists on PostgreSQL; elsewhere (the
+    SQLite development database) this is a plain AddIndex. Like the
+    original, it needs a migration with `atomic = False`.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,155 @@
+import datetime as dt
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from prawcore.exceptions import Forbidden, NotFound, OAuthException, Redirect
+
+from .cache import bump_user_cache_versions
+from .clients import client_pool, ensure_authorized
+from .events import publish_post_changes
+from .health import TRANSIENT_ERRORS
+from .metrics import PREFLIGHT_CHECKS
+from .models import ScheduledPost
+
+# Reddit couldn't be asked; the post is prepared again on the next call
+UNKNOWN = object()
+
+
+def claim_upcoming_posts(now, batch_size):
+    """Lock up to `batch_size` active posts due within SUBMISSION_PREPARE_AHEAD
+    that haven't been prepared for their upcoming run, and stamp them prepared.
+
+    Rows locked by another call are skipped, like in claim_due_posts.
+    """
+    ahead = dt.timedelta(seconds=settings.SUBMISSION_PREPARE_AHEAD)
+    with transaction.atomic():
+        posts = list(
+            ScheduledPost.objects.filter(
+                status="active", next_run__gt=now, next_run__lte=now + ahead
+            )
+            .filter(Q(prepared_at__isnull=True) | Q(prepared_at__lt=F("next_run") - ahead))
+            .select_related("reddit_account")
+            .select_for_update(skip_locked=True, of=("self",))
+            .only("id", "user_id", "subreddit", "preflight_error", "reddit_account__refresh_token")
+            .order_by("next_run")[:batch_size]
+        )
+        if posts:
+            ScheduledPost.objects.filter(id__in=[post.id for post in posts]).update(
+                prepared_at=now
+            )
+    return posts
+
+
+def check_subreddit(reddit, name):
+    """Why the client's account can't make a text post in r/`name`, or None if it can."""
+    subreddit = reddit.subreddit(name)
+    try:
+        subreddit_type = subreddit.subreddit_type
+    except (NotFound, Redirect):
+        return f"r/{name} does not exist."
+    except Forbidden:
+        return f"r/{name} is private, quarantined or banned."
+
+    if subreddit.user_is_banned:
+        return f"This Reddit account is banned from r/{name}."
+    if subreddit.submission_type == "link":
+        return f"r/{name} only allows link posts."
+    if subreddit_type in ("restricted", "private") and not (
+        subreddit.user_is_contributor or subreddit.user_is_moderator
+    ):
+        return f"Only approved users can post in r/{name}."
+    return None
+
+
+def prepare_account(reddit_account, subreddits):
+    """Get the account an access token for the coming runs and check it can post in each subreddit.
+
+    The token is shared with the submission workers and lasts past every run
+    due within SUBMISSION_PREPARE_AHEAD, so firing a run is a single submit
+    request. Returns `{subreddit: error message or None}`, UNKNOWN for the
+    subreddits Reddit couldn't be asked about.
+    """
+    reddit = client_pool.get(reddit_account)
+    try:
+        ensure_authorized(
+            reddit, reddit_account.id, min_ttl=settings.SUBMISSION_PREPARE_AHEAD + 60
+        )
+        if getattr(reddit.user.me(), "is_suspended", False):
+            return dict.fromkeys(subreddits, "This Reddit account is suspended.")
+        return {name: check_subreddit(reddit, name) for name in subreddits}
+    except TRANSIENT_ERRORS:
+        return dict.fromkeys(subreddits, UNKNOWN)
+    except OAuthException:
+        client_pool.invalidate(reddit_account.id)
+        return dict.fromkeys(
+            subreddits, "Reddit authentication failed. Please re-link the account."
+        )
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        return dict.fromkeys(subreddits, UNKNOWN)
+
+
+def prepare_upcoming_posts(now=None, batch_size=None, concurrency=None):
+    """Prepare every post due within SUBMISSION_PREPARE_AHEAD, `concurrency` accounts at a time.
+
+    Each account is prepared once per batch however many of its posts are
+    due. Problems found are written to the posts' preflight_error, so they
+    show up before the run rather than when it fails. Returns the number of
+    posts prepared.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    batch_size = batch_size or settings.DISPATCH_BATCH_SIZE
+
+    prepared = 0
+    unknown_ids = []
+    with ThreadPoolExecutor(
+        max_workers=concurrency or settings.SUBMISSION_PREPARE_CONCURRENCY
+    ) as executor:
+        while True:
+            posts = claim_upcoming_posts(now, batch_size)
+            if not posts:
+                break
+
+            posts_by_account = defaultdict(list)
+            for post in posts:
+                posts_by_account[post.reddit_account_id].append(post)
+            accounts = [group[0].reddit_account for group in posts_by_account.values()]
+            results = executor.map(
+                lambda account: prepare_account(
+                    account, {post.subreddit for post in posts_by_account[account.id]}
+                ),
+                accounts,
+            )
+
+            changed = defaultdict(list)
+            for account, errors in zip(accounts, results):
+                for post in posts_by_account[account.id]:
+                    error = errors[post.subreddit]
+                    if error is UNKNOWN:
+                        PREFLIGHT_CHECKS.labels(result="unreachable").inc()
+                        unknown_ids.append(post.id)
+                        continue
+                    PREFLIGHT_CHECKS.labels(result="ok" if error is None else "flagged").inc()
+                    if error != post.preflight_error:
+                        changed[error].append(post)
+
+            for error, changed_posts in changed.items():
+                ScheduledPost.objects.filter(id__in=[post.id for post in changed_posts]).update(
+                    preflight_error=error, updated_at=now
+                )
+            if changed:
+                changed_posts = [post for group in changed.values() for post in group]
+                bump_user_cache_versions(post.user_id for post in changed_posts)
+                publish_post_changes([post.id for post in changed_posts])
+
+            prepared += len(posts)
+            if len(posts) < batch_size:
+                break
+
+    if unknown_ids:
+        # Try these again on the next call rather than go unprepared
+        ScheduledPost.objects.filter(id__in=unknown_ids).update(prepared_at=None)
+    return prepared
@@ -0,0 +1,148 @@
+import re
+import math
+
+from django.conf import settings
+
+from .utils import get_redis_client
+
+# Takes one token from every bucket in KEYS[1..n-1]. ARGV holds a (capacity,
+# refill rate per second) pair per bucket, then the reservation TTL.
+#
+# Buckets may go into debt: a caller finding them empty still takes its token,
+# reserving the next free slot, and is told how long until that slot. Callers
+# queued behind it get later slots, so a backlog is spread out rather than
+# retried all at once. The slot is recorded under KEYS[n] (the run's
+# reservation key), and a run coming back for its slot is let through without
+# taking another token. Without a reservation key (empty string), an empty
+# bucket takes nothing and just reports the wait.
+#
+# Returns "0" when the caller may go now, otherwise the seconds to wait.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local reservation = KEYS[#KEYS]
+local buckets = #KEYS - 1
+
+if reservation ~= '' then
+    local slot = tonumber(redis.call('GET', reservation))
+    if slot then
+        if slot <= now then
+            redis.call('DEL', reservation)
+            return "0"
+        end
+        return tostring(slot - now)
+    end
+end
+
+local tokens = {}
+local wait = 0
+for i = 1, buckets do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+
+if wait > 0 and reservation == '' then
+    return tostring(wait)
+end
+
+for i = 1, buckets do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local left = tokens[i] - 1
+    redis.call('HSET', KEYS[i], 'tokens', left, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil((capacity - left) / rate) + 1)
+end
+
+if wait > 0 then
+    local ttl = tonumber(ARGV[buckets * 2 + 1])
+    redis.call('SET', reservation, tostring(now + wait), 'EX', math.ceil(wait) + ttl)
+    return tostring(wait)
+end
+return "0"
+"""
+
+RESERVATION_KEY = "ratelimit:reservation:{}"
+
+RATELIMIT_MESSAGE_RE = re.compile(r"(\d+)\s*(second|minute|hour)", re.IGNORECASE)
+RATELIMIT_UNITS = {"second": 1, "minute": 60, "hour": 60 * 60}
+
+
+class SubmissionRateLimiter:
+    """Redis token buckets limiting submissions per Reddit account and per subreddit.
+
+    Buckets are shared by every worker, so a burst of due posts for one account
+    is spread out instead of being rejected by Reddit.
+    """
+
+    def __init__(self):
+        self._script = None
+
+    def buckets(self, reddit_account_id, subreddit):
+        buckets = []
+        if settings.REDDIT_ACCOUNT_POST_INTERVAL > 0:
+            buckets.append(
+                (
+                    f"ratelimit:account:{reddit_account_id}",
+                    settings.REDDIT_ACCOUNT_POST_BURST,
+                    1 / settings.REDDIT_ACCOUNT_POST_INTERVAL,
+                )
+            )
+        if settings.REDDIT_SUBREDDIT_POST_INTERVAL > 0:
+            buckets.append(
+                (
+                    f"ratelimit:account:{reddit_account_id}:subreddit:{subreddit.lower()}",
+                    settings.REDDIT_SUBREDDIT_POST_BURST,
+                    1 / settings.REDDIT_SUBREDDIT_POST_INTERVAL,
+                )
+            )
+        return buckets
+
+    def acquire(self, reddit_account_id, subreddit, run_token=None):
+        """Take a submission slot; returns 0, or the whole seconds to wait for one.
+
+        With a `run_token`, a wait is a slot reserved for that run: the caller
+        should come back for the same run once it has passed, and is then let
+        through straight away.
+        """
+        buckets = self.buckets(reddit_account_id, subreddit)
+        if not buckets:
+            return 0
+
+        try:
+            if self._script is None:
+                self._script = get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+            keys = [key for key, _, _ in buckets]
+            keys.append(RESERVATION_KEY.format(run_token) if run_token else "")
+            args = []
+            for _, capacity, rate in buckets:
+                args.extend([capacity, rate])
+            args.append(settings.RATELIMIT_RESERVATION_TTL)
+            wait = float(self._script(keys=keys, args=args))
+        except Exception as e:
+            # Never hold posts back because the limiter itself is unavailable
+            print(f"{e.__class__.__name__} {e}")
+            return 0
+
+        return math.ceil(wait)
+
+
+def ratelimit_delay(exception, default=60):
+    """Seconds Reddit asks us to wait in a RATELIMIT API error, or None for other errors."""
+    for item in getattr(exception, "items", []):
+        if item.error_type == "RATELIMIT":
+            match = RATELIMIT_MESSAGE_RE.search(item.message or "")
+            if not match:
+                return default
+            return int(match.group(1)) * RATELIMIT_UNITS[match.group(2).lower()]
+    return None
+
+
+submission_limiter = SubmissionRateLimiter()
@@ -0,0 +1,145 @@
+import datetime as dt
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from prawcore.exceptions import OAuthException
+
+from .cache import bump_user_cache_versions
+from .clients import client_pool
+from .metrics import REMOVAL_CHECKS, REMOVAL_INFO_REQUESTS
+from .models import SubmittedPost
+from .subreddits import get_reader
+
+# Fullnames Reddit's /api/info answers for in one request
+INFO_BATCH_SIZE = 100
+
+
+def removal_check_interval(submitted_at, now):
+    """Seconds until a post submitted at `submitted_at` is checked again, or None to stop tracking it.
+
+    Fresh posts are the ones moderators and filters act on, so they are
+    checked often; the interval grows with age, per REMOVAL_CHECK_SCHEDULE.
+    """
+    age = (now - submitted_at).total_seconds()
+    for max_age, interval in settings.REMOVAL_CHECK_SCHEDULE:
+        if age < max_age:
+            return interval
+    return None
+
+
+def posts_due_for_removal_check(now):
+    return SubmittedPost.objects.filter(
+        removed_at__isnull=True, next_removal_check_at__lte=now
+    ).order_by("next_removal_check_at")
+
+
+def fetch_removals(reddit, reddit_post_ids):
+    """`{reddit_post_id: removed_by}` for the posts Reddit reports removed or deleted.
+
+    One /api/info request per INFO_BATCH_SIZE posts. `removed_by` is Reddit's
+    removed_by_category: moderator, deleted (by the author), automod_filtered,
+    anti_evil_ops, reddit and so on.
+    """
+    removed = {}
+    for start in range(0, len(reddit_post_ids), INFO_BATCH_SIZE):
+        batch = reddit_post_ids[start : start + INFO_BATCH_SIZE]
+        fullnames = [f"t3_{post_id}" for post_id in batch]
+        REMOVAL_INFO_REQUESTS.inc()
+        for submission in reddit.info(fullnames=fullnames):
+            category = getattr(submission, "removed_by_category", None)
+            if category:
+                removed[submission.id] = category
+    return removed
+
+
+def check_account_removals(reddit_account, reddit_post_ids):
+    """fetch_removals with the posting account's own client, or None if Reddit couldn't tell us.
+
+    Each account's requests count against its own rate limit. Posts whose
+    account has been unlinked are checked with the app-only client.
+    """
+    try:
+        reddit = client_pool.get(reddit_account) if reddit_account else get_reader()
+        return fetch_removals(reddit, reddit_post_ids)
+    except OAuthException:
+        if reddit_account:
+            client_pool.invalidate(reddit_account.id)
+        return None
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        return None
+
+
+def check_removals(now=None, batch_size=None, concurrency=None):
+    """Check every submitted post due for it, `concurrency` accounts at a time, one chunk at a time.
+
+    Removed posts get removed_at (when the removal was noticed) and
+    removed_by in one bulk update per chunk; the rest are rescheduled with
+    one UPDATE per re-check interval. Posts Reddit couldn't be asked about
+    are rescheduled too, rather than retried straight away. Returns the
+    number of posts checked.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    batch_size = batch_size or settings.REMOVAL_CHECK_BATCH_SIZE
+    posts = (
+        posts_due_for_removal_check(now)
+        .select_related("reddit_account")
+        .only("id", "reddit_post_id", "submitted_at", "reddit_account__refresh_token")
+    )
+
+    checked = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency or settings.REMOVAL_CHECK_CONCURRENCY
+    ) as executor:
+        while True:
+            chunk = list(posts[:batch_size])
+            if not chunk:
+                break
+
+            posts_by_account = defaultdict(list)
+            for post in chunk:
+                posts_by_account[post.reddit_account_id].append(post)
+            groups = list(posts_by_account.values())
+            results = executor.map(
+                lambda group: check_account_removals(
+                    group[0].reddit_account, [post.reddit_post_id for post in group]
+                ),
+                groups,
+            )
+
+            removed = []
+            rescheduled = defaultdict(list)
+            for group, removals in zip(groups, results):
+                for post in group:
+                    if removals is not None and post.reddit_post_id in removals:
+                        REMOVAL_CHECKS.labels(result="removed").inc()
+                        post.removed_at = now
+                        post.removed_by = removals[post.reddit_post_id]
+                        post.next_removal_check_at = None
+                        post.updated_at = now
+                        removed.append(post)
+                        continue
+                    REMOVAL_CHECKS.labels(result="unreachable" if removals is None else "live").inc()
+                    rescheduled[removal_check_interval(post.submitted_at, now)].append(post.id)
+
+            if removed:
+                SubmittedPost.objects.bulk_update(
+                    removed, ["removed_at", "removed_by", "next_removal_check_at", "updated_at"]
+                )
+                bump_user_cache_versions(
+                    SubmittedPost.objects.filter(id__in=[post.id for post in removed])
+                    .exclude(scheduled_post__isnull=True)
+                    .values_list("scheduled_post__user_id", flat=True)
+                )
+            for interval, post_ids in rescheduled.items():
+                next_check = now + dt.timedelta(seconds=interval) if interval else None
+                SubmittedPost.objects.filter(id__in=post_ids).update(
+                    next_removal_check_at=next_check
+                )
+
+            checked += len(chunk)
+            if len(chunk) < batch_size:
+                break
+
+    return checked
@@ -0,0 +1,186 @@
+import json
+import time
+import heapq
+import datetime as dt
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .utils import get_redis_client
+from .models import ScheduledPost
+from .sharding import ShardMembership, filter_shards, shard_of
+from .tasks import claim_due_posts, dispatch_due_posts, publish_submissions
+
+# The field holding when a post in each schedulable status is next due
+DUE_FIELDS = {"active": "next_run", "pending_retry": "next_attempt_at"}
+
+
+class PostScheduler:
+    """Fires scheduled posts at their `next_run` (or retries at their
+    `next_attempt_at`) instead of on the next beat tick.
+
+    Upcoming runs within the horizon are kept in a min-heap. The window is
+    extended incrementally as time passes, and individual posts are refreshed
+    from change notifications, so the table is never rescanned in full.
+
+    Several schedulers can run side by side: each one only loads and
+    dispatches the shards it currently leases (see ShardMembership), and
+    starts over from a fresh window whenever that set changes.
+    """
+
+    def __init__(self, horizon_seconds=None, batch_size=None, membership=None):
+        self.horizon = dt.timedelta(
+            seconds=horizon_seconds or settings.SCHEDULER_HORIZON_SECONDS
+        )
+        self.batch_size = batch_size or settings.DISPATCH_BATCH_SIZE
+        self.membership = membership or ShardMembership()
+        self.shards = frozenset()
+        self.next_heartbeat = 0
+        self.heap = []
+        # post_id -> next_run currently expected, used to skip stale heap entries
+        self.scheduled = {}
+        self.loaded_until = None
+        self.pubsub = None
+
+    def now(self):
+        return dt.datetime.now(dt.timezone.utc)
+
+    def push(self, post_id, next_run):
+        self.scheduled[post_id] = next_run
+        heapq.heappush(self.heap, (next_run, post_id))
+
+    def heartbeat(self):
+        """Renew shard leases; drop all in-memory state if the owned shards changed."""
+        self.next_heartbeat = time.monotonic() + self.membership.heartbeat_interval
+        shards = self.membership.heartbeat()
+        if shards != self.shards:
+            print(f"Scheduler {self.membership.node_id} now owns {len(shards)} shards")
+            self.shards = shards
+            self.heap = []
+            self.scheduled = {}
+            self.loaded_until = None
+
+    def sweep(self):
+        """Dispatch everything in our shards that is already due, like the beat poll does."""
+        if self.shards:
+            dispatch_due_posts(shards=self.shards)
+
+    def load_window(self, now):
+        """Load runs between the end of the last window and `now + horizon`."""
+        start = self.loaded_until or now
+        end = now + self.horizon
+        for status, due_field in DUE_FIELDS.items():
+            posts = filter_shards(
+                ScheduledPost.objects.filter(
+                    status=status, **{f"{due_field}__gt": start, f"{due_field}__lte": end}
+                ),
+                self.shards,
+            ).order_by(due_field, "id")
+
+            last = None
+            while True:
+                page = posts
+                if last is not None:
+                    page = page.filter(**{f"{due_field}__gte": last[0]}).exclude(
+                        **{due_field: last[0], "id__lte": last[1]}
+                    )
+                rows = list(page.values_list(due_field, "id")[: self.batch_size])
+                for due_at, post_id in rows:
+                    self.push(post_id, due_at)
+                if len(rows) < self.batch_size:
+                    break
+                last = rows[-1]
+
+        self.loaded_until = end
+
+    def refresh(self, post_ids):
+        post_ids = [post_id for post_id in post_ids if shard_of(post_id) in self.shards]
+        if not post_ids:
+            return
+
+        posts = ScheduledPost.objects.filter(id__in=post_ids).values_list(
+            "id", "status", "next_run", "next_attempt_at"
+        )
+        found = set()
+        due = []
+        now = self.now()
+        for post_id, status, next_run, next_attempt_at in posts:
+            found.add(post_id)
+            due_at = next_attempt_at if status == "pending_retry" else next_run
+            if status not in DUE_FIELDS or (status == "pending_retry" and due_at is None):
+                self.scheduled.pop(post_id, None)
+            elif due_at is None or due_at <= now:
+                self.scheduled.pop(post_id, None)
+                due.append(post_id)
+            elif self.loaded_until and due_at <= self.loaded_until:
+                self.push(post_id, due_at)
+            else:
+                # Outside the loaded window, picked up by a later load_window()
+                self.scheduled.pop(post_id, None)
+
+        for post_id in set(post_ids) - found:
+            self.scheduled.pop(post_id, None)
+        if due:
+            self.dispatch(due)
+
+    def dispatch(self, post_ids):
+        runs = claim_due_posts(self.now(), len(post_ids), post_ids=post_ids)
+        if runs:
+            publish_submissions(runs)
+
+    def fire_due(self, now):
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            next_run, post_id = heapq.heappop(self.heap)
+            if self.scheduled.get(post_id) != next_run:
+                continue
+            del self.scheduled[post_id]
+            due.append(post_id)
+
+        for start in range(0, len(due), self.batch_size):
+            self.dispatch(due[start : start + self.batch_size])
+
+    def handle_messages(self, timeout):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        while message:
+            try:
+                self.refresh([int(post_id) for post_id in json.loads(message["data"])["ids"]])
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Ignoring malformed schedule notification: {e}")
+            message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+
+    def run_forever(self):
+        self.pubsub = get_redis_client().pubsub()
+        self.pubsub.subscribe(settings.SCHEDULER_CHANNEL)
+
+        try:
+            while True:
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"{e.__class__.__name__} {e}")
+                    close_old_connections()
+                    time.sleep(1)
+        finally:
+            self.membership.leave()
+
+    def tick(self):
+        if time.monotonic() >= self.next_heartbeat:
+            self.heartbeat()
+
+        now = self.now()
+
+        # Extend the window halfway through so it never runs dry
+        if self.loaded_until is None or now >= self.loaded_until - self.horizon / 2:
+            close_old_connections()
+            self.sweep()
+            self.load_window(now)
+
+        self.fire_due(now)
+
+        wake_at = self.loaded_until - self.horizon / 2
+        if self.heap:
+            wake_at = min(wake_at, self.heap[0][0])
+        timeout = max((wake_at - self.now()).total_seconds(), 0)
+        timeout = min(timeout, max(self.next_heartbeat - time.monotonic(), 0))
+        self.handle_messages(timeout)
@@ -0,0 +1,129 @@
+import os
+import time
+import uuid
+import socket
+
+from django.conf import settings
+from django.db.models import IntegerField
+from django.db.models.functions import Mod
+
+from .utils import get_redis_client
+
+NODES_KEY = "scheduler:nodes"
+LEASE_KEY = "scheduler:shard:{}"
+
+# Takes every free lease in KEYS and extends the ones already held by ARGV[1].
+# Returns a 0/1 flag per key telling whether the node holds it afterwards.
+ACQUIRE_SCRIPT = """
+local held = {}
+for i, key in ipairs(KEYS) do
+    local owner = redis.call('GET', key)
+    if not owner then
+        redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+        held[i] = 1
+    elseif owner == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+        held[i] = 1
+    else
+        held[i] = 0
+    end
+end
+return held
+"""
+
+# Drops the leases in KEYS that are still held by ARGV[1]
+RELEASE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+return 0
+"""
+
+
+def shard_of(post_id, shard_count=None):
+    return post_id % (shard_count or settings.SCHEDULER_SHARDS)
+
+
+def filter_shards(queryset, shards, shard_count=None):
+    """Restrict a ScheduledPost queryset to posts whose id falls in `shards`."""
+    return queryset.alias(
+        shard=Mod(
+            "id", shard_count or settings.SCHEDULER_SHARDS, output_field=IntegerField()
+        )
+    ).filter(shard__in=sorted(shards))
+
+
+class ShardMembership:
+    """Splits ScheduledPost ids between the running scheduler nodes.
+
+    Every post belongs to shard `id % SCHEDULER_SHARDS`. Nodes announce
+    themselves in a Redis sorted set scored by heartbeat expiry, assign the
+    shards round-robin over the sorted list of live nodes, and take an
+    expiring Redis lease on each shard they are assigned before dispatching
+    it. When a node stops heartbeating it drops out of the list, the others
+    pick up its shards as soon as its leases lapse, and the same happens in
+    reverse when a node joins.
+
+    Two nodes can briefly disagree about membership; the leases keep them
+    from working the same shard, and claims use SKIP LOCKED regardless, so
+    a post is never queued twice.
+    """
+
+    def __init__(self, node_id=None, shard_count=None, lease_seconds=None):
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.shard_count = shard_count or settings.SCHEDULER_SHARDS
+        self.lease_seconds = lease_seconds or settings.SCHEDULER_LEASE_SECONDS
+        self.shards = frozenset()
+        self._acquire = None
+        self._release = None
+
+    @property
+    def heartbeat_interval(self):
+        return self.lease_seconds / 3
+
+    def lease_keys(self, shards):
+        return [LEASE_KEY.format(shard) for shard in shards]
+
+    def live_nodes(self, redis_client):
+        now = time.time()
+        with redis_client.pipeline() as pipe:
+            pipe.zadd(NODES_KEY, {self.node_id: now + self.lease_seconds})
+            pipe.zremrangebyscore(NODES_KEY, "-inf", now)
+            pipe.zrange(NODES_KEY, 0, -1)
+            nodes = pipe.execute()[-1]
+        return sorted(node.decode() for node in nodes)
+
+    def assigned_shards(self, nodes):
+        index = nodes.index(self.node_id)
+        return [shard for shard in range(self.shard_count) if shard % len(nodes) == index]
+
+    def heartbeat(self):
+        """Renew membership and leases; returns the shards this node may dispatch."""
+        redis_client = get_redis_client()
+        if self._acquire is None:
+            self._acquire = redis_client.register_script(ACQUIRE_SCRIPT)
+            self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+        assigned = self.assigned_shards(self.live_nodes(redis_client))
+        released = [shard for shard in self.shards if shard not in assigned]
+        if released:
+            self._release(keys=self.lease_keys(released), args=[self.node_id])
+
+        held = []
+        if assigned:
+            held = self._acquire(
+                keys=self.lease_keys(assigned),
+                args=[self.node_id, int(self.lease_seconds * 1000)],
+            )
+        self.shards = frozenset(shard for shard, ok in zip(assigned, held) if ok)
+        return self.shards
+
+    def leave(self):
+        """Give up all leases so the remaining nodes take over without waiting for expiry."""
+        redis_client = get_redis_client()
+        redis_client.zrem(NODES_KEY, self.node_id)
+        if self.shards and self._release is not None:
+            self._release(keys=self.lease_keys(self.shards), args=[self.node_id])
+        self.shards = frozenset()
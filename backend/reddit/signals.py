@@ -0,0 +1,28 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+from .cache import bump_user_cache_version
+from .events import deleted_post_event, post_event, publish_post_events
+from .models import RedditAccount, ScheduledPost, SubmittedPost
+
+
+@receiver([post_save, post_delete], sender=RedditAccount)
+@receiver([post_save, post_delete], sender=ScheduledPost)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    bump_user_cache_version(instance.user_id)
+
+
+@receiver(post_save, sender=ScheduledPost)
+def publish_post_saved(sender, instance, **kwargs):
+    publish_post_events({instance.user_id: [post_event(instance)]})
+
+
+@receiver(post_delete, sender=ScheduledPost)
+def publish_post_deleted(sender, instance, **kwargs):
+    publish_post_events({instance.user_id: [deleted_post_event(instance.id)]})
+
+
+@receiver([post_save, post_delete], sender=SubmittedPost)
+def invalidate_submission_owner_cache(sender, instance, **kwargs):
+    if instance.scheduled_post_id:
+        bump_user_cache_version(instance.scheduled_post.user_id)
@@ -0,0 +1,120 @@
+import datetime as dt
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+
+from .cache import bump_user_cache_versions
+from .events import post_event, publish_post_events
+from .metrics import SUBMISSIONS
+from .models import ScheduledPost
+
+# Statuses a submission worker will pick a post up from; everything is
+# dispatched through queued, so stale or duplicate messages find nothing to do
+RUNNABLE_STATUSES = ["queued"]
+# Statuses only the dispatcher and workers set; users can't write them
+WORKER_STATUSES = ["queued", "running", "pending_retry"]
+
+INTERRUPTED_ERROR = "Submission was interrupted (will retry)"
+ABANDONED_ERROR = "Submission was interrupted (gave up after {} attempts)"
+
+# Allowed moves out of each status, made by the dispatcher, Post Now and the
+# submission workers. Users editing a post through the API are not bound by it.
+TRANSITIONS = {
+    # Dispatched when due
+    "active": {"queued"},
+    "pending_retry": {"queued"},
+    # Post Now works on posts in any settled state
+    "paused": {"queued"},
+    "completed": {"queued"},
+    "error": {"queued"},
+    # Finished by a redelivery of a recorded run, deferred by the rate
+    # limiter, or failed before reaching Reddit
+    "queued": {"running", "active", "completed", "error", "pending_retry"},
+    "running": {"active", "completed", "error", "pending_retry"},
+}
+
+
+def transition(post, status, **fields):
+    """Move `post` to `status` if it is still in the status it was loaded with.
+
+    A single `UPDATE ... WHERE id = %s AND status = <expected>` writing only
+    `status`, `updated_at` and `fields`, so a worker never overwrites a change
+    someone else made meanwhile: if the row moved on, nothing is written and
+    False is returned. On success the instance is updated to match, the
+    owner's cached API data is invalidated and the change is pushed to their
+    event streams (queryset updates send no model signals).
+    """
+    if status not in TRANSITIONS.get(post.status, ()):
+        raise ValueError(f"Scheduled post {post.id} can't go from {post.status} to {status}")
+
+    now = dt.datetime.now(dt.timezone.utc)
+    updated = ScheduledPost.objects.filter(id=post.id, status=post.status).update(
+        status=status, updated_at=now, **fields
+    )
+    if not updated:
+        return False
+
+    post.status = status
+    post.updated_at = now
+    for name, value in fields.items():
+        setattr(post, name, value)
+    bump_user_cache_versions([post.user_id])
+    publish_post_events({post.user_id: [post_event(post)]})
+    return True
+
+
+def release_stale_runs(now=None):
+    """Hand posts whose submission never finished back to the dispatcher as pending_retry.
+
+    Covers workers that died mid-submission and queue messages that were
+    lost. A running post counts as abandoned once it has been running for
+    longer than its SUBMISSION_CLAIM_TIMEOUT claim, after which no worker
+    can finish it. A queued post may just be waiting behind a backlog, so it
+    is only given up on after SUBMISSION_QUEUE_TIMEOUT. Its run token is
+    kept, so the retry can't post twice. Each release counts as a failed
+    attempt, and like record_submission_failure a post reaching
+    SUBMISSION_MAX_ATTEMPTS goes to error instead, so a post that keeps
+    killing its worker can't loop forever. Returns the number of posts released.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    claim_cutoff = now - dt.timedelta(seconds=settings.SUBMISSION_CLAIM_TIMEOUT)
+    queue_cutoff = now - dt.timedelta(seconds=settings.SUBMISSION_QUEUE_TIMEOUT)
+    stale = ScheduledPost.objects.filter(
+        Q(status="running", last_run_started__lt=claim_cutoff)
+        | Q(status="queued", updated_at__lt=queue_cutoff)
+    )
+    released = list(stale.values_list("id", "user_id", "attempt_count"))
+    if not released:
+        return 0
+
+    max_attempts = settings.SUBMISSION_MAX_ATTEMPTS
+    abandoned_error = ABANDONED_ERROR.format(max_attempts)
+    # The attempt_count before this release
+    gave_up = Q(attempt_count__gte=max_attempts - 1)
+    stale.filter(id__in=[post_id for post_id, _, _ in released]).update(
+        status=Case(When(gave_up, then=Value("error")), default=Value("pending_retry")),
+        attempt_count=F("attempt_count") + 1,
+        next_attempt_at=Case(When(gave_up, then=Value(None)), default=Value(now)),
+        run_token=Case(When(gave_up, then=Value(None)), default=F("run_token")),
+        last_submission_error=Case(
+            When(gave_up, then=Value(abandoned_error)),
+            default=Value(INTERRUPTED_ERROR),
+        ),
+        updated_at=now,
+    )
+    bump_user_cache_versions(user_id for _, user_id, _ in released)
+    events_by_user = defaultdict(list)
+    for post_id, user_id, attempt_count in released:
+        if attempt_count + 1 >= max_attempts:
+            SUBMISSIONS.labels(outcome="failed").inc()
+            event = {"id": post_id, "status": "error", "last_submission_error": abandoned_error}
+        else:
+            event = {
+                "id": post_id,
+                "status": "pending_retry",
+                "last_submission_error": INTERRUPTED_ERROR,
+            }
+        events_by_user[user_id].append(event)
+    publish_post_events(events_by_user)
+    return len(released)
@@ -0,0 +1,22 @@
+import json
+
+from .utils import get_redis_client
+
+QUEUE_KEY = "submissions:queue"
+PROCESSING_KEY = "submissions:processing:{}"
+
+
+def submission_message(post_id, run_token):
+    return json.dumps({"post_id": post_id, "run_token": run_token})
+
+
+def enqueue_submissions(messages):
+    """Queue `(post_id, run_token)` pairs for the async submitter.
+
+    Retries and rate-limit deferrals are not queued here: they wait in the
+    database as pending_retry posts until the dispatcher finds them due.
+    """
+    messages = [submission_message(*message) for message in messages]
+    if not messages:
+        return
+    get_redis_client().lpush(QUEUE_KEY, *messages)
@@ -0,0 +1,176 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from prawcore.exceptions import Forbidden, NotFound, Redirect
+
+from .clients import get_reddit_instance
+
+SUBREDDIT_KEY = "subreddit-metadata:{}"
+
+# The post requirements kept from Reddit's answer; see subreddit_problems
+REQUIREMENT_FIELDS = (
+    "body_restriction_policy",
+    "body_text_min_length",
+    "body_text_max_length",
+    "title_text_min_length",
+    "title_text_max_length",
+)
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_reader():
+    """This thread's read-only, application-only client; subreddit metadata needs no user.
+
+    PRAW clients aren't thread-safe, so each thread gets its own. Requests
+    time out after SUBREDDIT_LOOKUP_TIMEOUT seconds.
+    """
+    reader = getattr(_local, "reader", None)
+    if reader is None:
+        reader = get_reddit_instance(
+            requestor_kwargs={"timeout": settings.SUBREDDIT_LOOKUP_TIMEOUT}
+        )
+        reader.read_only = True
+        _local.reader = reader
+    return reader
+
+
+def get_lookup_executor():
+    """Threads for subreddit lookups, kept for the life of the process so their readers are reused."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SUBREDDIT_LOOKUP_CONCURRENCY,
+                thread_name_prefix="subreddit-lookup",
+            )
+        return _executor
+
+
+def fetch_subreddit_metadata(reddit, name):
+    """What Reddit says about r/`name` that doesn't depend on who posts.
+
+    `{"exists": False}` for subreddits that don't exist or are banned; private
+    and quarantined ones exist but can't be looked into.
+    """
+    subreddit = reddit.subreddit(name)
+    try:
+        subreddit_type = subreddit.subreddit_type
+    except (NotFound, Redirect):
+        return {"exists": False}
+    except Forbidden:
+        return {"exists": True, "name": name, "type": "private"}
+
+    try:
+        requirements = subreddit.post_requirements()
+    except (NotFound, Forbidden):
+        requirements = {}
+    return {
+        "exists": True,
+        "name": subreddit.display_name,
+        "type": subreddit_type,
+        "submission_type": subreddit.submission_type,
+        "requirements": {
+            field: requirements[field]
+            for field in REQUIREMENT_FIELDS
+            if requirements.get(field) is not None
+        },
+    }
+
+
+def lookup_subreddit(name):
+    try:
+        return fetch_subreddit_metadata(get_reader(), name)
+    except Exception as e:
+        # Unknown rather than invalid: Reddit being down mustn't block scheduling
+        print(f"{e.__class__.__name__} {e}")
+        return None
+
+
+def get_subreddit_metadata(names):
+    """`{name.lower(): metadata or None}` for `names`, from the shared cache where possible.
+
+    One cache round-trip for the whole batch; misses are looked up on Reddit,
+    SUBREDDIT_LOOKUP_CONCURRENCY at a time, and cached for
+    SUBREDDIT_CACHE_TIMEOUT seconds, or SUBREDDIT_NEGATIVE_CACHE_TIMEOUT for
+    subreddits that don't exist. None means Reddit couldn't be asked, or
+    didn't answer within SUBREDDIT_LOOKUP_TIMEOUT seconds; that answer isn't
+    cached.
+    """
+    names = {name.lower() for name in names if name}
+    if not names:
+        return {}
+
+    keys = {SUBREDDIT_KEY.format(name): name for name in names}
+    try:
+        cached = cache.get_many(keys)
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        cached = {}
+    metadata = {keys[key]: value for key, value in cached.items()}
+
+    missing = sorted(names - metadata.keys())
+    if missing:
+        executor = get_lookup_executor()
+        futures = {name: executor.submit(lookup_subreddit, name) for name in missing}
+        # Lookups still running are left to finish on their own
+        done, _ = wait(futures.values(), timeout=settings.SUBREDDIT_LOOKUP_TIMEOUT)
+        looked_up = {
+            name: future.result() if future in done else None for name, future in futures.items()
+        }
+        metadata.update(looked_up)
+
+        found, not_found = {}, {}
+        for name, value in looked_up.items():
+            if value is not None:
+                (found if value["exists"] else not_found)[SUBREDDIT_KEY.format(name)] = value
+        try:
+            if found:
+                cache.set_many(found, settings.SUBREDDIT_CACHE_TIMEOUT)
+            if not_found:
+                cache.set_many(not_found, settings.SUBREDDIT_NEGATIVE_CACHE_TIMEOUT)
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+    return metadata
+
+
+def subreddit_problems(name, metadata, title, selftext):
+    """`{field: message}` for what stops a text post with this title and body going up in r/`name`.
+
+    Only covers rules that hold for every account; whether a given account
+    may post there is checked when its runs are prepared.
+    """
+    if metadata is None:
+        return {}
+    if not metadata["exists"]:
+        return {"subreddit": f"r/{name} does not exist."}
+    if metadata.get("submission_type") == "link":
+        return {"subreddit": f"r/{name} only allows link posts."}
+
+    problems = {}
+    requirements = metadata.get("requirements", {})
+    title_min = requirements.get("title_text_min_length")
+    title_max = requirements.get("title_text_max_length")
+    if title_min and len(title) < title_min:
+        problems["title"] = f"r/{name} requires titles of at least {title_min} characters."
+    elif title_max and len(title) > title_max:
+        problems["title"] = f"r/{name} allows titles of at most {title_max} characters."
+
+    body = (selftext or "").strip()
+    body_min = requirements.get("body_text_min_length")
+    body_max = requirements.get("body_text_max_length")
+    policy = requirements.get("body_restriction_policy")
+    if policy == "required" and not body:
+        problems["selftext"] = f"r/{name} requires a post body."
+    elif policy == "notAllowed" and body:
+        problems["selftext"] = f"r/{name} doesn't allow a post body."
+    elif body_min and len(body) < body_min:
+        problems["selftext"] = f"r/{name} requires a post body of at least {body_min} characters."
+    elif body_max and len(body) > body_max:
+        problems["selftext"] = f"r/{name} allows a post body of at most {body_max} characters."
+    return problems
@@ -1,4 +1,7 @@
+import time
+import random
 import datetime as dt
+from collections import defaultdict
 
 import praw
 from prawcore.exceptions import (
@@ -8,113 +11,375 @@ from prawcore.exceptions import (
     BadRequest,
     Redirect,
 )
-from celery import shared_task
+from celery import group, shared_task
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Value, When
 
-from .utils import calculate_next_run
-from .models import RedditAccount, ScheduledPost, SubmittedPost
-
-NON_RETRYABLE_ERRORS = (
-    OAuthException,
-    Forbidden,
-    NotFound,
-    BadRequest,
-    Redirect,
-    praw.exceptions.InvalidURL,
-    praw.exceptions.RedditAPIException,
+from .analytics import record_attempt
+from .cache import bump_user_cache_versions
+from .clients import client_pool, ensure_authorized
+from .events import publish_post_changes, publish_post_events
+from .metrics import (
+    DISPATCH_BATCHES,
+    DISPATCH_LAG,
+    DISPATCHED_POSTS,
+    QUEUE_WAIT,
+    REDDIT_LATENCY,
+    SUBMISSION_ERRORS,
+    SUBMISSIONS,
+    timed,
 )
+from . import preflight
+from .health import check_account, check_accounts
+from .idempotency import CLAIMED, IN_FLIGHT, new_run_token, submission_guard
+from .ratelimit import ratelimit_delay, submission_limiter
+from .removals import check_removals
+from .sharding import filter_shards
+from .states import RUNNABLE_STATUSES, release_stale_runs, transition
+from .submission_queue import enqueue_submissions
+from .utils import calculate_next_run, notify_schedule_change
+from .models import RedditAccount, ScheduledPost, SubmissionAttempt, SubmittedPost
 
+REQUEST_ERRORS = (Forbidden, NotFound, BadRequest, Redirect, praw.exceptions.InvalidURL)
 
-@shared_task(ignore_result=True)
-def schedule_due_posts():
-    now = dt.datetime.now(dt.timezone.utc)
+
+def due_post_queries(now, queryset=None):
+    """The due-post query in three parts, each served by a partial index.
+
+    Active posts whose next_run has passed and pending_retry posts whose
+    next_attempt_at has, oldest first, then active posts that have no
+    next_run yet. Run as separate statements, each one walks its index in
+    order and stops at the batch size; OR'd together, Postgres has to
+    collect and sort every due row first.
+    """
+    if queryset is None:
+        queryset = ScheduledPost.objects.all()
+    return [
+        queryset.filter(status="active", next_run__lte=now).order_by("next_run"),
+        queryset.filter(status="pending_retry", next_attempt_at__lte=now).order_by(
+            "next_attempt_at"
+        ),
+        queryset.filter(status="active", next_run__isnull=True).order_by("id"),
+    ]
+
+
+def claim_due_posts(now, batch_size, post_ids=None, shards=None):
+    """Lock up to `batch_size` due posts, flip them to queued and return their runs.
+
+    Rows already locked by another dispatcher are skipped instead of waited on,
+    so several beat/worker processes can run this concurrently and each claims
+    a disjoint set of posts. Pass `post_ids` to only consider those posts, and
+    `shards` to only consider posts in those scheduler shards.
+
+    Returns `(post_id, run_token)` pairs, also stored on the posts: retries
+    keep the token of the run they retry, everything else starts a new run.
+    """
+    posts = ScheduledPost.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(id__in=post_ids)
+    if shards is not None:
+        posts = filter_shards(posts, shards)
+
+    with transaction.atomic():
+        claimed = []
+        for due_posts in due_post_queries(now, posts):
+            if len(claimed) >= batch_size:
+                break
+            claimed += due_posts.select_for_update(skip_locked=True).values_list(
+                "id", "user_id", "status", "next_run", "next_attempt_at", "run_token", named=True
+            )[: batch_size - len(claimed)]
+        runs = [(post.id, post.run_token or new_run_token()) for post in claimed]
+        if runs:
+            ScheduledPost.objects.filter(id__in=[post_id for post_id, _ in runs]).update(
+                status="queued",
+                updated_at=now,
+                run_token=Case(
+                    *(When(id=post_id, then=Value(run_token)) for post_id, run_token in runs)
+                ),
+            )
+
+    if claimed:
+        bump_user_cache_versions(post.user_id for post in claimed)
+        events_by_user = defaultdict(list)
+        for post in claimed:
+            events_by_user[post.user_id].append({"id": post.id, "status": "queued"})
+        publish_post_events(events_by_user)
+
+        claimed_at = dt.datetime.now(dt.timezone.utc)
+        DISPATCH_BATCHES.inc()
+        DISPATCHED_POSTS.inc(len(claimed))
+        for post in claimed:
+            due_at = post.next_attempt_at if post.status == "pending_retry" else post.next_run
+            if due_at is not None:
+                DISPATCH_LAG.observe((claimed_at - due_at).total_seconds())
+    return runs
+
+
+def publish_submissions(runs):
+    """Send `(post_id, run_token)` pairs to the configured submission worker."""
     try:
-        due_posts = ScheduledPost.objects.filter(
-            status__in=["active", "pending_retry"], next_run__lte=now
-        ) | ScheduledPost.objects.filter(status="active", next_run__isnull=True)
+        if settings.SUBMISSION_WORKER == "async":
+            enqueue_submissions(runs)
+        else:
+            group(
+                submit_reddit_post.s(post_id, run_token) for post_id, run_token in runs
+            ).apply_async()
+    except Exception:
+        requeue_unpublished([post_id for post_id, _ in runs])
+        raise
+
+
+def requeue_unpublished(post_ids):
+    """Hand posts a failed publish left queued back to the next scheduler tick."""
+    now = dt.datetime.now(dt.timezone.utc)
+    posts = ScheduledPost.objects.filter(id__in=post_ids, status="queued")
+    reverted = list(posts.values_list("id", "user_id"))
+    posts.update(status="pending_retry", next_attempt_at=now, updated_at=now)
+    bump_user_cache_versions(user_id for _, user_id in reverted)
+    publish_post_changes([post_id for post_id, _ in reverted])
+
+
+def dispatch_due_posts(shards=None):
+    now = dt.datetime.now(dt.timezone.utc)
+    batch_size = settings.DISPATCH_BATCH_SIZE
+    while True:
+        runs = claim_due_posts(now, batch_size, shards=shards)
+        if not runs:
+            break
+
+        publish_submissions(runs)
 
-        due_posts = due_posts.distinct()
+        if len(runs) < batch_size:
+            break
 
-        for post in due_posts:
-            post.status = "queued"
-            post.save(update_fields=["status", "updated_at"])
-            submit_reddit_post.delay(post.id)
+
+@shared_task(ignore_result=True)
+def schedule_due_posts():
+    try:
+        release_stale_runs()
+        dispatch_due_posts()
     except Exception as e:
         print(f"{e.__class__.__name__} {e}")
 
 
-@shared_task(
-    bind=True,
-    max_retries=2,
-    default_retry_delay=60,
-    autoretry_for=(Exception,),
-    retry_backoff=True,
-    retry_backoff_max=2 * 60,
-    retry_jitter=True,
-    ignore_result=True,
-)
-def submit_reddit_post(self, post_id):
+def publish_submission(post_id, run_token):
+    """Queue one post for immediate submission; returns the Celery task id, if any.
+    Like publish_submissions, a post that can't be queued is handed back to the
+    scheduler before the error is raised."""
     try:
-        post = ScheduledPost.objects.get(id=post_id)
+        if settings.SUBMISSION_WORKER == "async":
+            enqueue_submissions([(post_id, run_token)])
+            return None
+        return submit_reddit_post.delay(post_id, run_token).id
+    except Exception:
+        requeue_unpublished([post_id])
+        raise
 
-        if not post.reddit_account:
-            raise ValueError(f"RedditAccount missing for user {post.user.username}.")
 
-        if post.status not in ["active", "pending_retry", "queued"]:
-            return
+def describe_submission_error(
+    e,
+    oauth_errors=(OAuthException,),
+    request_errors=REQUEST_ERRORS,
+    api_errors=(praw.exceptions.RedditAPIException,),
+):
+    """Class (see SubmissionAttempt), user-facing message and retryability of a failed submission.
 
-        reddit = praw.Reddit(
-            client_id=settings.REDDIT_CLIENT_ID,
-            client_secret=settings.REDDIT_CLIENT_SECRET,
-            refresh_token=post.reddit_account.refresh_token,
-            user_agent=settings.REDDIT_USER_AGENT,
-        )
-        reddit.user.me().name
+    The defaults are PRAW's exceptions; the async submitter passes asyncpraw's.
+    """
+    if isinstance(e, oauth_errors):
+        return "auth", f"Reddit Authentication Error: {e}. Please re-link account.", False
+    if isinstance(e, request_errors):
+        return "request", f"Reddit API Error ({type(e).__name__}): {e}", False
+    if isinstance(e, api_errors):
+        return "api", f"Reddit API Error: {e}", False
+    return "other", f"Error: {e}", True
+
+
+def retry_delay(attempt_count):
+    """Seconds before retrying a run that has failed `attempt_count` times; exponential, full jitter."""
+    return random.uniform(
+        0,
+        min(
+            settings.SUBMISSION_RETRY_DELAY * 2 ** (attempt_count - 1),
+            settings.SUBMISSION_RETRY_DELAY_MAX,
+        ),
+    )
+
+
+def defer_submission(post, delay, run_token):
+    """Put the run back to wait `delay` seconds without counting a failed attempt."""
+    next_attempt_at = dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=delay)
+    if transition(post, "pending_retry", next_attempt_at=next_attempt_at, run_token=run_token):
+        notify_schedule_change(post.id)
 
-        post.last_run_started = dt.datetime.now(dt.timezone.utc)
-        submission = reddit.subreddit(post.subreddit).submit(
-            title=post.title, selftext=post.selftext
+
+def record_submission_failure(post, error_msg, retryable, run_token=None):
+    """Schedule a retry of the run in the database, or fail the post for good.
+
+    Retries wait for the dispatcher like any due post rather than in a
+    worker. Once SUBMISSION_MAX_ATTEMPTS attempts have failed the post goes
+    to error, where it shows up in the dead-letter list.
+    """
+    attempt_count = post.attempt_count + 1
+    if retryable and attempt_count < settings.SUBMISSION_MAX_ATTEMPTS:
+        SUBMISSIONS.labels(outcome="retried").inc()
+        next_attempt_at = dt.datetime.now(dt.timezone.utc) + dt.timedelta(
+            seconds=retry_delay(attempt_count)
         )
-        post.last_run_finished = dt.datetime.now(dt.timezone.utc)
-
-        post.last_submission_error = None
-
-        SubmittedPost.objects.create(
-            scheduled_post=post,
-            reddit_account=post.reddit_account,
-            reddit_username=post.reddit_account.reddit_username,
-            subreddit=post.subreddit,
-            title=post.title,
-            selftext=post.selftext,
-            reddit_post_id=submission.id,
-            reddit_url=f"https://www.reddit.com{submission.permalink}",
+        moved = transition(
+            post,
+            "pending_retry",
+            attempt_count=attempt_count,
+            next_attempt_at=next_attempt_at,
+            run_token=run_token,
+            last_submission_error=f"{error_msg} (will retry)",
         )
-        # update_reddit_account_status.delay(post.reddit_account.id)
+        if moved:
+            notify_schedule_change(post.id)
+        return moved
+
+    SUBMISSIONS.labels(outcome="failed").inc()
+    if retryable:
+        error_msg = f"{error_msg} (gave up after {attempt_count} attempts)"
+    return transition(
+        post,
+        "error",
+        attempt_count=attempt_count,
+        next_attempt_at=None,
+        run_token=None,
+        last_submission_error=error_msg,
+    )
+
+
+def schedule_next_run(post, **fields):
+    """Finish a run: move the post on to its next run, or to completed/error.
+
+    `fields` are written in the same conditional update, which only applies
+    if the post is still in the status it was loaded with. Returns whether it did.
+    """
+    next_run = None
+    if post.cron_schedule:
+        next_run = calculate_next_run(post.cron_schedule, post.user_timezone)
+
+    if not post.cron_schedule:
+        status = "completed"
+    elif post.end_date and next_run and next_run > post.end_date:
+        status = "completed"
+        next_run = None
+    elif next_run:
+        status = "active"
+    else:
+        status = "error"
+        fields["last_submission_error"] = "Failed to calculate next run time."
+
+    moved = transition(
+        post,
+        status,
+        next_run=next_run,
+        attempt_count=0,
+        next_attempt_at=None,
+        run_token=None,
+        **fields,
+    )
+    if moved and status == "active":
+        notify_schedule_change(post.id)
+    return moved
+
+
+def finish_submission(post, submission_id, permalink, run_token, latency=None):
+    """Record a run that reached Reddit: its attempt (when this delivery made
+    it, `latency` set), the SubmittedPost and the post's next status, all in
+    one transaction."""
+    try:
+        with transaction.atomic():
+            if latency is not None:
+                record_attempt(post, latency, run_token=run_token)
+            SubmittedPost.objects.create(
+                scheduled_post=post,
+                reddit_account=post.reddit_account,
+                reddit_username=post.reddit_account.reddit_username,
+                reddit_post_id=submission_id,
+                subreddit=post.subreddit,
+                title=post.title,
+                selftext=post.selftext,
+                reddit_url=f"https://www.reddit.com{permalink}",
+                run_token=run_token,
+            )
+            schedule_next_run(
+                post,
+                last_run_finished=dt.datetime.now(dt.timezone.utc),
+                last_submission_error=None,
+                preflight_error=None,
+            )
+    except IntegrityError:
+        # Already recorded by an earlier delivery of this run: at most finish
+        # the status update it didn't get to
+        SUBMISSIONS.labels(outcome="duplicate").inc()
+        schedule_next_run(post)
+
 
-        if post.cron_schedule:
-            next_run = calculate_next_run(post.cron_schedule, post.user_timezone)
-            if next_run is None:
-                post.status = "error"
-                post.last_submission_error = "Failed to calculate next run time."
-                post.next_run = None
-                post.save()
-                return
-
-        if not post.cron_schedule:
-            post.status = "completed"
-            post.next_run = None
-        elif post.end_date and next_run and next_run > post.end_date:
-            post.status = "completed"
-            post.next_run = None
-        elif next_run:
-            post.status = "active"
-            post.next_run = next_run
+@shared_task(ignore_result=True)
+def submit_reddit_post(post_id, run_token=None):
+    """Submit one queued post. Never retried by Celery: failed runs are put
+    back in the database as pending_retry (see record_submission_failure)."""
+    post = None
+    started = None
+    try:
+        post = ScheduledPost.objects.select_related("reddit_account").get(id=post_id)
+
+        # Stale messages: the post has been paused, finished or re-dispatched since
+        if post.status not in RUNNABLE_STATUSES or run_token != post.run_token:
+            return
+
+        QUEUE_WAIT.observe((dt.datetime.now(dt.timezone.utc) - post.updated_at).total_seconds())
+
+        wait = submission_limiter.acquire(post.reddit_account_id, post.subreddit, run_token)
+        if wait:
+            SUBMISSIONS.labels(outcome="rate_limited").inc()
+            defer_submission(post, wait, run_token)
+            return
+
+        claim = submission_guard.claim(run_token)
+        if claim == IN_FLIGHT:
+            # Another delivery of this run is talking to Reddit right now
+            SUBMISSIONS.labels(outcome="duplicate").inc()
+            return
+
+        # Paused, deleted or taken by another run since we loaded it
+        if not transition(
+            post,
+            "running",
+            run_token=run_token,
+            last_run_started=dt.datetime.now(dt.timezone.utc),
+        ):
+            submission_guard.release(run_token)
+            SUBMISSIONS.labels(outcome="skipped").inc()
+            return
+
+        if claim == CLAIMED:
+            reddit = client_pool.get(post.reddit_account)
+
+            started = time.monotonic()
+            with timed(REDDIT_LATENCY, phase="auth"):
+                ensure_authorized(reddit, post.reddit_account_id)
+            with timed(REDDIT_LATENCY, phase="submit"):
+                submission = reddit.subreddit(post.subreddit).submit(
+                    title=post.title, selftext=post.selftext
+                )
+            SUBMISSIONS.labels(outcome="submitted").inc()
+            submission_guard.record(run_token, submission.id, submission.permalink)
+            latency = time.monotonic() - started
+            # Anything failing from here on is ours, not a failed Reddit attempt
+            started = None
+            submission_id, permalink = submission.id, submission.permalink
         else:
-            post.status = "error"
-            post.last_submission_error = "Failed to calculate next run time."
-            post.next_run = None
+            # Posted by an earlier attempt that failed before recording it
+            submission_id, permalink = claim["id"], claim["permalink"]
+            latency = None
 
-        post.save()
+        finish_submission(post, submission_id, permalink, run_token, latency)
+        # update_reddit_account_status.delay(post.reddit_account.id)
 
     except ScheduledPost.DoesNotExist:
         return
@@ -122,67 +387,83 @@ def submit_reddit_post(self, post_id):
         if not post:
             return
 
-        # Handle specific error messages
+        latency = time.monotonic() - started if started is not None else None
+        submission_guard.release(run_token)
+        SUBMISSION_ERRORS.labels(exception=type(e).__name__).inc()
+
+        # Reddit asked us to slow down: try again later instead of failing the post
+        delay = ratelimit_delay(e)
+        if delay is not None:
+            if latency is not None:
+                record_attempt(post, latency, "rate_limited", str(e), run_token)
+            SUBMISSIONS.labels(outcome="rate_limited").inc()
+            defer_submission(post, delay, run_token)
+            return
+
         if isinstance(e, OAuthException):
-            error_msg = f"Reddit Authentication Error: {e}. Please re-link account."
-        elif isinstance(
-            e, (Forbidden, NotFound, BadRequest, Redirect, praw.exceptions.InvalidURL)
-        ):
-            error_msg = f"Reddit API Error ({type(e).__name__}): {e}"
-        elif isinstance(e, praw.exceptions.RedditAPIException):
-            error_msg = f"Reddit API Error: {e}"
-        else:
-            error_msg = f"Error: {e}"
+            client_pool.invalidate(post.reddit_account_id)
 
-        # Determine if we should retry
-        if isinstance(e, NON_RETRYABLE_ERRORS):
-            post.status = "error"
-            post.last_submission_error = error_msg
-            post.save(update_fields=["status", "last_submission_error", "updated_at"])
-        else:
-            post.status = "pending_retry"
-            post.last_submission_error = f"{error_msg} (will retry)"
-            post.save(update_fields=["status", "last_submission_error", "updated_at"])
-            raise self.retry(exc=e)
-
-
-@shared_task(
-    bind=True,
-    max_retries=2,
-    default_retry_delay=5 * 60,
-    autoretry_for=(Exception,),
-    retry_backoff=True,
-    retry_backoff_max=15 * 60,
-    retry_jitter=True,
-    ignore_result=True,
-)
-def update_reddit_account_status(self, reddit_account_id):
+        error_class, error_msg, retryable = describe_submission_error(e)
+        if latency is not None:
+            record_attempt(post, latency, error_class, error_msg, run_token)
+        record_submission_failure(post, error_msg, retryable, run_token)
+
+
+@shared_task(ignore_result=True)
+def update_reddit_account_status(reddit_account_id):
+    """Check one account now. Failures aren't retried here: an account left
+    unchecked is picked up by the next check_reddit_accounts run."""
     try:
         reddit_account = RedditAccount.objects.get(id=reddit_account_id)
-        reddit = praw.Reddit(
-            client_id=settings.REDDIT_CLIENT_ID,
-            client_secret=settings.REDDIT_CLIENT_SECRET,
-            refresh_token=reddit_account.refresh_token,
-            user_agent=settings.REDDIT_USER_AGENT,
+        status = check_account(reddit_account)
+    except RedditAccount.DoesNotExist:
+        return
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+        return
+
+    if status is not None:
+        reddit_account.reddit_account_status = status
+        reddit_account.last_checked_at = dt.datetime.now(dt.timezone.utc)
+        reddit_account.save(
+            update_fields=["reddit_account_status", "last_checked_at", "updated_at"]
         )
 
-        try:
-            # Any simple API call to check if the account is valid
-            reddit.user.me()
-            reddit_account.reddit_account_status = "active"
-        except praw.exceptions.PrawcoreException as e:
-            # More specific error handling can be added here
-            if "403" in str(e):
-                reddit_account.reddit_account_status = "suspended"
-            elif "404" in str(e):
-                reddit_account.reddit_account_status = "banned"
-            else:
-                # A generic error might indicate a shadow ban or other issue
-                reddit_account.reddit_account_status = "shadow_banned"
-        finally:
-            reddit_account.save(update_fields=["reddit_account_status", "updated_at"])
 
-    except RedditAccount.DoesNotExist:
-        return
+@shared_task(ignore_result=True)
+def check_reddit_accounts():
+    try:
+        checked = check_accounts()
+        if checked:
+            print(f"Checked {checked} Reddit accounts")
     except Exception as e:
-        raise self.retry(exc=e)
+        print(f"{e.__class__.__name__} {e}")
+
+
+@shared_task(ignore_result=True)
+def check_submission_removals():
+    try:
+        checked = check_removals()
+        if checked:
+            print(f"Checked {checked} submitted posts for removal")
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+
+
+@shared_task(ignore_result=True)
+def prepare_upcoming_posts():
+    try:
+        prepared = preflight.prepare_upcoming_posts()
+        if prepared:
+            print(f"Prepared {prepared} upcoming posts")
+    except Exception as e:
+        print(f"{e.__class__.__name__} {e}")
+
+
+@shared_task(ignore_result=True)
+def prune_submission_attempts():
+    """Drop attempt log entries past retention; the daily rollups are kept."""
+    cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(
+        days=settings.SUBMISSION_ATTEMPT_RETENTION_DAYS
+    )
+    SubmissionAttempt.objects.filter(attempted_at__lt=cutoff).delete()
@@ -0,0 +1,823 @@
+import io
+import json
+import time
+import uuid
+import datetime as dt
+import unittest
+import threading
+import contextlib
+from unittest import mock
+
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import subreddits, tasks
+from .analytics import record_attempt
+from .api.exports import export_rows
+from .api.serializers import SubmittedPostSerializer
+from .benchmark import FakeSubreddit, NullRedis, isolated_environment
+from .cache import bump_user_cache_versions, get_user_cache_version
+from .idempotency import CLAIMED, new_run_token, submission_guard
+from .models import DailySubmissionStats, RedditAccount, ScheduledPost, SubmittedPost
+from .ratelimit import SubmissionRateLimiter
+from .sharding import shard_of
+
+User = get_user_model()
+
+
+class IsolatedTestCase(TestCase):
+    """Runs against the benchmark's in-process fakes: no Reddit, Redis or shared cache."""
+
+    def setUp(self):
+        self.enterContext(isolated_environment(0))
+
+@override_settings(
+    REDDIT_ACCOUNT_POST_BURST=1,
+    REDDIT_ACCOUNT_POST_INTERVAL=10,
+    REDDIT_SUBREDDIT_POST_INTERVAL=0,
+)
+class SubmissionRateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "reddit.ratelimit.get_redis_client", return_value=fakeredis.FakeRedis()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = SubmissionRateLimiter()
+
+    def test_blocked_runs_get_distinct_slots(self):
+        waits = [self.limiter.acquire(1, "python", f"run-{i}") for i in range(4)]
+
+        self.assertEqual(waits[0], 0)
+        self.assertEqual(waits[1:], [10, 20, 30])
+
+    def test_run_keeps_its_reserved_slot(self):
+        self.limiter.acquire(1, "python", "first")
+        self.assertEqual(self.limiter.acquire(1, "python", "second"), 10)
+
+        # Asking again before the slot doesn't take another one
+        self.assertEqual(self.limiter.acquire(1, "python", "second"), 10)
+        self.assertEqual(self.limiter.acquire(1, "python", "third"), 20)
+
+    def test_without_run_token_nothing_is_reserved(self):
+        self.limiter.acquire(1, "python")
+        self.assertEqual(self.limiter.acquire(1, "python"), 10)
+        self.assertEqual(self.limiter.acquire(1, "python"), 10)
+
+    def test_accounts_are_limited_separately(self):
+        self.assertEqual(self.limiter.acquire(1, "python", "a"), 0)
+        self.assertEqual(self.limiter.acquire(2, "python", "b"), 0)
+
+
+class ListQueryCountTests(IsolatedTestCase):
+    """A page of any size is served in the same number of queries."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="lister")
+        self.account = RedditAccount.objects.create(
+            user=self.user, reddit_username="lister", refresh_token="token"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_posts(self, count):
+        posts = ScheduledPost.objects.bulk_create(
+            ScheduledPost(
+                user=self.user,
+                reddit_account=self.account,
+                subreddit="python",
+                title=f"Post {n}",
+                selftext="Body",
+                cron_schedule="0 9 * * *",
+            )
+            for n in range(count)
+        )
+        SubmittedPost.objects.bulk_create(
+            SubmittedPost(
+                scheduled_post=post,
+                reddit_account=self.account,
+                subreddit=post.subreddit,
+                title=post.title,
+                reddit_post_id=uuid.uuid4().hex[:12],
+            )
+            for post in posts
+        )
+        return posts
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_posts(1)
+        expected = self.count_queries(url)
+
+        self.add_posts(30)
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 31)
+
+    def test_post_list(self):
+        self.assert_constant_queries("/api/reddit/posts/")
+
+    def test_post_list_without_selftext(self):
+        self.assert_constant_queries("/api/reddit/posts/?fields=-selftext")
+
+    def test_submission_list(self):
+        self.assert_constant_queries("/api/reddit/submissions/")
+
+    def test_post_submission_list(self):
+        post = self.add_posts(1)[0]
+        url = f"/api/reddit/posts/{post.id}/submissions/"
+        expected = self.count_queries(url)
+
+        SubmittedPost.objects.bulk_create(
+            SubmittedPost(
+                scheduled_post=post,
+                reddit_account=self.account,
+                subreddit=post.subreddit,
+                title=post.title,
+                reddit_post_id=uuid.uuid4().hex[:12],
+            )
+            for _ in range(30)
+        )
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 31)
+
+
+class DashboardTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="dashboard")
+        self.account = RedditAccount.objects.create(
+            user=self.user, reddit_username="dashboard", refresh_token="token"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_post(self, **fields):
+        return ScheduledPost.objects.create(
+            user=self.user,
+            reddit_account=self.account,
+            subreddit="python",
+            title="Post",
+            selftext="Body",
+            cron_schedule="0 9 * * *",
+            **fields,
+        )
+
+    def test_upcoming_runs_use_retry_time(self):
+        now = dt.datetime.now(dt.timezone.utc)
+        active = self.create_post(next_run=now + dt.timedelta(hours=1))
+        retrying = self.create_post(
+            status="pending_retry",
+            next_run=now + dt.timedelta(days=1),
+            next_attempt_at=now + dt.timedelta(minutes=5),
+        )
+
+        runs = self.client.get("/api/reddit/dashboard/").data["upcoming_runs"]
+
+        self.assertEqual([run["id"] for run in runs], [retrying.id, active.id])
+        self.assertEqual(runs[0]["status"], "pending_retry")
+        self.assertEqual(runs[0]["next_run"], retrying.next_attempt_at.isoformat())
+
+    def test_recent_submissions_count_failed_attempts(self):
+        post = self.create_post(next_run=dt.datetime.now(dt.timezone.utc))
+        record_attempt(post, 0.1, "api", "SUBMIT_VALIDATION")
+        record_attempt(post, 0.1, "request", "Bad request")
+        record_attempt(post, 0.1, "rate_limited", "RATELIMIT")
+        record_attempt(post, 0.1)
+
+        submissions = self.client.get("/api/reddit/dashboard/").data["recent_submissions"]
+
+        self.assertEqual(submissions["succeeded"], 1)
+        self.assertEqual(submissions["failed"], 2)
+        self.assertEqual(submissions["rate_limited"], 1)
+
+
+class RecordAttemptTests(IsolatedTestCase):
+    def test_attempts_are_rolled_up_in_one_statement_each(self):
+        user = User.objects.create(username="stats")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="stats", refresh_token="token"
+        )
+        post = ScheduledPost.objects.create(
+            user=user, reddit_account=account, subreddit="Python", title="Post"
+        )
+
+        for error_class in (None, "api", None):
+            # The attempt's INSERT and the rollup's upsert
+            with self.assertNumQueries(2):
+                record_attempt(post, 0.25, error_class)
+
+        stats = DailySubmissionStats.objects.get()
+        self.assertEqual(stats.subreddit, "python")
+        self.assertEqual(
+            (stats.attempts, stats.successes, stats.api_failures, stats.total_latency_ms),
+            (3, 2, 1, 750),
+        )
+
+
+class BulkActionTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="bulk")
+        self.account = RedditAccount.objects.create(
+            user=self.user, reddit_username="bulk", refresh_token="token"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_posts(self, count, user=None, account=None):
+        return ScheduledPost.objects.bulk_create(
+            ScheduledPost(
+                user=user or self.user,
+                reddit_account=account or self.account,
+                subreddit="python",
+                title=f"Post {n}",
+                selftext="Body",
+                cron_schedule="0 9 * * *",
+            )
+            for n in range(count)
+        )
+
+    def bulk_action(self, action, **filters):
+        return self.client.post(
+            "/api/reddit/posts/bulk-action/", {"action": action, **filters}, format="json"
+        )
+
+    def test_delete_publishes_one_event(self):
+        posts = self.create_posts(3)
+        submission = SubmittedPost.objects.create(
+            scheduled_post=posts[0],
+            reddit_account=self.account,
+            subreddit="python",
+            title="Post 0",
+            reddit_post_id="abc",
+        )
+
+        with (
+            mock.patch.object(NullRedis, "publish") as publish,
+            mock.patch("reddit.cache.cache.set_many") as bump,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.bulk_action("delete", ids=[post.id for post in posts])
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(ScheduledPost.objects.exists())
+        events = [
+            json.loads(message)["posts"]
+            for channel, message in (call.args for call in publish.call_args_list)
+            if channel.startswith("post-events:")
+        ]
+        self.assertEqual(len(events), 1)
+        self.assertCountEqual(events[0], [{"id": post.id, "deleted": True} for post in posts])
+        bump.assert_called_once()
+        # The submission history outlives the post
+        submission.refresh_from_db()
+        self.assertIsNone(submission.scheduled_post_id)
+
+    def create_other_users_posts(self, count):
+        user = User.objects.create(username="other")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="other", refresh_token="token"
+        )
+        return self.create_posts(count, user, account)
+
+    def test_actions_only_touch_the_callers_posts(self):
+        own = self.create_posts(2)
+        other = self.create_other_users_posts(2)
+        ids = [post.id for post in own + other]
+
+        for action, status in [("pause", "paused"), ("resume", "active")]:
+            with self.subTest(action=action):
+                response = self.bulk_action(action, ids=ids)
+
+                self.assertEqual(response.data["count"], 2)
+                statuses = ScheduledPost.objects.values_list("status", flat=True)
+                self.assertEqual(set(statuses.filter(user=self.user)), {status})
+                self.assertEqual(set(statuses.exclude(user=self.user)), {"active"})
+
+        response = self.bulk_action("delete", ids=ids)
+
+        self.assertEqual(response.data["count"], 2)
+        self.assertCountEqual(
+            ScheduledPost.objects.values_list("id", flat=True), [post.id for post in other]
+        )
+
+
+model_calls = []
+
+
+async def stub_text_to_cron(schedule_text):
+    model_calls.append(schedule_text)
+    return "0 9 1 1 *" if "new year" in schedule_text.lower() else "not a cron"
+
+
+@override_settings(TEXT_TO_CRON_MODEL="reddit.tests.stub_text_to_cron")
+class TextToCronTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        model_calls.clear()
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="cron"))
+
+    def convert(self, schedule_text):
+        return self.client.post(
+            "/api/reddit/convert-cron/", {"schedule_text": schedule_text}, format="json"
+        )
+
+    def test_common_phrases_skip_the_model(self):
+        response = self.convert("Every Monday at 9am")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["cron_schedule"], "0 9 * * 1")
+        self.assertEqual(model_calls, [])
+
+    def test_model_answers_are_cached(self):
+        for schedule_text in ("On New Year's morning", "on new year's morning!"):
+            response = self.convert(schedule_text)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["cron_schedule"], "0 9 1 1 *")
+
+        self.assertEqual(model_calls, ["On New Year's morning"])
+
+    def test_invalid_model_answer(self):
+        response = self.convert("whenever it feels right")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("cron_schedule", response.data)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.convert("every day").status_code, 401)
+
+    def test_endpoint_is_in_the_schema(self):
+        from drf_spectacular.generators import SchemaGenerator
+
+        # Other views' schema warnings aren't this test's business
+        with contextlib.redirect_stderr(io.StringIO()):
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+
+        self.assertIn("/api/reddit/convert-cron/", schema["paths"])
+
+
+@unittest.skipUnless(
+    connection.vendor in ("postgresql", "sqlite"), "needs partial index support"
+)
+class DueQueryPlanTests(IsolatedTestCase):
+    """The dispatcher's claim statements walk the partial indexes meant for them."""
+
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(username="planner")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="planner", refresh_token="token"
+        )
+        self.now = dt.datetime.now(dt.timezone.utc)
+        statuses = ["active"] * 6 + ["paused", "completed", "error", "pending_retry"]
+        # A few due rows among many that aren't, as in production
+        ScheduledPost.objects.bulk_create(
+            (
+                ScheduledPost(
+                    user=user,
+                    reddit_account=account,
+                    subreddit="python",
+                    title="Post",
+                    selftext="Body",
+                    status=statuses[n % len(statuses)],
+                    next_run=self.now + dt.timedelta(minutes=n - 50),
+                    next_attempt_at=(
+                        self.now + dt.timedelta(minutes=n - 50)
+                        if statuses[n % len(statuses)] == "pending_retry"
+                        else None
+                    ),
+                )
+                for n in range(5000)
+            ),
+            batch_size=1000,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(ScheduledPost._meta.db_table)}")
+
+    def test_due_queries_use_partial_indexes(self):
+        plans = [
+            query.values_list("id", "user_id", "next_run", "next_attempt_at")[:500].explain()
+            for query in tasks.due_post_queries(self.now)
+        ]
+
+        self.assertIn("scheduledpost_due_idx", plans[0])
+        self.assertIn("scheduledpost_retry_idx", plans[1])
+        self.assertIn("scheduledpost_due_idx", plans[2])
+
+
+class UserCacheVersionTests(IsolatedTestCase):
+    def test_bump_waits_for_commit(self):
+        version = get_user_cache_version(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                bump_user_cache_versions([1])
+                self.assertEqual(get_user_cache_version(1), version)
+
+        self.assertNotEqual(get_user_cache_version(1), version)
+
+    def test_rolled_back_changes_keep_the_version(self):
+        version = get_user_cache_version(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                bump_user_cache_versions([1])
+                raise RuntimeError
+
+        self.assertEqual(get_user_cache_version(1), version)
+
+
+    def test_writes_succeed_while_the_cache_is_down(self):
+        user = User.objects.create(username="offline")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="offline", refresh_token="token"
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        post = ScheduledPost.objects.create(
+            user=user, reddit_account=account, subreddit="python", title="Post"
+        )
+
+        with (
+            mock.patch.object(cache, "get", side_effect=ConnectionError),
+            mock.patch.object(cache, "set_many", side_effect=ConnectionError),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.assertIsNone(get_user_cache_version(user.id))
+            posts = client.get("/api/reddit/posts/")
+            dashboard = client.get("/api/reddit/dashboard/")
+            response = client.post(
+                "/api/reddit/posts/bulk-action/", {"action": "pause", "ids": [post.id]}, format="json"
+            )
+
+        self.assertEqual(len(posts.data["results"]), 1)
+        self.assertNotIn("ETag", posts)
+        self.assertEqual(dashboard.data["posts"]["total"], 1)
+        self.assertEqual(response.data["count"], 1)
+
+
+class ExportTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="exporter")
+        account = RedditAccount.objects.create(
+            user=self.user, reddit_username="exporter", refresh_token="token"
+        )
+        SubmittedPost.objects.bulk_create(
+            SubmittedPost(
+                reddit_account=account,
+                subreddit="python",
+                title=f"Post {n}",
+                reddit_post_id=f"abc{n}",
+            )
+            for n in range(5)
+        )
+
+    def export(self, output):
+        async def collect():
+            queryset = SubmittedPost.objects.order_by("id")
+            return [chunk async for chunk in export_rows(queryset, ["title"], output)]
+
+        return async_to_sync(collect)()
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_rows_are_streamed_in_chunks(self):
+        chunks = self.export("csv")
+
+        self.assertEqual(chunks[0], "title\r\n")
+        self.assertEqual(chunks[1:], ["Post 0\r\nPost 1\r\n", "Post 2\r\nPost 3\r\n", "Post 4\r\n"])
+
+    def test_ndjson(self):
+        lines = "".join(self.export("ndjson")).splitlines()
+
+        self.assertEqual(json.loads(lines[0]), {"title": "Post 0"})
+        self.assertEqual(len(lines), 5)
+
+    def test_field_selection_is_validated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        url = "/api/reddit/submissions/export/"
+        every_field_dropped = ",".join(f"-{name}" for name in SubmittedPostSerializer.Meta.fields)
+
+        for fields in ("bogus", "title,run_token", every_field_dropped):
+            with self.subTest(fields=fields):
+                response = client.get(url, {"fields": fields})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("fields", response.data)
+
+        response = client.get(url, {"fields": "title,subreddit"})
+        self.assertEqual(response.status_code, 200)
+
+        async def read():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(async_to_sync(read)(), b"subreddit,title\r\n")
+
+
+class SubmissionTests(IsolatedTestCase):
+    """A run reaches Reddit at most once, however often its message is delivered."""
+
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        self.enterContext(
+            mock.patch("reddit.idempotency.get_redis_client", return_value=self.redis)
+        )
+        self.submit = self.enterContext(
+            mock.patch.object(FakeSubreddit, "submit", autospec=True, wraps=FakeSubreddit.submit)
+        )
+
+        user = User.objects.create(username="submitter")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="submitter", refresh_token="token"
+        )
+        self.post = ScheduledPost.objects.create(
+            user=user,
+            reddit_account=account,
+            subreddit="python",
+            title="Post",
+            selftext="Body",
+            cron_schedule="0 9 * * *",
+            status="queued",
+            run_token=new_run_token(),
+        )
+
+    def test_run_is_submitted_once(self):
+        tasks.submit_reddit_post(self.post.id, self.post.run_token)
+
+        self.submit.assert_called_once()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "active")
+        self.assertEqual(SubmittedPost.objects.filter(run_token__isnull=False).count(), 1)
+
+    def test_run_is_recorded_in_one_transaction(self):
+        # Load and claim the post, then one transaction: the attempt, its
+        # rollup, the submission and the post's next status
+        with self.assertNumQueries(8), CaptureQueriesContext(connection) as queries:
+            tasks.submit_reddit_post(self.post.id, self.post.run_token)
+
+        self.assertTrue(queries[2]["sql"].startswith("SAVEPOINT"))
+        self.assertTrue(queries[-1]["sql"].startswith("RELEASE SAVEPOINT"))
+
+    def test_post_now_that_cannot_be_queued_is_handed_back(self):
+        ScheduledPost.objects.filter(id=self.post.id).update(status="active", run_token=None)
+        client = APIClient()
+        client.force_authenticate(self.post.user)
+
+        with mock.patch.object(
+            tasks.submit_reddit_post, "delay", side_effect=ConnectionError("broker down")
+        ):
+            response = client.post(f"/api/reddit/posts/{self.post.id}/post-now/")
+
+        self.assertEqual(response.status_code, 503)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "pending_retry")
+        self.assertIsNotNone(self.post.next_attempt_at)
+
+    def test_message_with_a_stale_run_token_is_a_no_op(self):
+        tasks.submit_reddit_post(self.post.id, new_run_token())
+
+        self.submit.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "queued")
+        self.assertFalse(SubmittedPost.objects.exists())
+
+    def test_redelivered_message_after_the_run_finished_is_a_no_op(self):
+        run_token = self.post.run_token
+        tasks.submit_reddit_post(self.post.id, run_token)
+        tasks.submit_reddit_post(self.post.id, run_token)
+
+        self.submit.assert_called_once()
+        self.assertEqual(SubmittedPost.objects.count(), 1)
+
+    def test_failed_compare_and_set_does_not_submit(self):
+        def pause_meanwhile(*args):
+            # The user pauses the post after the worker loaded it
+            ScheduledPost.objects.filter(id=self.post.id).update(status="paused")
+            return 0
+
+        with mock.patch.object(tasks.submission_limiter, "acquire", side_effect=pause_meanwhile):
+            tasks.submit_reddit_post(self.post.id, self.post.run_token)
+
+        self.submit.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "paused")
+        # The claim is dropped, so a later run of this token may still post
+        self.assertEqual(submission_guard.claim(self.post.run_token), CLAIMED)
+
+    def test_delivery_while_another_is_in_flight_backs_off(self):
+        submission_guard.claim(self.post.run_token)
+
+        tasks.submit_reddit_post(self.post.id, self.post.run_token)
+
+        self.submit.assert_not_called()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "queued")
+
+    def test_retry_reuses_a_submission_that_was_never_recorded(self):
+        # A worker posted, recorded the submission in Redis and died
+        submission_guard.claim(self.post.run_token)
+        submission_guard.record(self.post.run_token, "abc123", "/r/python/comments/abc123/")
+
+        tasks.submit_reddit_post(self.post.id, self.post.run_token)
+
+        self.submit.assert_not_called()
+        submission = SubmittedPost.objects.get()
+        self.assertEqual(submission.reddit_post_id, "abc123")
+        self.assertEqual(submission.run_token, self.post.run_token)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "active")
+
+
+class ClaimDuePostsTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(username="claimer")
+        account = RedditAccount.objects.create(
+            user=user, reddit_username="claimer", refresh_token="token"
+        )
+        self.now = dt.datetime.now(dt.timezone.utc)
+
+        def create_post(status, **fields):
+            return ScheduledPost.objects.create(
+                user=user,
+                reddit_account=account,
+                subreddit="python",
+                title="Post",
+                selftext="Body",
+                cron_schedule="0 9 * * *",
+                status=status,
+                **fields,
+            )
+
+        self.due = [
+            create_post("active", next_run=self.now - dt.timedelta(minutes=n)) for n in range(4)
+        ]
+        self.retry_token = new_run_token()
+        self.retrying = create_post(
+            "pending_retry",
+            next_run=self.now + dt.timedelta(days=1),
+            next_attempt_at=self.now - dt.timedelta(minutes=1),
+            run_token=self.retry_token,
+        )
+        create_post("active", next_run=self.now + dt.timedelta(hours=1))
+        create_post("paused", next_run=self.now - dt.timedelta(hours=1))
+
+    def test_due_posts_are_claimed_once(self):
+        runs = dict(tasks.claim_due_posts(self.now, 100))
+
+        self.assertCountEqual(runs, [post.id for post in self.due] + [self.retrying.id])
+        # Retries keep their run's token, so they can't post twice
+        self.assertEqual(runs[self.retrying.id], self.retry_token)
+        self.assertEqual(
+            set(ScheduledPost.objects.filter(id__in=runs).values_list("status", flat=True)),
+            {"queued"},
+        )
+        self.assertEqual(tasks.claim_due_posts(self.now, 100), [])
+
+    def test_batch_size_is_respected(self):
+        self.assertEqual(len(tasks.claim_due_posts(self.now, 2)), 2)
+        self.assertEqual(len(tasks.claim_due_posts(self.now, 100)), 3)
+
+    def test_only_the_given_shards_are_claimed(self):
+        due_ids = [post.id for post in self.due] + [self.retrying.id]
+        shards = {shard_of(self.due[0].id, 2)}
+
+        with override_settings(SCHEDULER_SHARDS=2):
+            runs = dict(tasks.claim_due_posts(self.now, 100, shards=shards))
+
+        self.assertCountEqual(
+            runs, [post_id for post_id in due_ids if shard_of(post_id, 2) in shards]
+        )
+
+
+class StaleRunTests(IsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="stale")
+        self.account = RedditAccount.objects.create(
+            user=self.user, reddit_username="stale", refresh_token="token"
+        )
+        self.now = dt.datetime.now(dt.timezone.utc)
+
+    def create_post(self, status, age, **fields):
+        post = ScheduledPost.objects.create(
+            user=self.user,
+            reddit_account=self.account,
+            subreddit="python",
+            title="Post",
+            selftext="Body",
+            cron_schedule="0 9 * * *",
+            next_run=self.now - age,
+            status=status,
+            run_token=uuid.uuid4().hex,
+            **fields,
+        )
+        # updated_at is auto_now; backdate it as if the post had been waiting
+        ScheduledPost.objects.filter(id=post.id).update(updated_at=self.now - age)
+        return post
+
+    def dispatch(self):
+        published = []
+        with mock.patch.object(tasks, "publish_submissions", side_effect=published.extend):
+            tasks.schedule_due_posts()
+        return published
+
+    def test_post_queued_behind_a_backlog_is_left_alone(self):
+        post = self.create_post("queued", dt.timedelta(hours=1))
+
+        self.assertEqual(self.dispatch(), [])
+        post.refresh_from_db()
+        self.assertEqual(post.status, "queued")
+
+    def test_post_queued_past_the_queue_timeout_is_retried(self):
+        age = dt.timedelta(seconds=settings.SUBMISSION_QUEUE_TIMEOUT + 60)
+        post = self.create_post("queued", age)
+
+        self.assertEqual(self.dispatch(), [(post.id, post.run_token)])
+
+    def test_abandoned_running_post_is_retried(self):
+        age = dt.timedelta(seconds=settings.SUBMISSION_CLAIM_TIMEOUT + 60)
+        post = self.create_post("running", age, last_run_started=self.now - age)
+
+        self.assertEqual(self.dispatch(), [(post.id, post.run_token)])
+        post.refresh_from_db()
+        self.assertEqual(post.attempt_count, 1)
+
+    def test_post_abandoned_on_its_last_attempt_goes_to_error(self):
+        age = dt.timedelta(seconds=settings.SUBMISSION_CLAIM_TIMEOUT + 60)
+        post = self.create_post(
+            "running",
+            age,
+            last_run_started=self.now - age,
+            attempt_count=settings.SUBMISSION_MAX_ATTEMPTS - 1,
+        )
+
+        self.assertEqual(self.dispatch(), [])
+        post.refresh_from_db()
+        self.assertEqual(post.status, "error")
+        self.assertEqual(post.attempt_count, settings.SUBMISSION_MAX_ATTEMPTS)
+        self.assertIsNone(post.run_token)
+        self.assertIsNone(post.next_attempt_at)
+        self.assertIn("gave up", post.last_submission_error)
+
+
+class SubredditMetadataTests(SimpleTestCase):
+    @override_settings(SUBREDDIT_LOOKUP_TIMEOUT=0.1)
+    def test_slow_lookups_are_skipped(self):
+        def slow_lookup(name):
+            time.sleep(1)
+            return {"exists": True, "name": name}
+
+        with (
+            isolated_environment(0),
+            mock.patch("reddit.subreddits.lookup_subreddit", side_effect=slow_lookup),
+        ):
+            started = time.monotonic()
+            metadata = subreddits.get_subreddit_metadata(["python"])
+
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertEqual(metadata, {"python": None})
+            self.assertIsNone(cache.get(subreddits.SUBREDDIT_KEY.format("python")))
+
+    def test_each_thread_gets_its_own_reader(self):
+        readers = {}
+
+        def get_readers(index):
+            readers[index] = (subreddits.get_reader(), subreddits.get_reader())
+
+        with mock.patch(
+            "reddit.subreddits.get_reddit_instance", side_effect=lambda **_: mock.Mock()
+        ):
+            threads = [threading.Thread(target=get_readers, args=(i,)) for i in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertIs(readers[0][0], readers[0][1])
+        self.assertIs(readers[1][0], readers[1][1])
+        self.assertIsNot(readers[0][0], readers[1][0])
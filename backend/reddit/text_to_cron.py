@@ -0,0 +1,177 @@
+import os
+import re
+import hashlib
+from functools import cache as memoize
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from .utils import calculate_next_run
+
+INVALID = "INVALID"
+
+WEEKDAYS = {
+    "sunday": 0,
+    "monday": 1,
+    "tuesday": 2,
+    "wednesday": 3,
+    "thursday": 4,
+    "friday": 5,
+    "saturday": 6,
+}
+WEEKDAY_RE = "|".join(WEEKDAYS)
+TIME_RE = r"(?:at\s+)?(?P<time>noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm)?)"
+
+PROMPT = """Convert the following cron schedule description into a standard cron expression (minute hour day month weekday format).
+
+Cron schedule description: "{schedule_text}"
+
+Requirements:
+- Return ONLY the cron expression, no explanation
+- Use standard 5-field cron format (minute hour day month weekday)
+- Use * for any field
+- Use 0-6 for weekday (0=Sunday, 1=Monday, etc.)
+- Return INVALID if it can't be converted to a proper cron schedule
+- Examples:
+  - "Every Monday at 9 AM" -> "0 9 * * 1"
+  - "Daily at 3 PM" -> "0 15 * * *"
+  - "Every weekday at 8:30 AM" -> "30 8 * * 1-5"
+  - "invalid text" -> "INVALID"
+
+Return only the cron expression:"""
+
+
+def normalize_schedule_text(schedule_text):
+    text = schedule_text.lower().replace(".", "").replace(",", " ")
+    return re.sub(r"\s+", " ", text).strip(" !?")
+
+
+def parse_time(value):
+    """Turn '9am', '9:30 pm', '15:00', 'noon' into (minute, hour), or None."""
+    if value is None or value == "midnight":
+        return 0, 0
+    if value == "noon":
+        return 0, 12
+
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", value)
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif match.group(2) is None:
+        # A bare number like "every monday at 9" is too ambiguous
+        return None
+    if hour > 23 or minute > 59:
+        return None
+    return minute, hour
+
+
+def parse_schedule_text(text):
+    """Deterministic conversion of common phrasings; returns None when unsure."""
+    text = normalize_schedule_text(text)
+    text = re.sub(r"^(every|each) ", "every ", text)
+
+    if text in ("every minute", "minutely"):
+        return "* * * * *"
+    if text in ("every hour", "hourly"):
+        return "0 * * * *"
+
+    match = re.fullmatch(r"every (\d{1,2}) (minute|hour)s?", text)
+    if match:
+        interval, unit = int(match.group(1)), match.group(2)
+        if unit == "minute" and 1 <= interval <= 59:
+            return f"*/{interval} * * * *"
+        if unit == "hour" and 1 <= interval <= 23:
+            return f"0 */{interval} * * *"
+        return None
+
+    patterns = [
+        (rf"(?:every day|daily|everyday)(?: {TIME_RE})?", "*", "*"),
+        (rf"every weekday(?: {TIME_RE})?", "*", "1-5"),
+        (rf"every weekend(?: day)?(?: {TIME_RE})?", "*", "0,6"),
+        (
+            rf"every (?P<days>(?:{WEEKDAY_RE})(?:(?: and |, | )(?:{WEEKDAY_RE}))*)(?: {TIME_RE})?",
+            "*",
+            None,
+        ),
+        (
+            rf"(?:every month|monthly) on the (?P<dom>\d{{1,2}})(?:st|nd|rd|th)?(?: {TIME_RE})?",
+            None,
+            "*",
+        ),
+    ]
+    for pattern, day_of_month, day_of_week in patterns:
+        match = re.fullmatch(pattern, text)
+        if not match:
+            continue
+
+        parsed = parse_time(match.group("time"))
+        if parsed is None:
+            return None
+        minute, hour = parsed
+
+        if day_of_week is None:
+            days = re.findall(WEEKDAY_RE, match.group("days"))
+            day_of_week = ",".join(str(d) for d in sorted({WEEKDAYS[day] for day in days}))
+        if day_of_month is None:
+            day_of_month = match.group("dom")
+            if not 1 <= int(day_of_month) <= 31:
+                return None
+        return f"{minute} {hour} {day_of_month} * {day_of_week}"
+
+    return None
+
+
+@memoize
+def get_genai_client():
+    from google import genai
+
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+
+
+async def gemini_text_to_cron(schedule_text):
+    """Ask Gemini for a cron expression without blocking the event loop."""
+    from google.genai import types
+
+    response = await get_genai_client().aio.models.generate_content(
+        model="gemini-2.5-flash-lite",
+        contents=types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=PROMPT.format(schedule_text=schedule_text))],
+        ),
+        config=types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(
+                thinking_budget=0,
+            ),
+        ),
+    )
+    return response.candidates[0].content.parts[0].text.strip()
+
+
+def is_valid_cron(cron_schedule):
+    return len(cron_schedule.split()) == 5 and calculate_next_run(cron_schedule, "UTC") is not None
+
+
+async def convert_text_to_cron(schedule_text):
+    """Cron expression for a schedule description, or None if it can't be converted.
+
+    Common phrasings are parsed by rules; everything else goes to the model
+    once per normalized text and the answer, valid or not, is cached.
+    """
+    cron_schedule = parse_schedule_text(schedule_text)
+    if cron_schedule:
+        return cron_schedule
+
+    normalized = normalize_schedule_text(schedule_text)
+    cache_key = f"text-to-cron:{hashlib.sha256(normalized.encode()).hexdigest()}"
+    cron_schedule = await cache.aget(cache_key)
+    if cron_schedule is None:
+        model = import_string(settings.TEXT_TO_CRON_MODEL)
+        cron_schedule = await model(schedule_text)
+        if not is_valid_cron(cron_schedule):
+            cron_schedule = INVALID
+        await cache.aset(cache_key, cron_schedule, settings.TEXT_TO_CRON_CACHE_TIMEOUT)
+
+    return None if cron_schedule == INVALID else cron_schedule
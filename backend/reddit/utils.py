@@ -1,21 +1,92 @@
+import json
 import zoneinfo
+import threading
 import datetime as dt
+from functools import cache, lru_cache
 
+import redis
 from croniter import croniter, CroniterError
+from django.conf import settings
+from django.db import transaction
 
+from .metrics import CRON_CACHE_LOOKUPS
 
-def calculate_next_run(cron_schedule_str: str, user_timezone: str = "UTC") -> dt.datetime:
+
+class CompiledSchedule:
+    """A parsed cron expression bound to its timezone, safe to share between threads."""
+
+    def __init__(self, cron_schedule_str: str, user_timezone: str = "UTC"):
+        self.tz = zoneinfo.ZoneInfo(user_timezone)
+        self._cron = croniter(cron_schedule_str, dt.datetime.now(self.tz))
+        self._lock = threading.Lock()
+
+    def next_run(self, now: dt.datetime = None) -> dt.datetime:
+        now = (now or dt.datetime.now(dt.timezone.utc)).astimezone(self.tz)
+        # croniter keeps its position on the instance, so calls are serialized
+        with self._lock:
+            next_run = self._cron.get_next(dt.datetime, start_time=now)
+        return next_run.astimezone(dt.timezone.utc)
+
+
+@lru_cache(maxsize=settings.CRON_SCHEDULE_CACHE_SIZE)
+def compile_schedule(cron_schedule_str: str, user_timezone: str = "UTC") -> CompiledSchedule:
+    """Parse a cron expression once per process; `compile_schedule.cache_info()` has hit/miss counts."""
+    return CompiledSchedule(cron_schedule_str, user_timezone)
+
+
+def calculate_next_run(
+    cron_schedule_str: str, user_timezone: str = "UTC", now: dt.datetime = None
+) -> dt.datetime:
     if not cron_schedule_str:
         return None
 
     try:
-        tz = zoneinfo.ZoneInfo(user_timezone)
-        now = dt.datetime.now(tz)
-
-        cron = croniter(cron_schedule_str, now)
-        next_run = cron.get_next(dt.datetime)
-        next_run_utc = next_run.astimezone(dt.timezone.utc)
-        return next_run_utc
+        misses = compile_schedule.cache_info().misses
+        schedule = compile_schedule(cron_schedule_str, user_timezone)
+        hit = compile_schedule.cache_info().misses == misses
+        CRON_CACHE_LOOKUPS.labels(result="hit" if hit else "miss").inc()
+        return schedule.next_run(now)
     except (CroniterError, ValueError, Exception) as e:
         print(f"Error calculating next run time for '{cron_schedule_str}': {e}")
         return None
+
+
+def calculate_next_runs(schedules, now: dt.datetime = None) -> dict:
+    """Map each distinct (cron_schedule, user_timezone) pair to its next run.
+
+    Every pair is evaluated once against the same `now`, however many posts
+    share it, so bulk callers pay the cron cost per expression rather than per row.
+    """
+    now = now or dt.datetime.now(dt.timezone.utc)
+    next_runs = {}
+    for cron_schedule_str, user_timezone in schedules:
+        key = (cron_schedule_str, user_timezone)
+        if key not in next_runs:
+            next_runs[key] = calculate_next_run(cron_schedule_str, user_timezone, now)
+    return next_runs
+
+
+@cache
+def get_redis_client() -> redis.Redis:
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def notify_schedule_changes(post_ids):
+    """Tell running schedulers that these posts' schedules were created, changed or removed."""
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+
+    def publish():
+        try:
+            get_redis_client().publish(
+                settings.SCHEDULER_CHANNEL, json.dumps({"ids": post_ids})
+            )
+        except Exception as e:
+            print(f"{e.__class__.__name__} {e}")
+
+    transaction.on_commit(publish)
+
+
+def notify_schedule_change(post_id):
+    notify_schedule_changes([post_id])
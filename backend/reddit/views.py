@@ -1,33 +1,16 @@
 import uuid
 
-import praw
 from django.conf import settings
 from django.http import HttpRequest, JsonResponse
 from django.shortcuts import redirect
 from django.contrib.auth import get_user_model
 
+from .clients import get_reddit_instance
 from .models import RedditAccount
 
 User = get_user_model()
 
 
-def get_reddit_instance(refresh_token=None):
-    if refresh_token:
-        return praw.Reddit(
-            client_id=settings.REDDIT_CLIENT_ID,
-            client_secret=settings.REDDIT_CLIENT_SECRET,
-            refresh_token=refresh_token,
-            user_agent=settings.REDDIT_USER_AGENT,
-        )
-    else:
-        return praw.Reddit(
-            client_id=settings.REDDIT_CLIENT_ID,
-            client_secret=settings.REDDIT_CLIENT_SECRET,
-            redirect_uri=settings.REDDIT_REDIRECT_URI,
-            user_agent=settings.REDDIT_USER_AGENT,
-        )
-
-
 def reddit_login(request: HttpRequest):
     user_id = request.GET.get("user_id")
     if not user_id:
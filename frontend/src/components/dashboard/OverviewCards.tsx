@@ -10,20 +10,22 @@ import {
 } from "lucide-react";
 
 import { currentTheme } from "@/lib/themes";
-import type { ScheduledPost } from "@/types/api";
+import type { DashboardData } from "@/types/api";
 
 interface OverviewCardsProps {
-  posts: ScheduledPost[];
+  posts: DashboardData["posts"] | null;
+  recentSubmissions: DashboardData["recent_submissions"] | null;
   redditAccountsCount: number;
   isLoading?: boolean;
 }
 
 export function OverviewCards({
   posts,
+  recentSubmissions,
   redditAccountsCount,
   isLoading,
 }: OverviewCardsProps) {
-  if (isLoading) {
+  if (isLoading || !posts || !recentSubmissions) {
     return (
       <div className="grid gap-4 grid-cols-1 sm:grid-cols-2 lg:grid-cols-4">
         {[...Array(4)].map((_, i) => (
@@ -42,28 +44,17 @@ export function OverviewCards({
     );
   }
 
-  // Calculate metrics
-  const totalPosts = posts.length;
-  const activePosts = posts.filter((post) => post.status === "active").length;
-  const errorPosts = posts.filter((post) => post.status === "error").length;
+  // Calculate metrics from the dashboard's counts
+  const totalPosts = posts.total;
+  const activePosts = posts.by_status.active ?? 0;
+  const errorPosts = posts.by_status.error ?? 0;
+  const retryingPosts = posts.by_status.pending_retry ?? 0;
 
-  // Calculate posts this month
-  const currentMonth = new Date().getMonth();
-  const currentYear = new Date().getFullYear();
-  const postsThisMonth = posts.filter((post) => {
-    const postDate = new Date(post.created_at);
-    return (
-      postDate.getMonth() === currentMonth &&
-      postDate.getFullYear() === currentYear
-    );
-  }).length;
-
-  // Calculate success rate
-  const publishedPosts = posts.filter(
-    (post) => post.status === "completed"
-  ).length;
+  // Success rate of the last week's submission attempts
+  const publishedPosts = recentSubmissions.succeeded;
+  const finishedAttempts = recentSubmissions.succeeded + recentSubmissions.failed;
   const successRate =
-    totalPosts > 0 ? Math.round((publishedPosts / totalPosts) * 100) : 0;
+    finishedAttempts > 0 ? Math.round((publishedPosts / finishedAttempts) * 100) : 0;
 
   const cards = [
     {
@@ -71,11 +62,11 @@ export function OverviewCards({
       icon: Calendar,
       value: totalPosts.toString(),
       description: "All scheduled posts",
-      trend: postsThisMonth > 0 ? "up" : null,
+      trend: null,
       trendValue:
-        postsThisMonth > 0
-          ? `+${postsThisMonth} this month`
-          : "No posts this month",
+        retryingPosts > 0
+          ? `${retryingPosts} waiting to retry`
+          : "No retries pending",
     },
     {
       title: "Active Posts",
@@ -106,12 +97,19 @@ export function OverviewCards({
       title: "Success Rate",
       icon: CheckCircle,
       value: `${successRate}%`,
-      description: "Posts published successfully",
-      trend: successRate >= 90 ? "up" : successRate >= 70 ? null : "down",
+      description: "Submissions in the last 7 days",
+      trend:
+        finishedAttempts === 0
+          ? null
+          : successRate >= 90
+          ? "up"
+          : successRate >= 70
+          ? null
+          : "down",
       trendValue:
         publishedPosts > 0
           ? `${publishedPosts} published`
-          : "No posts published yet",
+          : "No posts published this week",
     },
   ];
 
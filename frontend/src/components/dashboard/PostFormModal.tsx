@@ -44,7 +44,7 @@ import {
   getDashboardData,
   convertTextToCron,
 } from "@/services/api";
-import type { ScheduledPostData, RedditAccount } from "@/types/api";
+import type { ScheduledPostData, RedditAccountSummary } from "@/types/api";
 
 
 interface PostFormModalProps {
@@ -84,7 +84,7 @@ export function PostFormModal({
   const [cronSchedule, setCronSchedule] = useState("");
   const [endDate, setEndDate] = useState<string | null>(null);
   const [redditAccount, setRedditAccount] = useState<number | null>(null);
-  const [availableAccounts, setAvailableAccounts] = useState<RedditAccount[]>([]);
+  const [availableAccounts, setAvailableAccounts] = useState<RedditAccountSummary[]>([]);
 
   const [isLoading, setIsLoading] = useState(false);
   const [isSubmitting, setIsSubmitting] = useState(false);
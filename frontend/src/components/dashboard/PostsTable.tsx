@@ -29,12 +29,12 @@ import {
 } from "lucide-react";
 
 import { currentTheme } from "@/lib/themes";
-import type { ScheduledPost } from "@/types/api";
+import type { ScheduledPostSummary } from "@/types/api";
 import { postNow } from "@/services/api";
 
 
 interface PostsTableProps {
-  posts: ScheduledPost[];
+  posts: ScheduledPostSummary[];
   isLoading?: boolean;
   onDelete: (postId: number) => void;
   onCreatePost: () => void;
@@ -1,9 +1,9 @@
 import { currentTheme } from "@/lib/themes";
-import type { RedditAccount } from "@/types/api";
+import type { RedditAccountSummary } from "@/types/api";
 
 interface WelcomeSectionProps {
   userName: string | null;
-  redditAccounts: RedditAccount[];
+  redditAccounts: RedditAccountSummary[];
   handleLinkReddit: () => void;
 }
 
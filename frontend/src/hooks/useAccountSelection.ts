@@ -1,20 +1,20 @@
 import { useState, useCallback, useRef, useEffect } from "react";
 
 import * as api from "../services/api";
-import type { RedditAccount } from "../types/api";
+import type { RedditAccountSummary } from "../types/api";
 import { useApiErrorHandler } from "./useApiErrorHandler";
 import { accountStorage } from "../services/accountStorage";
 
 
 export function useAccountSelection() {
-  const [redditAccounts, setRedditAccounts] = useState<RedditAccount[]>([]);
-  const [selectedAccount, setSelectedAccount] = useState<RedditAccount | null>(null);
+  const [redditAccounts, setRedditAccounts] = useState<RedditAccountSummary[]>([]);
+  const [selectedAccount, setSelectedAccount] = useState<RedditAccountSummary | null>(null);
 
   const { handleApiCall } = useApiErrorHandler();
   const debounceTimeoutRef = useRef<NodeJS.Timeout | null>(null);
 
   const initializeAccountSelection = useCallback(
-    (accounts: RedditAccount[]) => {
+    (accounts: RedditAccountSummary[]) => {
       setRedditAccounts(accounts);
 
       if (accounts.length > 0 && !selectedAccount) {
@@ -1,11 +1,11 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { toast } from "sonner";
 
 import * as api from "../services/api";
 import { useAuth } from "../hooks/useAuth";
 import { currentTheme } from "@/lib/themes";
-import type { ScheduledPost } from "../types/api";
+import type { DashboardData, ScheduledPostSummary } from "../types/api";
 import { useAccountSelection } from "../hooks/useAccountSelection";
 import { useApiErrorHandler } from "../hooks/useApiErrorHandler";
 
@@ -21,7 +21,13 @@ import { PostFormModal } from "../components/dashboard/PostFormModal";
 export default function DashboardPage() {
   type LoadingState = 'idle' | 'loading' | 'success' | 'error';
 
-  const [posts, setPosts] = useState<ScheduledPost[]>([]);
+  const [dashboard, setDashboard] = useState<DashboardData | null>(null);
+  const [posts, setPosts] = useState<ScheduledPostSummary[]>([]);
+  // The posts list is only fetched once its table is on screen
+  const [postsState, setPostsState] = useState<LoadingState>('idle');
+  const postsTableRef = useRef<HTMLDivElement>(null);
+  // Read by the event stream's callbacks, which outlive any one render
+  const postsRequestedRef = useRef(false);
   const [loadingState, setLoadingState] = useState<LoadingState>('loading');
   const [error, setError] = useState<string | null>(null);
   const [userName, setUserName] = useState<string | null>(null);
@@ -48,6 +54,7 @@ export default function DashboardPage() {
     setError(null);
 
     try {
+      // Everything but the posts table comes from the one aggregate request
       const dashboardData = await handleApiCall(() => api.getDashboardData(), {
         context: "fetching dashboard data",
         errorMessage: "Failed to load dashboard information"
@@ -55,27 +62,9 @@ export default function DashboardPage() {
 
       if (!dashboardData) return;
 
+      setDashboard(dashboardData);
       setUserName(dashboardData.user.username);
-
-      // Fetch scheduled posts and Reddit accounts in parallel
-      const [scheduledPostsResult, accountsResult] = await Promise.all([
-        handleApiCall(
-          () => api.getScheduledPosts(),
-          { context: "fetching scheduled posts" }
-        ),
-        handleApiCall(
-          () => api.getRedditAccounts(),
-          { context: "fetching Reddit accounts" }
-        )
-      ]);
-
-      if (scheduledPostsResult) {
-        setPosts(scheduledPostsResult);
-      }
-
-      if (accountsResult) {
-        initializeAccountSelection(accountsResult);
-      }
+      initializeAccountSelection(dashboardData.reddit_accounts.accounts);
 
       setLoadingState('success');
     } catch (err: unknown) {
@@ -89,6 +78,23 @@ export default function DashboardPage() {
     }
   };
 
+  const fetchPosts = async () => {
+    postsRequestedRef.current = true;
+    setPostsState('loading');
+
+    const scheduledPosts = await handleApiCall(
+      () => api.getScheduledPosts(),
+      { context: "fetching scheduled posts" }
+    );
+
+    if (scheduledPosts) {
+      setPosts(scheduledPosts);
+      setPostsState('success');
+    } else {
+      setPostsState('error');
+    }
+  };
+
   const handleLogout = async () => {
     await handleApiCall(
       () => api.logout(),
@@ -115,6 +121,8 @@ export default function DashboardPage() {
 
     if (result === null) {
       setPosts(originalPosts);
+    } else {
+      fetchData();
     }
   };
 
@@ -135,6 +143,9 @@ export default function DashboardPage() {
 
   const handlePostModalSuccess = () => {
     fetchData();
+    if (postsState !== 'idle') {
+      fetchPosts();
+    }
   };
 
 
@@ -143,8 +154,65 @@ export default function DashboardPage() {
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []); // No dependencies - only run on mount
 
+  // Fetch the posts list the first time its table scrolls into view
+  useEffect(() => {
+    if (loadingState !== 'success' || postsState !== 'idle' || !postsTableRef.current) {
+      return;
+    }
+
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        observer.disconnect();
+        fetchPosts();
+      }
+    });
+    observer.observe(postsTableRef.current);
+
+    return () => observer.disconnect();
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [loadingState, postsState]);
+
+  // Apply status changes pushed by the server instead of polling the posts list
+  useEffect(() => {
+    const controller = new AbortController();
+
+    api.subscribeToPostEvents(
+      {
+        onPosts: (events) => {
+          setPosts((currentPosts) => {
+            const deleted = new Set(events.filter((event) => event.deleted).map((event) => event.id));
+            const changes = new Map(
+              events.filter((event) => !event.deleted).map((event) => [event.id, event])
+            );
+            return currentPosts
+              .filter((post) => !deleted.has(post.id))
+              .map((post) => {
+                const change = changes.get(post.id);
+                return change ? { ...post, ...change } : post;
+              });
+          });
+        },
+        onResync: async () => {
+          if (!postsRequestedRef.current) return;
+
+          const scheduledPosts = await handleApiCall(
+            () => api.getScheduledPosts(),
+            { context: "refreshing scheduled posts" }
+          );
+          if (scheduledPosts) {
+            setPosts(scheduledPosts);
+          }
+        }
+      },
+      controller.signal
+    );
+
+    return () => controller.abort();
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
 
-  if (loadingState === 'loading' && !posts.length && !redditAccounts.length) {
+  if (loadingState === 'loading' && !dashboard) {
     return <DashboardSkeleton />;
   }
 
@@ -188,9 +256,10 @@ export default function DashboardPage() {
 
           {/* Overview Cards */}
           <OverviewCards
-            posts={posts}
+            posts={dashboard?.posts ?? null}
+            recentSubmissions={dashboard?.recent_submissions ?? null}
             redditAccountsCount={redditAccounts.length}
-            isLoading={loadingState === 'loading' && posts.length === 0}
+            isLoading={loadingState === 'loading' && !dashboard}
           />
 
           {/* Main Content Grid */}
@@ -206,10 +275,10 @@ export default function DashboardPage() {
             </div>
 
             {/* Posts Table - Takes 2/3 width on large screens */}
-            <div className="lg:col-span-2">
+            <div className="lg:col-span-2" ref={postsTableRef}>
               <PostsTable
                 posts={posts}
-                isLoading={loadingState === 'loading' && posts.length === 0}
+                isLoading={postsState === 'idle' || postsState === 'loading'}
                 onDelete={handleDeletePost}
                 onCreatePost={handleCreatePost}
                 onEditPost={handleEditPost}
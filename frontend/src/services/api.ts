@@ -10,10 +10,14 @@ import type {
   UserResponse,
   RedditAccount,
   ScheduledPost,
+  ScheduledPostSummary,
   ScheduledPostData,
   ScheduledPostUpdate,
   SubmittedPost,
-  DashboardData
+  SubmittedPostSummary,
+  DashboardData,
+  CursorPaginatedResponse,
+  PostStatusEvent
 } from '../types/api';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000';
@@ -65,6 +69,26 @@ apiClient.interceptors.response.use(
   }
 );
 
+/**
+ * Fetches every page of a cursor-paginated list endpoint
+ * @param url - List endpoint path
+ * @returns Promise resolving to the concatenated results of all pages
+ */
+const getAllPages = async <T>(url: string, params: Record<string, string> = {}): Promise<T[]> => {
+  const results: T[] = [];
+  let cursor: string | null = null;
+
+  do {
+    const response: { data: CursorPaginatedResponse<T> } = await apiClient.get(url, {
+      params: { ...params, page_size: 500, ...(cursor ? { cursor } : {}) }
+    });
+    results.push(...response.data.results);
+    cursor = response.data.next ? new URL(response.data.next).searchParams.get('cursor') : null;
+  } while (cursor);
+
+  return results;
+};
+
 export const login = async (credentials: LoginCredentials): Promise<LoginResponse> => {
   return withErrorHandling(async () => {
     const response = await apiClient.post('/api/users/auth/token/', credentials);
@@ -142,10 +166,9 @@ export const getDashboardData = async (): Promise<DashboardData> => {
   });
 };
 
-export const getScheduledPosts = async (): Promise<ScheduledPost[]> => {
+export const getScheduledPosts = async (): Promise<ScheduledPostSummary[]> => {
   return withRetry(async () => {
-    const response = await apiClient.get('/api/reddit/posts/');
-    return response.data;
+    return getAllPages<ScheduledPostSummary>('/api/reddit/posts/', { fields: '-selftext' });
   });
 };
 
@@ -180,12 +203,11 @@ export const getRedditAccounts = async (): Promise<RedditAccount[]> => {
   return response.data;
 };
 
-export const getSubmittedPosts = async (scheduledPostId?: number): Promise<SubmittedPost[]> => {
+export const getSubmittedPosts = async (scheduledPostId?: number): Promise<SubmittedPostSummary[]> => {
   const url = scheduledPostId
     ? `/api/reddit/posts/${scheduledPostId}/submissions/`
     : '/api/reddit/submissions/';
-  const response = await apiClient.get(url);
-  return response.data;
+  return getAllPages<SubmittedPostSummary>(url, { fields: '-selftext' });
 };
 
 export const getSubmittedPost = async (id: number): Promise<SubmittedPost> => {
@@ -213,3 +235,88 @@ export const postNow = async (postId: number): Promise<void> => {
     await apiClient.post(`/api/reddit/posts/${postId}/post-now/`);
   });
 };
+
+export interface PostEventHandlers {
+  onPosts: (events: PostStatusEvent[]) => void;
+  /** Called when events may have been missed and the posts list should be refetched */
+  onResync: () => void;
+}
+
+/**
+ * Follows the server-sent post status stream until the signal aborts.
+ * EventSource can't send the Authorization header, so the stream is read with fetch.
+ * Reconnects after errors and when the server ends the stream, refreshing the token on a 401.
+ * @param handlers - Callbacks for status deltas and resync requests
+ * @param signal - Aborts the subscription
+ */
+export const subscribeToPostEvents = async (
+  handlers: PostEventHandlers,
+  signal: AbortSignal
+): Promise<void> => {
+  let retryMs = 3000;
+  let connected = false;
+  let refreshed = false;
+
+  while (!signal.aborted) {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/reddit/posts/events/`, {
+        headers: { Authorization: `Bearer ${tokenStorage.getAccessToken()}` },
+        signal
+      });
+
+      if (response.status === 401) {
+        if (refreshed) return;
+        try {
+          await refreshToken();
+        } catch {
+          return;
+        }
+        refreshed = true;
+        continue;
+      }
+      refreshed = false;
+      if (!response.ok || !response.body) {
+        throw new Error(`Post events stream failed with ${response.status}`);
+      }
+
+      // Anything may have changed while we weren't listening
+      if (connected) {
+        handlers.onResync();
+      }
+      connected = true;
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let event = 'message';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+            else if (line.startsWith('retry:')) retryMs = Number(line.slice(6)) || retryMs;
+          }
+
+          if (event === 'status' && data) {
+            handlers.onPosts(JSON.parse(data).posts);
+          } else if (event === 'resync') {
+            handlers.onResync();
+          }
+        }
+      }
+    } catch (error) {
+      if (signal.aborted) return;
+      console.error('Post events stream error:', error);
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, retryMs));
+  }
+};
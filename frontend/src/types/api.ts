@@ -62,6 +62,12 @@ export interface RedditAccount {
   updated_at: string;
 }
 
+// The account fields the dashboard payload carries
+export type RedditAccountSummary = Pick<
+  RedditAccount,
+  'id' | 'reddit_username' | 'reddit_account_status' | 'created_at'
+>;
+
 export interface RedditLoginUrlResponse {
   login_url: string;
 }
@@ -85,14 +91,20 @@ export interface ScheduledPost {
   user_timezone: string;
   next_run: string | null;
   end_date: string | null;
-  status: 'active' | 'paused' | 'completed' | 'error';
+  status: 'active' | 'paused' | 'completed' | 'error' | 'queued' | 'running' | 'pending_retry';
+  attempt_count: number;
+  next_attempt_at: string | null;
   last_submission_error: string | null;
+  preflight_error: string | null;
   last_run_started: string | null;
   last_run_finished: string | null;
   created_at: string;
   updated_at: string;
 }
 
+// What the post list returns: selftext is only loaded for a single post
+export type ScheduledPostSummary = Omit<ScheduledPost, 'selftext'>;
+
 export type ScheduledPostData = Omit<
   ScheduledPost,
   | 'id'
@@ -101,7 +113,10 @@ export type ScheduledPostData = Omit<
   | 'reddit_account_username'
   | 'next_run'
   | 'status'
+  | 'attempt_count'
+  | 'next_attempt_at'
   | 'last_submission_error'
+  | 'preflight_error'
   | 'last_run_started'
   | 'last_run_finished'
   | 'created_at'
@@ -112,6 +127,16 @@ export type ScheduledPostData = Omit<
 
 export type ScheduledPostUpdate = Partial<ScheduledPostData>;
 
+/** One post's change as pushed by the post events stream; absent fields are unchanged */
+export type PostStatusEvent =
+  | { id: number; deleted: true }
+  | (Pick<ScheduledPost, 'id'> &
+      Partial<
+        Pick<ScheduledPost, 'status' | 'next_run' | 'last_submission_error' | 'preflight_error'>
+      > & {
+        deleted?: undefined;
+      });
+
 // ===== Submitted Post Types =====
 
 export interface SubmittedPost {
@@ -130,6 +155,9 @@ export interface SubmittedPost {
   removed_by: string | null;
 }
 
+// What the submission lists return: selftext is only loaded for a single submission
+export type SubmittedPostSummary = Omit<SubmittedPost, 'selftext'>;
+
 // ===== Dashboard Types =====
 
 export interface DashboardData {
@@ -139,9 +167,29 @@ export interface DashboardData {
   };
   reddit_accounts: {
     is_linked: boolean;
-    accounts: RedditAccount[];
+    accounts: RedditAccountSummary[];
     count: number;
   };
+  posts: {
+    total: number;
+    by_status: Record<string, number>;
+  };
+  upcoming_runs: Array<{
+    id: number;
+    title: string;
+    subreddit: string;
+    reddit_account_id: number;
+    status: 'active' | 'pending_retry';
+    // The retry time for posts waiting to retry a run
+    next_run: string;
+  }>;
+  recent_submissions: {
+    since: string;
+    succeeded: number;
+    failed: number;
+    // Attempts put off by rate limits; not failures
+    rate_limited: number;
+  };
   links: {
     reddit_login: string;
   };
@@ -175,6 +223,12 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+export interface CursorPaginatedResponse<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 // ===== Request Configuration =====
 
 export interface RequestConfig {